@@ -11,6 +11,13 @@ python manage.py migrate --noinput
 echo "Creating superuser (if needed)..."
 python manage.py create_superuser || echo "Superuser creation skipped or failed"
 
+# SERVER_MODE=asgi serves the same app through uvicorn workers, so the async
+# endpoints under /api/async/ share one event loop per worker
+if [ "${SERVER_MODE:-wsgi}" = "asgi" ]; then
+    echo "Starting Gunicorn with Uvicorn workers (ASGI)..."
+    exec gunicorn --bind 0.0.0.0:8000 --timeout 120 --workers "${WEB_CONCURRENCY:-2}" -k uvicorn_worker.UvicornWorker --access-logfile - --error-logfile - university_api.asgi:application
+fi
+
 echo "Starting Gunicorn..."
-exec gunicorn --bind 0.0.0.0:8000 --timeout 120 --workers 2 --access-logfile - --error-logfile - university_api.wsgi:application
+exec gunicorn --bind 0.0.0.0:8000 --timeout 120 --workers "${WEB_CONCURRENCY:-2}" --access-logfile - --error-logfile - university_api.wsgi:application
 
@@ -4,6 +4,7 @@ from rest_framework.response import Response
 from django.shortcuts import get_object_or_404
 from django.db.models import F
 from django.utils import timezone
+from universities import entitlements
 from universities.permissions import HasActiveSubscription
 from .models import CreatorProfile, Opportunity, SubscriptionAttribution, OpportunityView
 from .serializers import (
@@ -43,14 +44,19 @@ class OpportunityDetailView(generics.RetrieveAPIView):
     queryset = Opportunity.objects.filter(status='published')
     permission_classes = [permissions.AllowAny]
     
+    def _has_subscription(self):
+        # From the token's claims when they are current; a token minted
+        # before the subscription changed falls back to the dashboard
+        request = self.request
+        if not request.user.is_authenticated:
+            return False
+        if request.auth is not None and entitlements.is_current(request.auth):
+            return entitlements.is_entitled(request.auth)
+        return HasActiveSubscription().has_permission(request, self)
+
     def get_serializer_class(self):
         # Check if user has active subscription
-        user = self.request.user
-        has_subscription = (user.is_authenticated and 
-                          hasattr(user, 'dashboard') and 
-                          user.dashboard.subscription_status == 'active')
-        
-        if has_subscription:
+        if self._has_subscription():
             return OpportunityDetailSerializer
         else:
             return OpportunityListSerializer
@@ -68,9 +74,7 @@ class OpportunityDetailView(generics.RetrieveAPIView):
         data = serializer.data
         
         # Add subscription status info
-        has_subscription = (request.user.is_authenticated and 
-                          hasattr(request.user, 'dashboard') and 
-                          request.user.dashboard.subscription_status == 'active')
+        has_subscription = self._has_subscription()
         data['user_has_subscription'] = has_subscription
         data['subscription_required'] = not has_subscription
         
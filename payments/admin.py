@@ -1,9 +1,10 @@
 from django.contrib import admin
-from django.db.models import Sum, Count
+from django.db.models import Count
 from django.utils.html import format_html
 from django.utils import timezone
 from datetime import datetime, timedelta
-from .models import Payment
+from . import rollups
+from .models import Payment, PaymentDailyRollup, WebhookEvent
 
 @admin.register(Payment)
 class PaymentAdmin(admin.ModelAdmin):
@@ -19,28 +20,20 @@ class PaymentAdmin(admin.ModelAdmin):
         current_month_start = now.replace(day=1, hour=0, minute=0, second=0, microsecond=0)
         last_month_start = (current_month_start - timedelta(days=1)).replace(day=1)
         
-        # Current month earnings
-        current_month_payments = Payment.objects.filter(
-            status='success',
-            payment_date__gte=current_month_start
-        )
-        current_month_total = current_month_payments.aggregate(Sum('amount'))['amount__sum'] or 0
-        current_month_count = current_month_payments.count()
+        # Earnings come from the daily rollups: one row per day, not per payment
+        current_month = rollups.totals(start_day=current_month_start.date())
+        current_month_total = current_month['success_amount']
+        current_month_count = current_month['success_count']
         
-        # Last month earnings
-        last_month_payments = Payment.objects.filter(
-            status='success',
-            payment_date__gte=last_month_start,
-            payment_date__lt=current_month_start
-        )
-        last_month_total = last_month_payments.aggregate(Sum('amount'))['amount__sum'] or 0
-        last_month_count = last_month_payments.count()
+        last_month = rollups.totals(start_day=last_month_start.date(), end_day=current_month_start.date() - timedelta(days=1))
+        last_month_total = last_month['success_amount']
+        last_month_count = last_month['success_count']
         
-        # Total earnings
-        total_earnings = Payment.objects.filter(status='success').aggregate(Sum('amount'))['amount__sum'] or 0
-        total_payments = Payment.objects.filter(status='success').count()
+        all_time = rollups.totals()
+        total_earnings = all_time['success_amount']
+        total_payments = all_time['success_count']
         
-        # Active subscribers (paid in last 30 days)
+        # Active subscribers (paid in last 30 days), over the (status, payment_date) index
         thirty_days_ago = now - timedelta(days=30)
         active_subscribers = Payment.objects.filter(
             status='success',
@@ -62,4 +55,22 @@ class PaymentAdmin(admin.ModelAdmin):
             }
         })
         
-        return super().changelist_view(request, extra_context=extra_context)
\ No newline at end of file
+        return super().changelist_view(request, extra_context=extra_context)
+
+
+@admin.register(WebhookEvent)
+class WebhookEventAdmin(admin.ModelAdmin):
+    list_display = ['tx_ref', 'event_type', 'status', 'attempts', 'received_at', 'processed_at']
+    list_filter = ['status', 'event_type', 'received_at']
+    search_fields = ['tx_ref']
+    readonly_fields = ['provider', 'tx_ref', 'event_type', 'payload', 'raw_body', 'status', 'attempts',
+                       'last_error', 'received_at', 'locked_at', 'processed_at']
+    ordering = ['-received_at']
+
+
+@admin.register(PaymentDailyRollup)
+class PaymentDailyRollupAdmin(admin.ModelAdmin):
+    list_display = ['day', 'payment_count', 'success_count', 'success_amount', 'unique_payers', 'updated_at']
+    date_hierarchy = 'day'
+    readonly_fields = ['day', 'payment_count', 'success_count', 'success_amount', 'unique_payers', 'updated_at']
+    ordering = ['-day']
@@ -0,0 +1,39 @@
+"""Async version of confirm_payment; see universities.async_views."""
+import logging
+import os
+
+from asgiref.sync import sync_to_async
+from django.http import JsonResponse
+from rest_framework import status
+
+from universities.async_views import async_endpoint
+from .chapa import AsyncChapaClient, ChapaError
+from .views import _chapa_says_paid, _confirm
+
+logger = logging.getLogger(__name__)
+
+
+@async_endpoint('POST')
+async def confirm_payment(request):
+    """Confirm payment and return auth tokens for auto-login"""
+    tx_ref = request.data.get('tx_ref') or request.data.get('payment_ref')
+    draft_id = request.data.get('draft_id')
+    email = request.data.get('email')
+
+    logger.info(f"Confirming payment {tx_ref} (async)")
+
+    try:
+        payment_verified = False
+        if tx_ref and os.environ.get("CHAPA_SECRET_KEY"):
+            try:
+                payment_verified = _chapa_says_paid(await AsyncChapaClient().verify(tx_ref))
+            except ChapaError as e:
+                logger.warning(f"Error verifying payment {tx_ref} with Chapa: {e}")
+
+        body, status_code = await sync_to_async(_confirm)(tx_ref, draft_id, email, payment_verified)
+        return JsonResponse(body, status=status_code)
+    except Exception as e:
+        return JsonResponse(
+            {'error': f'Error confirming payment: {str(e)}'},
+            status=status.HTTP_500_INTERNAL_SERVER_ERROR,
+        )
@@ -0,0 +1,406 @@
+"""
+Client for the Chapa API.
+
+One ChapaClient holds a pooled HTTP session, so calls reuse connections
+instead of paying a TLS handshake each. get_client() returns the one client
+of this process, which request handlers share.
+
+- Every request has separate connect and read timeouts
+  (CHAPA_CONNECT_TIMEOUT_SECONDS, CHAPA_READ_TIMEOUT_SECONDS) and is spaced
+  out by a rate limit shared by the threads using the client.
+- Idempotent calls (verify) are retried with exponential back-off on
+  connection errors, timeouts, 429 and 5xx; initialize is not retried.
+- A circuit breaker opens after CHAPA_BREAKER_FAILURE_THRESHOLD consecutive
+  failures of that kind. While it is open calls fail at once with
+  ChapaUnavailable instead of holding a web worker for a full timeout. After
+  CHAPA_BREAKER_RESET_SECONDS, one trial call decides whether it closes again.
+- Per-operation call counts, outcomes and latency go to `metrics` (this
+  process) and to the `payments.chapa` logger.
+
+AsyncChapaClient is the same client over httpx for the async views; it
+shares the process-wide client's circuit breaker and rate limit.
+
+CHAPA_API_BASE_URL points the client elsewhere, e.g. at the local stand-in
+server in payments.standin for offline runs.
+"""
+import asyncio
+import logging
+import os
+import threading
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+
+import httpx
+import requests
+from django.conf import settings
+from requests.adapters import HTTPAdapter
+from requests_cache.patcher import OriginalSession
+from tenacity import retry, retry_if_exception_type, stop_after_attempt, wait_exponential
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_BASE_URL = 'https://api.chapa.co/v1'
+
+
+class ChapaError(Exception):
+    """Chapa could not be reached or answered with an error, after retries."""
+
+
+class ChapaUnavailable(ChapaError):
+    """Chapa is degraded (or the circuit breaker is open); the call can be retried later."""
+
+    def __init__(self, message, retry_after=None):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+class _RetryableError(ChapaUnavailable):
+    pass
+
+
+class _RateLimiter:
+    """Spaces calls at least 1/rate seconds apart across threads."""
+
+    def __init__(self, per_second):
+        self.interval = 1.0 / per_second if per_second else 0.0
+        self._lock = threading.Lock()
+        self._next = 0.0
+
+    def reserve(self):
+        """Seconds to wait before the caller's slot."""
+        if not self.interval:
+            return 0.0
+        with self._lock:
+            now = time.monotonic()
+            slot = max(now, self._next)
+            self._next = slot + self.interval
+        return slot - now
+
+    def wait(self):
+        delay = self.reserve()
+        if delay > 0:
+            time.sleep(delay)
+
+    async def await_slot(self):
+        delay = self.reserve()
+        if delay > 0:
+            await asyncio.sleep(delay)
+
+
+class CircuitBreaker:
+    """
+    closed: calls go through, consecutive failures are counted;
+    open: calls are refused until `reset_seconds` have passed;
+    half-open: one trial call is let through, its outcome closes or reopens.
+    """
+
+    def __init__(self, failure_threshold=5, reset_seconds=30):
+        self.failure_threshold = failure_threshold
+        self.reset_seconds = reset_seconds
+        self._lock = threading.Lock()
+        self.state = 'closed'
+        self.failures = 0
+        self._opened_at = 0.0
+        self._trial_running = False
+
+    def retry_after(self):
+        return max(0.0, self._opened_at + self.reset_seconds - time.monotonic())
+
+    def allow(self):
+        with self._lock:
+            if self.state == 'open' and self.retry_after() <= 0:
+                self.state = 'half-open'
+                self._trial_running = False
+            if self.state == 'closed':
+                return True
+            if self.state == 'half-open' and not self._trial_running:
+                self._trial_running = True
+                return True
+            return False
+
+    def record_success(self):
+        with self._lock:
+            if self.state != 'closed':
+                logger.info('Chapa circuit breaker closed')
+            self.state = 'closed'
+            self.failures = 0
+            self._trial_running = False
+
+    def release_trial(self):
+        """End a call that neither succeeded nor failed (e.g. a cancelled task), so it can't hold the half-open trial."""
+        with self._lock:
+            self._trial_running = False
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            self._trial_running = False
+            if self.state == 'half-open' or (self.state == 'closed' and self.failures >= self.failure_threshold):
+                self.state = 'open'
+                self._opened_at = time.monotonic()
+                logger.warning(f'Chapa circuit breaker opened after {self.failures} consecutive failures')
+
+
+class ChapaMetrics:
+    """Thread-safe per-operation counters: outcomes and latency of the calls made by this process."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._stats = {}
+
+    def record(self, operation, outcome, seconds):
+        with self._lock:
+            entry = self._stats.setdefault(operation, {'calls': 0, 'seconds': 0.0, 'max_seconds': 0.0, 'outcomes': Counter()})
+            entry['calls'] += 1
+            entry['seconds'] += seconds
+            entry['max_seconds'] = max(entry['max_seconds'], seconds)
+            entry['outcomes'][outcome] += 1
+
+    def as_dict(self):
+        with self._lock:
+            return {
+                operation: {
+                    'calls': entry['calls'],
+                    'avg_ms': round(entry['seconds'] * 1000 / entry['calls'], 1) if entry['calls'] else 0.0,
+                    'max_ms': round(entry['max_seconds'] * 1000, 1),
+                    'outcomes': dict(entry['outcomes']),
+                }
+                for operation, entry in self._stats.items()
+            }
+
+
+# Calls made by every client of this process
+metrics = ChapaMetrics()
+
+
+def _check_breaker(breaker, operation):
+    if not breaker.allow():
+        metrics.record(operation, 'circuit_open', 0.0)
+        raise ChapaUnavailable('Chapa is unavailable (circuit open)', retry_after=breaker.retry_after())
+
+
+def _classify(status_code):
+    """(metrics outcome, whether Chapa is degraded) of an answered call."""
+    return ('ok' if status_code < 400 else f'http_{status_code}'), (status_code == 429 or status_code >= 500)
+
+
+def _record(operation, outcome, seconds):
+    metrics.record(operation, outcome, seconds)
+    logger.info(f'chapa {operation} {outcome} {seconds * 1000:.0f}ms')
+
+
+def _checkout_url(status_code, body):
+    checkout_url = (body.get('data') or {}).get('checkout_url') if isinstance(body.get('data'), dict) else None
+    if body.get('status') == 'success' and checkout_url:
+        return checkout_url
+    raise ChapaError(body.get('message') or f'Chapa returned HTTP {status_code}')
+
+
+def _verification(tx_ref, status_code, body):
+    if body.get('status') == 'success' and isinstance(body.get('data'), dict):
+        return body['data']
+    if status_code in (400, 404):
+        return None
+    raise ChapaError(f"Chapa could not verify {tx_ref}: {body.get('message') or status_code}")
+
+
+def _retrying(request, attempts):
+    return retry(
+        stop=stop_after_attempt(attempts), wait=wait_exponential(multiplier=0.5, min=0.5, max=8),
+        retry=retry_if_exception_type(_RetryableError), reraise=True,
+    )(request)
+
+
+class ChapaClient:
+    def __init__(self, base_url=None, secret_key=None, connect_timeout=None, read_timeout=None, max_per_second=None,
+                 attempts=3, pool_size=None, breaker=None):
+        self.base_url = (base_url or getattr(settings, 'CHAPA_API_BASE_URL', DEFAULT_BASE_URL)).rstrip('/')
+        self.secret_key = secret_key or os.environ.get('CHAPA_SECRET_KEY')
+        self.timeout = (
+            connect_timeout or getattr(settings, 'CHAPA_CONNECT_TIMEOUT_SECONDS', 3.05),
+            read_timeout or getattr(settings, 'CHAPA_READ_TIMEOUT_SECONDS', 10),
+        )
+        self.limiter = _RateLimiter(max_per_second if max_per_second is not None else getattr(settings, 'CHAPA_MAX_REQUESTS_PER_SECOND', 10))
+        self.breaker = breaker or CircuitBreaker(
+            failure_threshold=getattr(settings, 'CHAPA_BREAKER_FAILURE_THRESHOLD', 5),
+            reset_seconds=getattr(settings, 'CHAPA_BREAKER_RESET_SECONDS', 30),
+        )
+        pool_size = pool_size or getattr(settings, 'CHAPA_VERIFY_WORKERS', 8)
+        # Payment state must never come from the scrapers' global HTTP cache
+        self.session = OriginalSession()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size)
+        self.session.mount('https://', adapter)
+        self.session.mount('http://', adapter)
+        self.session.headers['Authorization'] = f'Bearer {self.secret_key}'
+        self.attempts = attempts
+        self._retrying_request = _retrying(self._request_once, attempts)
+
+    def close(self):
+        self.session.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def _request(self, operation, method, path, idempotent, **kwargs):
+        request = self._retrying_request if idempotent else self._request_once
+        return request(operation, method, path, **kwargs)
+
+    def _request_once(self, operation, method, path, **kwargs):
+        _check_breaker(self.breaker, operation)
+        started = time.perf_counter()
+        outcome = 'error'
+        settled = False
+        try:
+            self.limiter.wait()
+            started = time.perf_counter()
+            try:
+                response = self.session.request(method, f'{self.base_url}/{path.lstrip("/")}', timeout=self.timeout, **kwargs)
+            except requests.Timeout as e:
+                outcome = 'timeout'
+                raise _RetryableError(f'Chapa timed out: {e}') from e
+            except requests.ConnectionError as e:
+                outcome = 'connection_error'
+                raise _RetryableError(f'Chapa unreachable: {e}') from e
+            except requests.RequestException as e:
+                # A broken or undecodable body, a redirect loop...
+                outcome = 'request_error'
+                raise _RetryableError(f'Chapa request failed: {e}') from e
+            outcome, degraded = _classify(response.status_code)
+            if degraded:
+                raise _RetryableError(f'Chapa returned HTTP {response.status_code}')
+            # Chapa answered: whatever the answer, it isn't degraded
+            self.breaker.record_success()
+            settled = True
+            try:
+                return response.status_code, response.json()
+            except ValueError as e:
+                outcome = 'invalid_response'
+                raise ChapaError(f'Invalid Chapa response (HTTP {response.status_code})') from e
+        except _RetryableError:
+            self.breaker.record_failure()
+            settled = True
+            raise
+        finally:
+            if not settled:
+                self.breaker.release_trial()
+            _record(operation, outcome, time.perf_counter() - started)
+
+    def initialize(self, payload):
+        """
+        Start a hosted checkout; returns its checkout URL. Not retried (not
+        idempotent). Raises ChapaUnavailable when Chapa is degraded and
+        ChapaError when it rejects the payment.
+        """
+        return _checkout_url(*self._request('initialize', 'POST', 'transaction/initialize', idempotent=False, json=payload))
+
+    def verify(self, tx_ref):
+        """
+        The transaction's `data` (with its `status`: success, pending,
+        failed...), or None when Chapa doesn't know the transaction.
+        Raises ChapaError when Chapa can't be asked.
+        """
+        return _verification(tx_ref, *self._request('verify', 'GET', f'transaction/verify/{tx_ref}', idempotent=True))
+
+    def verify_many(self, tx_refs, workers=None):
+        """
+        Verify transactions concurrently (still within the rate limit).
+        Returns {tx_ref: data, None, or the ChapaError raised for it}.
+        """
+        def verify(tx_ref):
+            try:
+                return tx_ref, self.verify(tx_ref)
+            except ChapaError as e:
+                return tx_ref, e
+
+        workers = workers or getattr(settings, 'CHAPA_VERIFY_WORKERS', 8)
+        with ThreadPoolExecutor(max_workers=max(1, min(workers, len(tx_refs) or 1))) as pool:
+            return dict(pool.map(verify, tx_refs))
+
+
+_client = None
+_client_lock = threading.Lock()
+
+
+def get_client():
+    """The process-wide client: one connection pool and one circuit breaker for all requests."""
+    global _client
+    if _client is None:
+        with _client_lock:
+            if _client is None:
+                _client = ChapaClient()
+    return _client
+
+
+class AsyncChapaClient:
+    """
+    ChapaClient's calls as coroutines, over the process's shared httpx
+    client. Configuration, circuit breaker and rate limit are those of
+    `client` (default: get_client()).
+    """
+
+    def __init__(self, client=None):
+        self.client = client or get_client()
+        self._retrying_request = _retrying(self._request_once, self.client.attempts)
+
+    def _http(self):
+        from universities.async_http import get_client as get_async_http_client
+
+        connect, read = self.client.timeout
+        return get_async_http_client(
+            'chapa',
+            timeout=httpx.Timeout(read, connect=connect),
+            headers={'Authorization': f'Bearer {self.client.secret_key}'},
+        )
+
+    async def _request_once(self, operation, method, path, **kwargs):
+        _check_breaker(self.client.breaker, operation)
+        started = time.perf_counter()
+        outcome = 'error'
+        settled = False
+        try:
+            await self.client.limiter.await_slot()
+            started = time.perf_counter()
+            try:
+                response = await self._http().request(method, f'{self.client.base_url}/{path.lstrip("/")}', **kwargs)
+            except httpx.TimeoutException as e:
+                outcome = 'timeout'
+                raise _RetryableError(f'Chapa timed out: {e}') from e
+            except httpx.TransportError as e:
+                outcome = 'connection_error'
+                raise _RetryableError(f'Chapa unreachable: {e}') from e
+            except httpx.HTTPError as e:
+                # A broken or undecodable body, a redirect loop...
+                outcome = 'request_error'
+                raise _RetryableError(f'Chapa request failed: {e}') from e
+            outcome, degraded = _classify(response.status_code)
+            if degraded:
+                raise _RetryableError(f'Chapa returned HTTP {response.status_code}')
+            # Chapa answered: whatever the answer, it isn't degraded
+            self.client.breaker.record_success()
+            settled = True
+            try:
+                return response.status_code, response.json()
+            except ValueError as e:
+                outcome = 'invalid_response'
+                raise ChapaError(f'Invalid Chapa response (HTTP {response.status_code})') from e
+        except _RetryableError:
+            self.client.breaker.record_failure()
+            settled = True
+            raise
+        finally:
+            if not settled:
+                # E.g. the task was cancelled: don't leave the half-open trial claimed
+                self.client.breaker.release_trial()
+            _record(operation, outcome, time.perf_counter() - started)
+
+    async def initialize(self, payload):
+        """See ChapaClient.initialize."""
+        return _checkout_url(*await self._request_once('initialize', 'POST', 'transaction/initialize', json=payload))
+
+    async def verify(self, tx_ref):
+        """See ChapaClient.verify."""
+        return _verification(tx_ref, *await self._retrying_request('verify', 'GET', f'transaction/verify/{tx_ref}'))
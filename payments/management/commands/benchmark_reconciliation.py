@@ -0,0 +1,62 @@
+import contextlib
+import io
+import uuid
+from datetime import timedelta
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.utils import timezone
+from payments.chapa import ChapaClient
+from payments.models import Payment
+from payments.reconciliation import reconcile_with_chapa
+from payments.standin import ChapaStandin
+
+
+class _Rollback(Exception):
+    pass
+
+
+class Command(BaseCommand):
+    help = ('Benchmark payment reconciliation offline: creates pending payments, reconciles them against the local '
+            'Chapa stand-in and rolls everything back')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--payments', type=int, default=500, help='Pending payments to reconcile (default: 500)')
+        parser.add_argument('--latency-ms', type=int, default=50, help='Simulated Chapa latency per request (default: 50)')
+        parser.add_argument('--error-rate', type=float, default=0.0, help='Share of Chapa requests answered with a 503 (default: 0)')
+        parser.add_argument('--workers', type=int, default=8, help='Concurrent verifications (default: 8)')
+        parser.add_argument('--rate', type=float, default=0, help='Max requests per second, 0 for no limit (default: 0)')
+        parser.add_argument('--batch-size', type=int, default=200, help='Payments per batch (default: 200)')
+
+    def handle(self, *args, **options):
+        count = options['payments']
+        with ChapaStandin(latency_ms=options['latency_ms'], error_rate=options['error_rate']) as chapa:
+            try:
+                with transaction.atomic():
+                    bench_payments = self._create_payments(count)
+                    with ChapaClient(base_url=chapa.base_url, secret_key='standin', max_per_second=options['rate'],
+                                     pool_size=options['workers']) as client:
+                        # UserDashboard.update_subscription prints per payment
+                        with contextlib.redirect_stdout(io.StringIO()):
+                            report = reconcile_with_chapa(client=client, batch_size=options['batch_size'], workers=options['workers'],
+                                                          queryset=bench_payments)
+                    raise _Rollback
+            except _Rollback:
+                pass
+            self.stdout.write(report.format())
+            self.stdout.write(f'Chapa requests served: {chapa.requests_served} (retries included)')
+        self.stdout.write(self.style.SUCCESS('Benchmark data rolled back'))
+
+    def _create_payments(self, count):
+        run = uuid.uuid4().hex[:8]
+        user = User.objects.create_user(f'reconcile-bench-{run}', f'reconcile-bench-{run}@example.com')
+        made_at = timezone.now() - timedelta(hours=1)
+        # Every tenth payment fails and every tenth is unknown to Chapa, to exercise each path
+        suffixes = ['', '', '', '', '', '', '', '', '-failed', '-missing']
+        Payment.objects.bulk_create([
+            Payment(user=user, amount=1000, status='pending', payment_date=made_at,
+                    tx_ref=f'bench-{run}-{i}{suffixes[i % len(suffixes)]}')
+            for i in range(count)
+        ], batch_size=1000)
+        # Only these are reconciled, so real payments in the database don't skew the timings
+        return Payment.objects.filter(tx_ref__startswith=f'bench-{run}-')
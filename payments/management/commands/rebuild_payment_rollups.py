@@ -0,0 +1,24 @@
+from datetime import timedelta
+from django.core.management.base import BaseCommand
+from django.db.models import Min
+from django.utils import timezone
+from payments.models import Payment
+from payments.rollups import rebuild
+
+
+class Command(BaseCommand):
+    help = 'Recompute the daily payment rollups from the payment ledger'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--days', type=int, default=30, help='Days to rebuild, ending today (default: 30)')
+        parser.add_argument('--all', action='store_true', help='Rebuild every day since the first payment')
+
+    def handle(self, *args, **options):
+        today = timezone.localdate()
+        if options['all']:
+            first = Payment.objects.aggregate(first=Min('payment_date'))['first']
+            start = timezone.localdate(first) if first else today
+        else:
+            start = today - timedelta(days=max(1, options['days']) - 1)
+        written = rebuild(start, today)
+        self.stdout.write(self.style.SUCCESS(f'Rebuilt {written} daily rollups ({start} to {today})'))
@@ -0,0 +1,41 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime, parse_date
+from datetime import datetime
+from payments.chapa import ChapaClient
+from payments.reconciliation import reconcile_with_chapa
+
+
+class Command(BaseCommand):
+    help = 'Verify pending payments with Chapa and apply every successful payment that has not extended its subscription yet'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, help='Payments per batch and per transaction (default: PAYMENT_RECONCILE_BATCH_SIZE)')
+        parser.add_argument('--workers', type=int, help='Concurrent Chapa verifications (default: CHAPA_VERIFY_WORKERS)')
+        parser.add_argument('--rate', type=float, help='Max Chapa requests per second, 0 for no limit (default: CHAPA_MAX_REQUESTS_PER_SECOND)')
+        parser.add_argument('--since', type=str, help='Only payments made at or after this ISO date/datetime')
+        parser.add_argument('--limit', type=int, default=0, help='Stop after this many payments (0 = no limit)')
+        parser.add_argument('--base-url', type=str, help='Chapa API base URL, e.g. a local stand-in (default: CHAPA_API_BASE_URL)')
+        parser.add_argument('--dry-run', action='store_true', help='Verify and report without changing any payment')
+
+    def handle(self, *args, **options):
+        since = self._moment(options['since']) if options['since'] else None
+        with ChapaClient(base_url=options['base_url'], max_per_second=options['rate'], pool_size=options['workers']) as client:
+            report = reconcile_with_chapa(
+                client=client,
+                batch_size=options['batch_size'],
+                workers=options['workers'],
+                limit=options['limit'] or None,
+                since=since,
+                dry_run=options['dry_run'],
+            )
+        self.stdout.write(self.style.SUCCESS(report.format()))
+
+    def _moment(self, raw):
+        moment = parse_datetime(raw)
+        if moment is None:
+            day = parse_date(raw)
+            if day is None:
+                raise CommandError(f'Not an ISO date or datetime: {raw}')
+            moment = datetime.combine(day, datetime.min.time())
+        return timezone.make_aware(moment) if timezone.is_naive(moment) else moment
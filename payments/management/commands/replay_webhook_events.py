@@ -0,0 +1,66 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime, parse_date
+from datetime import datetime
+from payments.models import WebhookEvent
+from payments.services import process_event
+
+
+class Command(BaseCommand):
+    help = 'Reprocess stored Chapa webhook events from the inbox. Processing is idempotent, so replays never double-apply a payment.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--status', action='append', choices=['pending', 'processing', 'processed', 'failed'],
+                            help='Event status to replay; repeatable (default: failed)')
+        parser.add_argument('--tx-ref', action='append', dest='tx_refs', help='Only this transaction reference; repeatable')
+        parser.add_argument('--since', type=str, help='Only events received at or after this ISO date/datetime')
+        parser.add_argument('--until', type=str, help='Only events received before this ISO date/datetime')
+        parser.add_argument('--limit', type=int, default=0, help='Stop after this many events (0 = no limit)')
+        parser.add_argument('--queue', action='store_true', help='Queue the events on Celery instead of processing them here')
+        parser.add_argument('--dry-run', action='store_true', help='List the matching events without processing them')
+
+    def handle(self, *args, **options):
+        statuses = options['status'] or ['failed']
+        events = WebhookEvent.objects.filter(status__in=statuses).order_by('received_at')
+        if options['tx_refs']:
+            events = events.filter(tx_ref__in=options['tx_refs'])
+        if options['since']:
+            events = events.filter(received_at__gte=self._moment(options['since']))
+        if options['until']:
+            events = events.filter(received_at__lt=self._moment(options['until']))
+        ids = list(events.values_list('id', flat=True))
+        if options['limit']:
+            ids = ids[:options['limit']]
+
+        if options['dry_run']:
+            for event in WebhookEvent.objects.filter(id__in=ids).order_by('received_at').iterator(chunk_size=500):
+                self.stdout.write(f'{event.id}\t{event.received_at:%Y-%m-%d %H:%M}\t{event.event_type}\t{event.tx_ref}\t{event.status}\t{event.last_error[:80]}')
+            self.stdout.write(self.style.SUCCESS(f'{len(ids)} events would be replayed'))
+            return
+
+        if options['queue']:
+            from payments.tasks import process_webhook_event
+            # Processed events are only reclaimed by an inline replay
+            WebhookEvent.objects.filter(id__in=ids, status='processed').update(status='pending')
+            for event_id in ids:
+                process_webhook_event.delay(event_id)
+            self.stdout.write(self.style.SUCCESS(f'Queued {len(ids)} events'))
+            return
+
+        counts = {}
+        for i, event_id in enumerate(ids, 1):
+            outcome = process_event(event_id, include_processed='processed' in statuses) or 'skipped (claimed elsewhere)'
+            counts[outcome] = counts.get(outcome, 0) + 1
+            if i % 100 == 0:
+                self.stdout.write(f'Replayed {i}/{len(ids)} events...')
+        summary = ', '.join(f'{count} {outcome}' for outcome, count in sorted(counts.items())) or 'nothing to do'
+        self.stdout.write(self.style.SUCCESS(f'Replayed {len(ids)} events: {summary}'))
+
+    def _moment(self, raw):
+        moment = parse_datetime(raw)
+        if moment is None:
+            day = parse_date(raw)
+            if day is None:
+                raise CommandError(f'Not an ISO date or datetime: {raw}')
+            moment = datetime.combine(day, datetime.min.time())
+        return timezone.make_aware(moment) if timezone.is_naive(moment) else moment
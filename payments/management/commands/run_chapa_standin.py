@@ -0,0 +1,26 @@
+from django.core.management.base import BaseCommand
+from payments.standin import make_server
+
+
+class Command(BaseCommand):
+    help = 'Run the local Chapa stand-in server (point CHAPA_API_BASE_URL at it to work offline)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--port', type=int, default=8765, help='Port to listen on (default: 8765)')
+        parser.add_argument('--latency-ms', type=int, default=0, help='Delay added to every response (default: 0)')
+        parser.add_argument('--error-rate', type=float, default=0.0, help='Share of requests answered with a 503 (default: 0)')
+        parser.add_argument('--default-status', choices=['success', 'pending', 'failed'], default='success',
+                            help='Status of transactions whose tx_ref has no -failed/-pending/-missing suffix (default: success)')
+
+    def handle(self, *args, **options):
+        server = make_server(
+            port=options['port'], latency_ms=options['latency_ms'],
+            error_rate=options['error_rate'], default_status=options['default_status'],
+        )
+        self.stdout.write(self.style.SUCCESS(f"Chapa stand-in listening; set CHAPA_API_BASE_URL=http://127.0.0.1:{options['port']}/v1"))
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            server.server_close()
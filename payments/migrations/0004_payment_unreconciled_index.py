@@ -0,0 +1,19 @@
+# Generated by Django 5.2.5 on 2026-10-19 05:18
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('payments', '0003_webhook_inbox'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='payment',
+            index=models.Index(condition=models.Q(('subscription_updated', False)), fields=['status', 'id'], name='payment_unreconciled_idx'),
+        ),
+    ]
@@ -0,0 +1,69 @@
+# Generated by Django 5.2.5 on 2026-10-19 05:25
+
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Count, Q, Sum
+from django.db.models.functions import TruncDate
+
+
+def backfill_rollups(apps, schema_editor):
+    Payment = apps.get_model('payments', 'Payment')
+    PaymentDailyRollup = apps.get_model('payments', 'PaymentDailyRollup')
+    applied = Q(status='success', subscription_updated=True)
+    rows = (
+        Payment.objects.annotate(day=TruncDate('payment_date'))
+        .values('day')
+        .annotate(
+            payment_count=Count('id'),
+            success_count=Count('id', filter=applied),
+            success_amount=Sum('amount', filter=applied),
+            unique_payers=Count('user', filter=applied, distinct=True),
+        )
+        .order_by()
+    )
+    PaymentDailyRollup.objects.bulk_create([
+        PaymentDailyRollup(
+            day=row['day'], payment_count=row['payment_count'], success_count=row['success_count'],
+            success_amount=row['success_amount'] or 0, unique_payers=row['unique_payers'],
+        )
+        for row in rows
+    ], batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('payments', '0004_payment_unreconciled_index'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PaymentDailyRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('day', models.DateField(unique=True)),
+                ('payment_count', models.PositiveIntegerField(default=0)),
+                ('success_count', models.PositiveIntegerField(default=0)),
+                ('success_amount', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('unique_payers', models.PositiveIntegerField(default=0)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'ordering': ['-day'],
+            },
+        ),
+        migrations.AddIndex(
+            model_name='payment',
+            index=models.Index(fields=['payment_date'], name='payment_date_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='payment',
+            index=models.Index(fields=['status', 'payment_date'], name='payment_status_date_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='payment',
+            index=models.Index(fields=['user', 'status', 'payment_date'], name='payment_user_status_date_idx'),
+        ),
+        migrations.RunPython(backfill_rollups, migrations.RunPython.noop),
+    ]
@@ -1,4 +1,5 @@
 from django.db import models
+from django.db.models import Q
 from django.contrib.auth.models import User
 from django.utils import timezone
 
@@ -14,6 +15,70 @@ class Payment(models.Model):
     
     class Meta:
         ordering = ['-payment_date']
+        indexes = [
+            # Partial: only payments still to reconcile are indexed, so it
+            # stays small however long the ledger gets
+            models.Index(fields=['status', 'id'], name='payment_unreconciled_idx', condition=Q(subscription_updated=False)),
+            models.Index(fields=['payment_date'], name='payment_date_idx'),
+            models.Index(fields=['status', 'payment_date'], name='payment_status_date_idx'),
+            models.Index(fields=['user', 'status', 'payment_date'], name='payment_user_status_date_idx'),
+        ]
     
     def __str__(self):
-        return f"{self.user.username} - {self.amount} ETB - {self.payment_date.strftime('%Y-%m-%d')}"
\ No newline at end of file
+        return f"{self.user.username} - {self.amount} ETB - {self.payment_date.strftime('%Y-%m-%d')}"
+
+class WebhookEvent(models.Model):
+    """
+    Inbox row for a verified payment-provider webhook. The webhook view only
+    stores the event; payments.services processes it from a Celery task, so
+    a provider retry of the same event never does the work twice.
+    """
+    STATUS_CHOICES = [
+        ('pending', 'Pending'),
+        ('processing', 'Processing'),
+        ('processed', 'Processed'),
+        ('failed', 'Failed'),
+    ]
+
+    provider = models.CharField(max_length=20, default='chapa')
+    tx_ref = models.CharField(max_length=100)
+    event_type = models.CharField(max_length=50)
+    payload = models.JSONField(default=dict)
+    raw_body = models.TextField(blank=True)
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='pending')
+    attempts = models.PositiveIntegerField(default=0)
+    last_error = models.TextField(blank=True)
+    received_at = models.DateTimeField(auto_now_add=True)
+    # Set when a worker claims the event; stale claims are retried
+    locked_at = models.DateTimeField(null=True, blank=True)
+    processed_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        ordering = ['-received_at']
+        constraints = [
+            models.UniqueConstraint(fields=['tx_ref', 'event_type'], name='unique_webhook_event'),
+        ]
+        indexes = [models.Index(fields=['status', 'received_at'])]
+
+    def __str__(self):
+        return f"{self.event_type} {self.tx_ref} ({self.status})"
+
+
+class PaymentDailyRollup(models.Model):
+    """
+    Per-day payment totals, kept up to date by payments.rollups as payments
+    are created and applied, so revenue reports read one row per day
+    instead of scanning the ledger.
+    """
+    day = models.DateField(unique=True)
+    payment_count = models.PositiveIntegerField(default=0)
+    success_count = models.PositiveIntegerField(default=0)
+    success_amount = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    unique_payers = models.PositiveIntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        ordering = ['-day']
+
+    def __str__(self):
+        return f"{self.day}: {self.success_count}/{self.payment_count} payments, {self.success_amount} ETB"
@@ -0,0 +1,225 @@
+"""
+Subscription reconciliation for successful payments.
+
+A Payment that is `success` but still has `subscription_updated=False` has
+been paid for without extending the subscription: the process that recorded
+it died half-way, an admin fixed the status by hand, a script created the
+row. Such rows are applied here instead of on the dashboard's read path:
+
+- event-driven: saving a Payment in that state queues reconcile_payment for
+  it once the transaction commits (payments.signals);
+- periodically: reconcile_unapplied_payments() walks the rows in id order,
+  in batches, over the partial index on `subscription_updated=False` (only
+  rows still to apply are in it, so each batch is an index range scan no
+  matter how large the ledger grows), and catches anything whose task was
+  lost.
+
+Both go through payments.services.apply_payment(), whose conditional UPDATE
+makes applying a payment twice impossible.
+
+reconcile_with_chapa() additionally settles `pending` payments, which only
+Chapa can decide: rows are taken from the same index in batches, verified
+concurrently over one pooled ChapaClient, and each batch's outcome is
+written in a single transaction (`reconcile_payments` command and task).
+"""
+import logging
+import time
+from collections import Counter
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+
+from universities import entitlements
+from universities.models import UserDashboard
+from .chapa import ChapaClient, ChapaError
+from .models import Payment
+from .services import apply_payment
+
+logger = logging.getLogger(__name__)
+
+
+def unapplied_payments():
+    return Payment.objects.filter(subscription_updated=False, status='success')
+
+
+def schedule(payment_id):
+    """Queue reconcile_payment once the current transaction commits; the periodic pass covers a broker outage."""
+    from .tasks import reconcile_payment
+
+    def send():
+        try:
+            reconcile_payment.delay(payment_id)
+        except Exception as e:
+            logger.warning(f"Could not queue reconciliation of payment {payment_id}, leaving it to the periodic pass: {e}")
+
+    transaction.on_commit(send)
+
+
+def reconcile_payment(payment_id):
+    """Apply one payment if it is still unapplied. True when this call applied it."""
+    with transaction.atomic():
+        payment = unapplied_payments().filter(pk=payment_id).only('id', 'user_id', 'amount').first()
+        return payment is not None and apply_payment(payment)
+
+
+def reconcile_unapplied_payments(batch_size=None, limit=None):
+    """
+    Apply every unapplied successful payment, `batch_size` rows per
+    transaction (a failing payment only rolls back its own savepoint).
+    Returns (applied, failed).
+    """
+    batch_size = batch_size or getattr(settings, 'PAYMENT_RECONCILE_BATCH_SIZE', 200)
+    applied = failed = seen = 0
+    last_id = 0
+    while limit is None or seen < limit:
+        size = batch_size if limit is None else min(batch_size, limit - seen)
+        batch = list(
+            unapplied_payments().filter(id__gt=last_id)
+            .only('id', 'user_id', 'amount', 'tx_ref')
+            .order_by('id')[:size]
+        )
+        if not batch:
+            break
+        last_id = batch[-1].id
+        seen += len(batch)
+        with transaction.atomic():
+            for payment in batch:
+                try:
+                    with transaction.atomic():
+                        applied += apply_payment(payment)
+                except Exception as e:
+                    failed += 1
+                    logger.warning(f"Could not apply payment {payment.tx_ref}: {e}")
+    return applied, failed
+
+
+def activate_superuser_dashboards():
+    """Superusers never pay; keep their dashboards active. Returns the number updated."""
+    superusers = UserDashboard.objects.filter(user__is_superuser=True)
+    updated = superusers.exclude(subscription_status='active', is_verified=True).update(
+        subscription_status='active', is_verified=True,
+    )
+    dated = superusers.filter(subscription_end_date__isnull=True).update(
+        subscription_end_date=timezone.now().date() + timedelta(days=365),
+    )
+    if updated or dated:
+        entitlements.publish_many(superusers)
+    return updated
+
+
+# Outcomes of reconcile_with_chapa(), in report order
+OUTCOMES = ['applied', 'confirmed', 'failed', 'expired', 'pending', 'not found', 'skipped', 'error']
+
+
+class ReconcileReport:
+    def __init__(self, dry_run=False):
+        self.dry_run = dry_run
+        self.counts = Counter()
+        self.scanned = 0
+        self.verified = 0
+        self.seconds = 0.0
+
+    def add(self, outcome):
+        self.counts[outcome] += 1
+
+    def format(self):
+        rate = self.verified / self.seconds if self.seconds else 0.0
+        lines = [
+            f"{'Dry run: ' if self.dry_run else ''}scanned {self.scanned} payments, "
+            f"verified {self.verified} with Chapa in {self.seconds:.1f}s ({rate:.1f}/s)"
+        ]
+        lines += [f"  {outcome:<10} {self.counts[outcome]:>7}" for outcome in OUTCOMES if self.counts[outcome]]
+        return '\n'.join(lines)
+
+
+def reconcile_with_chapa(client=None, batch_size=None, workers=None, limit=None, since=None, dry_run=False, queryset=None):
+    """
+    Settle unapplied payments: `success` rows are applied, `pending` rows
+    are verified with Chapa and applied, marked failed, or (when Chapa still
+    has nothing conclusive after PAYMENT_PENDING_EXPIRY_HOURS) expired as
+    failed. A late webhook still applies a payment marked failed here.
+    `queryset` restricts the payments considered (default: all).
+    Returns a ReconcileReport.
+    """
+    batch_size = batch_size or getattr(settings, 'PAYMENT_RECONCILE_BATCH_SIZE', 200)
+    now = timezone.now()
+    expire_before = now - timedelta(hours=getattr(settings, 'PAYMENT_PENDING_EXPIRY_HOURS', 48))
+    # Leave checkouts that are still in progress alone
+    settled = now - timedelta(minutes=5)
+    candidates = (Payment.objects.all() if queryset is None else queryset).filter(subscription_updated=False, status__in=['pending', 'success'], payment_date__lt=settled)
+    if since:
+        candidates = candidates.filter(payment_date__gte=since)
+
+    report = ReconcileReport(dry_run=dry_run)
+    owns_client = client is None
+    client = client or ChapaClient()
+    started = time.perf_counter()
+    last_id = 0
+    try:
+        while limit is None or report.scanned < limit:
+            size = batch_size if limit is None else min(batch_size, limit - report.scanned)
+            batch = list(
+                candidates.filter(id__gt=last_id)
+                .only('id', 'user_id', 'amount', 'tx_ref', 'status', 'payment_date')
+                .order_by('id')[:size]
+            )
+            if not batch:
+                break
+            last_id = batch[-1].id
+            report.scanned += len(batch)
+            pending = [payment.tx_ref for payment in batch if payment.status == 'pending']
+            results = client.verify_many(pending, workers=workers) if pending else {}
+            report.verified += len(results)
+            if dry_run:
+                for payment in batch:
+                    report.add(_outcome(payment, results.get(payment.tx_ref), expire_before))
+            else:
+                with transaction.atomic():
+                    for payment in batch:
+                        report.add(_settle(payment, results.get(payment.tx_ref), expire_before))
+    finally:
+        if owns_client:
+            client.close()
+    report.seconds = time.perf_counter() - started
+    return report
+
+
+def _outcome(payment, result, expire_before):
+    """What reconciling `payment` with Chapa's `result` does (without doing it)."""
+    if payment.status == 'success':
+        return 'applied'
+    if isinstance(result, ChapaError):
+        return 'error'
+    status = result.get('status') if result else None
+    if status == 'success':
+        return 'confirmed'
+    if status and status != 'pending':
+        return 'failed'
+    if payment.payment_date < expire_before:
+        return 'expired'
+    return 'pending' if result else 'not found'
+
+
+def _settle(payment, result, expire_before):
+    outcome = _outcome(payment, result, expire_before)
+    try:
+        with transaction.atomic():
+            if outcome == 'confirmed':
+                Payment.objects.filter(pk=payment.pk, status='pending').update(
+                    status='success', chapa_reference=result.get('reference') or '',
+                )
+                apply_payment(payment)
+            elif outcome == 'applied':
+                if not apply_payment(payment):
+                    # Applied by a concurrent webhook or reconcile_payment task
+                    outcome = 'skipped'
+            elif outcome in ('failed', 'expired'):
+                Payment.objects.filter(pk=payment.pk, status='pending').update(status='failed')
+    except Exception as e:
+        logger.warning(f"Could not reconcile payment {payment.tx_ref}: {e}")
+        return 'error'
+    if outcome == 'error':
+        logger.warning(f"Could not verify payment {payment.tx_ref}: {result}")
+    return outcome
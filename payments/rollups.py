@@ -0,0 +1,111 @@
+"""
+Daily payment rollups.
+
+PaymentDailyRollup holds, per day (of `payment_date`, in the current time
+zone): payments created, successful payments, their sum and distinct payers.
+Rows are maintained incrementally with F() updates:
+
+- record_created() when a Payment row is created (payments.signals);
+- record_success() when a successful payment is applied, from
+  services.apply_payment(). Applying is claimed by a conditional UPDATE, so
+  each payment is counted exactly once however many paths try to apply it.
+
+A payer counts once per day: record_success() checks for an earlier applied
+payment of the same user that day over the (user, status, payment_date)
+index. Two payments of one user applied at the same instant can both count
+as a new payer; rebuild() recomputes days from the ledger and the nightly
+task runs it over the last days to correct such drift.
+"""
+from datetime import datetime, time, timedelta
+
+from django.db.models import Count, F, Q, Sum
+from django.db.models.functions import TruncDate
+from django.utils import timezone
+
+from .models import Payment, PaymentDailyRollup
+
+
+def _day(moment):
+    return timezone.localdate(moment)
+
+
+def _day_bounds(day):
+    start = timezone.make_aware(datetime.combine(day, time.min))
+    return start, start + timedelta(days=1)
+
+
+def _bump(day, **increments):
+    PaymentDailyRollup.objects.get_or_create(day=day)
+    PaymentDailyRollup.objects.filter(day=day).update(
+        **{field: F(field) + value for field, value in increments.items()}
+    )
+
+
+def record_created(payment):
+    _bump(_day(payment.payment_date), payment_count=1)
+
+
+def record_success(payment):
+    """Count an applied payment; runs in the applying transaction."""
+    day = _day(payment.payment_date)
+    start, end = _day_bounds(day)
+    paid_before = (
+        Payment.objects.filter(
+            user_id=payment.user_id, status='success', subscription_updated=True,
+            payment_date__gte=start, payment_date__lt=end,
+        )
+        .exclude(pk=payment.pk)
+        .exists()
+    )
+    _bump(day, success_count=1, success_amount=payment.amount, unique_payers=0 if paid_before else 1)
+
+
+def rebuild(start_day, end_day):
+    """Recompute the rollups of days start_day..end_day (inclusive) from the ledger. Returns the days written."""
+    start, _ = _day_bounds(start_day)
+    _, end = _day_bounds(end_day)
+    applied = Q(status='success', subscription_updated=True)
+    totals = {
+        row['day']: row
+        for row in Payment.objects.filter(payment_date__gte=start, payment_date__lt=end)
+        .annotate(day=TruncDate('payment_date'))
+        .values('day')
+        .annotate(
+            payment_count=Count('id'),
+            success_count=Count('id', filter=applied),
+            success_amount=Sum('amount', filter=applied),
+            unique_payers=Count('user', filter=applied, distinct=True),
+        )
+        .order_by()
+    }
+    day = start_day
+    written = 0
+    while day <= end_day:
+        row = totals.get(day, {})
+        PaymentDailyRollup.objects.update_or_create(day=day, defaults={
+            'payment_count': row.get('payment_count') or 0,
+            'success_count': row.get('success_count') or 0,
+            'success_amount': row.get('success_amount') or 0,
+            'unique_payers': row.get('unique_payers') or 0,
+        })
+        written += 1
+        day += timedelta(days=1)
+    return written
+
+
+def totals(start_day=None, end_day=None):
+    """
+    Summed rollups over a day range (both ends optional and inclusive).
+    `unique_payers` is a sum of daily counts, so it is exact for one day
+    only: someone paying on two days counts twice.
+    """
+    rows = PaymentDailyRollup.objects.all()
+    if start_day:
+        rows = rows.filter(day__gte=start_day)
+    if end_day:
+        rows = rows.filter(day__lte=end_day)
+    result = rows.aggregate(
+        payment_count=Sum('payment_count'), success_count=Sum('success_count'), success_amount=Sum('success_amount'),
+        unique_payers=Sum('unique_payers'),
+    )
+    return {field: value or 0 for field, value in result.items()}
@@ -0,0 +1,217 @@
+"""
+Chapa webhook processing.
+
+The webhook view verifies the signature, stores the event in the WebhookEvent
+inbox with record_event() and returns; a Celery worker then runs
+process_event() for it. Processing is idempotent:
+
+- an event is claimed with a conditional UPDATE, so two workers (or a
+  worker and the replay command) never process it at the same time;
+- the Payment row is unique on tx_ref, and its `subscription_updated` flag is
+  flipped with a conditional UPDATE in the same transaction as the
+  subscription change, so a payment extends a subscription exactly once no
+  matter how often its event is replayed.
+
+A failed event keeps its error in `last_error` and is retried by the
+periodic sweep, or on demand with the `replay_webhook_events` command.
+Successful payments that reach the database by other paths are applied by
+payments.reconciliation through the same apply_payment().
+"""
+import hashlib
+import hmac
+import json
+import logging
+from datetime import timedelta
+from decimal import Decimal
+
+from django.contrib.auth import get_user_model
+from django.db import IntegrityError, transaction
+from django.db.models import F, Q
+from django.db.models.functions import Lower
+from django.utils import timezone
+from django.utils.crypto import get_random_string
+
+from universities.models import ApplicationDraft, UserDashboard
+from . import rollups
+from .models import Payment, WebhookEvent
+
+logger = logging.getLogger(__name__)
+
+SUBSCRIPTION_PRICE = Decimal('1000.00')
+# A claim older than this is treated as a crashed worker and can be retaken
+STALE_CLAIM_MINUTES = 10
+
+
+class WebhookProcessingError(Exception):
+    """The event is valid but can't be applied yet (e.g. its user is unknown)."""
+
+
+def signature_valid(secret, data, signatures):
+    """
+    Chapa signs the compact JSON serialization of the payload (not the raw
+    body) with HMAC-SHA256; either signature header may carry it.
+    """
+    payload_string = json.dumps(data, separators=(',', ':')).encode('utf-8')
+    expected = hmac.new(secret.encode('utf-8'), msg=payload_string, digestmod=hashlib.sha256).hexdigest()
+    return any(sig and hmac.compare_digest(sig, expected) for sig in signatures)
+
+
+def event_type_for(payload):
+    return (payload.get('event') or f"charge.{payload.get('status') or 'unknown'}")[:50]
+
+
+def record_event(payload, raw_body, provider='chapa'):
+    """Store a verified event in the inbox. Returns (event, created)."""
+    tx_ref = payload.get('tx_ref')
+    event_type = event_type_for(payload)
+    try:
+        with transaction.atomic():
+            event = WebhookEvent.objects.create(
+                provider=provider, tx_ref=tx_ref, event_type=event_type,
+                payload=payload, raw_body=raw_body,
+            )
+        return event, True
+    except IntegrityError:
+        # Provider retry of an event we already have
+        return WebhookEvent.objects.get(tx_ref=tx_ref, event_type=event_type), False
+
+
+def enqueue(event_id):
+    """Queue processing once the inbox row is committed; the sweep covers a broker outage."""
+    from .tasks import process_webhook_event
+
+    def send():
+        try:
+            process_webhook_event.delay(event_id)
+        except Exception as e:
+            logger.warning(f"Could not queue webhook event {event_id}, leaving it to the sweep: {e}")
+
+    transaction.on_commit(send)
+
+
+def claim_event(event_id, include_processed=False):
+    """Move an event to `processing`. False when another worker holds it (or it is done)."""
+    now = timezone.now()
+    claimable = Q(status__in=['pending', 'failed']) | Q(status='processing', locked_at__lt=now - timedelta(minutes=STALE_CLAIM_MINUTES))
+    if include_processed:
+        claimable |= Q(status='processed')
+    return WebhookEvent.objects.filter(claimable, pk=event_id).update(
+        status='processing', locked_at=now, attempts=F('attempts') + 1,
+    ) == 1
+
+
+def process_event(event_id, include_processed=False):
+    """
+    Process one inbox event. Returns the outcome string, or None when the
+    event could not be claimed.
+    """
+    if not claim_event(event_id, include_processed=include_processed):
+        return None
+    event = WebhookEvent.objects.get(pk=event_id)
+    try:
+        with transaction.atomic():
+            outcome = apply_chapa_event(event.payload)
+    except Exception as e:
+        logger.warning(f"Webhook event {event_id} ({event.tx_ref}) failed: {e}")
+        WebhookEvent.objects.filter(pk=event_id).update(status='failed', last_error=str(e)[:2000], locked_at=None)
+        return 'failed'
+    WebhookEvent.objects.filter(pk=event_id).update(
+        status='processed', processed_at=timezone.now(), last_error='', locked_at=None,
+    )
+    return outcome
+
+
+def _resolve_user(tx_ref, payload):
+    """The paying user: encoded in our tx_ref ("unifinder-{user_id}-{uuid}"), else by email."""
+    User = get_user_model()
+    parts = tx_ref.split('-')
+    if len(parts) >= 2 and parts[0] == 'unifinder' and parts[1].isdigit():
+        user = User.objects.filter(id=int(parts[1])).first()
+        if user:
+            return user
+    email = payload.get('email')
+    if email:
+        return User.objects.filter(email=email).first()
+    return None
+
+
+def _unique_username(base):
+    """`base`, or `base` plus the first free numeric suffix, in a single query."""
+    User = get_user_model()
+    taken = set(
+        User.objects.filter(username__istartswith=base)
+        .annotate(lowered=Lower('username'))
+        .values_list('lowered', flat=True)
+    )
+    if base.lower() not in taken:
+        return base
+    i = 1
+    while f"{base}{i}".lower() in taken:
+        i += 1
+    return f"{base}{i}"
+
+
+def _ensure_draft_account(tx_ref, user):
+    """Create the account for an application draft submitted with this payment, if it has none."""
+    # Served by the (payment_tx_ref, created_at) and (email, created_at)
+    # indexes; the raw payload isn't needed here, so it isn't read
+    drafts = ApplicationDraft.objects.only('email', 'full_name').order_by('-created_at')
+    draft = drafts.filter(payment_tx_ref=tx_ref).first()
+    if not draft and user.email:
+        draft = drafts.filter(email=user.email).first()
+    if not draft:
+        return None
+    User = get_user_model()
+    target_email = draft.email or user.email
+    if not target_email or User.objects.filter(email__iexact=target_email).exists():
+        return None
+    full_name = (draft.full_name or '').split(' ')
+    return User.objects.create_user(
+        username=_unique_username((target_email.split('@')[0] or f"user{user.id}")[:140]),
+        email=target_email,
+        password=get_random_string(12),
+        first_name=full_name[0][:150],
+        last_name=' '.join(full_name[1:])[:150],
+    )
+
+
+def apply_chapa_event(payload):
+    """Apply a Chapa charge event. Runs inside the caller's transaction."""
+    tx_ref = payload.get('tx_ref')
+    if payload.get('status') != 'success':
+        return 'ignored'
+
+    user = _resolve_user(tx_ref, payload)
+    if user is None:
+        raise WebhookProcessingError(f"No user for transaction {tx_ref}")
+
+    payment, created = Payment.objects.select_for_update().get_or_create(
+        tx_ref=tx_ref,
+        defaults={
+            'user': user,
+            'amount': SUBSCRIPTION_PRICE,
+            'status': 'success',
+            'chapa_reference': payload.get('reference') or '',
+        },
+    )
+    if not created and payment.status != 'success':
+        payment.status = 'success'
+        payment.save(update_fields=['status'])
+
+    outcome = 'applied' if apply_payment(payment) else 'already applied'
+    _ensure_draft_account(tx_ref, payment.user)
+    return outcome
+
+
+def apply_payment(payment):
+    """
+    Extend the payer's subscription by a successful payment, exactly once.
+    Runs inside the caller's transaction; True when this call applied it.
+    """
+    # Flipping the flag claims the payment: only one transaction can win
+    if not Payment.objects.filter(pk=payment.pk, status='success', subscription_updated=False).update(subscription_updated=True):
+        return False
+    dashboard, _ = UserDashboard.objects.select_for_update().get_or_create(user_id=payment.user_id)
+    dashboard.update_subscription(payment.amount, monthly_price=SUBSCRIPTION_PRICE)
+    rollups.record_success(payment)
+    return True
@@ -0,0 +1,18 @@
+from django.db.models.signals import post_save
+from django.dispatch import receiver
+
+from .models import Payment
+from . import reconciliation, rollups
+
+
+@receiver(post_save, sender=Payment)
+def count_new_payment(sender, instance, created, **kwargs):
+    if created:
+        rollups.record_created(instance)
+
+
+@receiver(post_save, sender=Payment)
+def reconcile_successful_payment(sender, instance, **kwargs):
+    """A successful payment that hasn't extended the subscription yet gets reconciled after commit."""
+    if instance.status == 'success' and not instance.subscription_updated:
+        reconciliation.schedule(instance.pk)
@@ -0,0 +1,157 @@
+"""
+Local stand-in for the Chapa API, for running and benchmarking payment
+reconciliation offline.
+
+Implements the two endpoints the app uses, under /v1:
+
+- GET /transaction/verify/<tx_ref>: the transaction's status comes from the
+  tx_ref's suffix: `-failed`, `-pending`, or `-missing` (answered 404 like
+  an unknown transaction); anything else gets `default_status`;
+- POST /transaction/initialize: a hosted checkout link for the posted tx_ref.
+
+Responses are delayed by `latency_ms`, and a share `error_rate` of them are
+503s so client retries get exercised. The server runs in a child process so
+its CPU time doesn't count against the client being measured.
+"""
+import hashlib
+import json
+import multiprocessing
+import random
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import unquote
+
+SUFFIX_STATUSES = {'-failed': 'failed', '-pending': 'pending', '-missing': None}
+
+
+def transaction_status(tx_ref, default_status='success'):
+    for suffix, status in SUFFIX_STATUSES.items():
+        if tx_ref.endswith(suffix):
+            return status
+    return default_status
+
+
+class _ChapaHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+
+    def _send(self, status, body):
+        data = json.dumps(body).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def _begin(self):
+        server = self.server
+        with server.counter.get_lock():
+            server.counter.value += 1
+        if server.latency:
+            time.sleep(server.latency)
+        if server.error_rate and random.random() < server.error_rate:
+            self._send(503, {'message': 'Service unavailable', 'status': 'failed', 'data': None})
+            return False
+        return True
+
+    def do_GET(self):
+        prefix = '/v1/transaction/verify/'
+        if not self.path.startswith(prefix):
+            return self._send(404, {'message': 'Not found', 'status': 'failed', 'data': None})
+        if not self._begin():
+            return
+        tx_ref = unquote(self.path[len(prefix):])
+        status = transaction_status(tx_ref, self.server.default_status)
+        if status is None:
+            return self._send(404, {'message': 'Invalid transaction or Transaction not found', 'status': 'failed', 'data': None})
+        self._send(200, {
+            'message': 'Payment details',
+            'status': 'success',
+            'data': {
+                'tx_ref': tx_ref,
+                'status': status,
+                'amount': 1000,
+                'currency': 'ETB',
+                'reference': 'SI' + hashlib.sha1(tx_ref.encode('utf-8')).hexdigest()[:10].upper(),
+                'mode': 'test',
+            },
+        })
+
+    def do_POST(self):
+        body = self.rfile.read(int(self.headers.get('Content-Length') or 0))
+        if self.path != '/v1/transaction/initialize':
+            return self._send(404, {'message': 'Not found', 'status': 'failed', 'data': None})
+        if not self._begin():
+            return
+        try:
+            tx_ref = json.loads(body or b'{}').get('tx_ref')
+        except ValueError:
+            tx_ref = None
+        if not tx_ref:
+            return self._send(400, {'message': {'tx_ref': ['The tx ref field is required.']}, 'status': 'failed', 'data': None})
+        host, port = self.server.server_address[:2]
+        self._send(200, {
+            'message': 'Hosted Link',
+            'status': 'success',
+            'data': {'checkout_url': f'http://{host}:{port}/checkout/{tx_ref}'},
+        })
+
+    def log_message(self, format, *args):
+        pass
+
+
+class _StandinServer(ThreadingHTTPServer):
+    daemon_threads = True
+    # socketserver's default backlog of 5 refuses connections under the
+    # bursts the async client produces
+    request_queue_size = 1024
+
+
+def make_server(host='127.0.0.1', port=0, latency_ms=0, error_rate=0.0, default_status='success', counter=None):
+    server = _StandinServer((host, port), _ChapaHandler)
+    server.latency = latency_ms / 1000.0
+    server.error_rate = error_rate
+    server.default_status = default_status
+    server.counter = counter or multiprocessing.Value('i', 0)
+    return server
+
+
+def _serve(port_queue, counter, options):
+    server = make_server(counter=counter, **options)
+    port_queue.put(server.server_address[1])
+    server.serve_forever()
+
+
+class ChapaStandin:
+    """
+    Context manager that runs the stand-in in a child process:
+
+        with ChapaStandin(latency_ms=50) as chapa:
+            client = ChapaClient(base_url=chapa.base_url, secret_key='test')
+    """
+
+    def __init__(self, latency_ms=0, error_rate=0.0, default_status='success'):
+        self.options = {'latency_ms': latency_ms, 'error_rate': error_rate, 'default_status': default_status}
+        self.port = None
+        self._counter = multiprocessing.Value('i', 0)
+        self._process = None
+
+    def __enter__(self):
+        port_queue = multiprocessing.Queue()
+        self._process = multiprocessing.Process(
+            target=_serve, args=(port_queue, self._counter, self.options), daemon=True,
+        )
+        self._process.start()
+        self.port = port_queue.get(timeout=10)
+        return self
+
+    def __exit__(self, *exc):
+        self._process.terminate()
+        self._process.join(timeout=5)
+
+    @property
+    def base_url(self):
+        return f'http://127.0.0.1:{self.port}/v1'
+
+    @property
+    def requests_served(self):
+        return self._counter.value
@@ -0,0 +1,89 @@
+from celery import shared_task
+from django.conf import settings
+from django.db.models import Q
+from django.utils import timezone
+from datetime import timedelta
+
+
+@shared_task
+def process_webhook_event(event_id):
+    """Processes one WebhookEvent inbox row (see payments.services)."""
+    from .services import process_event
+
+    outcome = process_event(event_id)
+    if outcome is None:
+        return f"Webhook event {event_id} is already being processed or done."
+    return f"Webhook event {event_id}: {outcome}."
+
+
+@shared_task
+def process_pending_webhook_events():
+    """
+    Periodic sweep of the webhook inbox: events whose task was never queued
+    (broker outage), failed events that still have attempts left, and events
+    whose worker died mid-way.
+    """
+    from .models import WebhookEvent
+    from .services import STALE_CLAIM_MINUTES, process_event
+
+    max_attempts = getattr(settings, 'PAYMENT_WEBHOOK_MAX_ATTEMPTS', 5)
+    stale = timezone.now() - timedelta(minutes=STALE_CLAIM_MINUTES)
+    # Leave just-received events to their own task
+    settled = timezone.now() - timedelta(seconds=30)
+    due = (
+        WebhookEvent.objects.filter(
+            Q(status='pending', received_at__lt=settled)
+            | Q(status='failed', attempts__lt=max_attempts)
+            | Q(status='processing', locked_at__lt=stale)
+        )
+        .order_by('received_at')
+        .values_list('id', flat=True)[:500]
+    )
+    outcomes = [process_event(event_id) for event_id in list(due)]
+    processed = sum(1 for outcome in outcomes if outcome not in (None, 'failed'))
+    failed = outcomes.count('failed')
+    return f"Swept {len(outcomes)} webhook events: {processed} processed, {failed} failed."
+
+
+@shared_task
+def reconcile_payment(payment_id):
+    """Applies one successful payment to its subscription (see payments.reconciliation)."""
+    from .reconciliation import reconcile_payment as reconcile
+
+    if reconcile(payment_id):
+        return f"Payment {payment_id} applied."
+    return f"Payment {payment_id} was already applied."
+
+
+@shared_task
+def reconcile_unapplied_payments():
+    """
+    Periodic pass over successful payments that haven't extended their
+    subscription yet, plus keeping superuser dashboards active.
+    """
+    from .reconciliation import activate_superuser_dashboards, reconcile_unapplied_payments as reconcile
+
+    applied, failed = reconcile()
+    activated = activate_superuser_dashboards()
+    return f"Reconciled payments: {applied} applied, {failed} failed; {activated} superuser dashboards activated."
+
+
+@shared_task
+def reconcile_payments():
+    """Verifies pending payments with Chapa and applies the successful ones (see payments.reconciliation)."""
+    import os
+    from .reconciliation import reconcile_with_chapa
+
+    if not os.environ.get('CHAPA_SECRET_KEY'):
+        return "CHAPA_SECRET_KEY is not set; skipped Chapa reconciliation."
+    return reconcile_with_chapa().format()
+
+
+@shared_task
+def rebuild_recent_payment_rollups(days=2):
+    """Recomputes the last days' PaymentDailyRollup rows, correcting any drift of the incremental counts."""
+    from .rollups import rebuild
+
+    today = timezone.localdate()
+    written = rebuild(today - timedelta(days=days - 1), today)
+    return f"Rebuilt {written} daily payment rollups."
@@ -2,7 +2,7 @@ from django.contrib import admin
 from django.contrib import messages
 from django.utils.html import format_html
 from django.db import transaction
-from .models import University, UserDashboard, UniversityJSONImport, ScholarshipResult, CountryJobSite, CountryJobSiteJSONImport
+from .models import University, UserDashboard, UniversityJSONImport, ScholarshipResult, CountryJobSite, CountryJobSiteJSONImport, UniversitySeedJob, RegistryUniversity
 from .serializers import UniversitySerializer
 from .scholarship_service import ScholarshipOwlService
 import json
@@ -205,6 +205,18 @@ class UniversityDataAdmin(admin.ModelAdmin):
 
 admin.site.register(University, UniversityDataAdmin)
 
+@admin.register(UniversitySeedJob)
+class UniversitySeedJobAdmin(admin.ModelAdmin):
+    list_display = ('id', 'country', 'source', 'status', 'processed', 'created', 'skipped_existing', 'failed', 'created_at')
+    list_filter = ('status', 'source')
+    readonly_fields = ('total_candidates', 'processed', 'created', 'skipped_existing', 'failed', 'errors', 'created_at', 'started_at', 'finished_at')
+
+@admin.register(RegistryUniversity)
+class RegistryUniversityAdmin(admin.ModelAdmin):
+    list_display = ('name', 'country', 'primary_domain', 'synced_at')
+    list_filter = ('country',)
+    search_fields = ('normalized_name', 'primary_domain')
+
 @admin.register(CountryJobSite)
 class CountryJobSiteAdmin(admin.ModelAdmin):
     list_display = ("country", "site_name", "site_url")
@@ -4,3 +4,7 @@ from django.apps import AppConfig
 class UniversitiesConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'universities'
+
+    def ready(self):
+        # Import checks so they are registered when the app is ready.
+        import universities.checks
@@ -0,0 +1,40 @@
+"""
+Shared httpx.AsyncClient instances for the async views.
+
+An AsyncClient is tied to the event loop it first ran on. Under ASGI there
+is one loop per worker process, so each named client is created once and
+its connection pool serves every request of the process. Async views run
+outside ASGI (e.g. under the WSGI server, where Django gives each one a
+fresh loop) get a client for their own loop.
+
+A client holds open connections until it is closed, so a loop's clients are
+closed with aclose_clients() before the loop goes away: at ASGI lifespan
+shutdown (university_api.asgi), and after each async view run outside ASGI
+(universities.async_views.async_endpoint).
+"""
+import asyncio
+import weakref
+
+import httpx
+from django.conf import settings
+
+_clients = weakref.WeakKeyDictionary()  # loop -> {name: AsyncClient}
+
+
+def get_client(name, **options):
+    """The AsyncClient called `name` for the running loop, created with `options` on first use."""
+    loop = asyncio.get_running_loop()
+    clients = _clients.setdefault(loop, {})
+    client = clients.get(name)
+    if client is None:
+        max_connections = getattr(settings, 'ASYNC_HTTP_MAX_CONNECTIONS', 200)
+        options.setdefault('limits', httpx.Limits(max_connections=max_connections, max_keepalive_connections=max_connections // 4))
+        client = clients[name] = httpx.AsyncClient(**options)
+    return client
+
+
+async def aclose_clients():
+    """Close and forget the running loop's clients."""
+    clients = _clients.pop(asyncio.get_running_loop(), {})
+    for client in clients.values():
+        await client.aclose()
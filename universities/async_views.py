@@ -0,0 +1,122 @@
+"""
+Async versions of the endpoints that spend their time waiting on other
+services (Chapa, ScholarshipOwl, university websites), mounted under
+/api/async/. Under the ASGI server (SERVER_MODE=asgi) a worker keeps
+hundreds of those outbound calls in flight on one event loop instead of
+holding a sync worker per call; the sync endpoints stay where they are.
+
+DRF views are sync, so these are plain Django async views: `async_endpoint`
+does the JWT authentication, permission check and body parsing DRF does for
+the sync ones, and answers in the same shape.
+"""
+import json
+import os
+from functools import wraps
+
+from asgiref.sync import sync_to_async
+from django.contrib.auth.models import AnonymousUser
+from django.core.handlers.asgi import ASGIRequest
+from django.http import JsonResponse
+from django.views.decorators.csrf import csrf_exempt
+from rest_framework import status
+from rest_framework.exceptions import AuthenticationFailed
+from rest_framework_simplejwt.authentication import JWTAuthentication
+
+from payments import chapa
+from . import async_http, scholarship_cache
+from .pipeline import ScrapeError
+from .scraping import ascrape_university
+from .views import _checkout_failure, _checkout_payload
+
+
+def is_authenticated(user):
+    return user.is_authenticated
+
+
+def is_staff(user):
+    return user.is_authenticated and user.is_staff
+
+
+def async_endpoint(method, permission=None):
+    """
+    Wrap an async view taking (request, ...): only `method` is allowed, the
+    JWT user is set on `request.user`, `permission(user)` must hold, and a
+    JSON or form body is parsed into `request.data`.
+    """
+    def decorator(view):
+        @csrf_exempt
+        @wraps(view)
+        async def wrapper(request, *args, **kwargs):
+            if request.method != method:
+                return JsonResponse({'detail': f'Method "{request.method}" not allowed.'}, status=status.HTTP_405_METHOD_NOT_ALLOWED)
+            try:
+                authenticated = await sync_to_async(JWTAuthentication().authenticate)(request)
+            except AuthenticationFailed as e:
+                return JsonResponse({'detail': e.detail}, status=status.HTTP_401_UNAUTHORIZED)
+            request.user = authenticated[0] if authenticated else AnonymousUser()
+            if permission and not permission(request.user):
+                if not request.user.is_authenticated:
+                    return JsonResponse({'detail': 'Authentication credentials were not provided.'}, status=status.HTTP_401_UNAUTHORIZED)
+                return JsonResponse({'detail': 'You do not have permission to perform this action.'}, status=status.HTTP_403_FORBIDDEN)
+            request.data = {}
+            if method == 'POST' and request.content_type == 'application/json':
+                try:
+                    request.data = json.loads(request.body or b'{}')
+                except ValueError:
+                    return JsonResponse({'detail': 'JSON parse error.'}, status=status.HTTP_400_BAD_REQUEST)
+            elif method == 'POST':
+                request.data = request.POST
+            try:
+                return await view(request, *args, **kwargs)
+            finally:
+                # Outside ASGI the view's event loop ends with the request
+                if not isinstance(request, ASGIRequest):
+                    await async_http.aclose_clients()
+        return wrapper
+    return decorator
+
+
+@async_endpoint('POST', permission=is_authenticated)
+async def initialize_payment(request):
+    """Async InitializeChapaPaymentView."""
+    if not os.environ.get("CHAPA_SECRET_KEY"):
+        return JsonResponse(
+            {"status": "error", "message": "Chapa secret key is not configured."},
+            status=status.HTTP_500_INTERNAL_SERVER_ERROR,
+        )
+
+    tx_ref, payload = await sync_to_async(_checkout_payload)(request.user)
+    try:
+        checkout_url = await chapa.AsyncChapaClient().initialize(payload)
+    except chapa.ChapaError as e:
+        body, status_code, headers = _checkout_failure(tx_ref, e)
+        return JsonResponse(body, status=status_code, headers=headers)
+
+    return JsonResponse({
+        "status": "success",
+        "checkout_url": checkout_url,
+    })
+
+
+@async_endpoint('GET', permission=is_authenticated)
+async def get_scholarships(request):
+    """Async get_scholarships."""
+    country = request.GET.get('country', '')
+    limit = int(request.GET.get('limit', 10))
+
+    return JsonResponse({'scholarships': await scholarship_cache.aget_scholarships(country, limit=limit)})
+
+
+@async_endpoint('POST', permission=is_staff)
+async def scrape_university(request):
+    """Async UniversityScrapeView."""
+    start_url = request.data.get('url')
+    if not start_url:
+        return JsonResponse({'error': 'url is required'}, status=status.HTTP_400_BAD_REQUEST)
+    provider = (request.data.get('provider') or '').lower()
+
+    try:
+        data = await ascrape_university(start_url, provider=provider)
+    except ScrapeError as e:
+        return JsonResponse({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+    return JsonResponse(data)
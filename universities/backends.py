@@ -0,0 +1,57 @@
+"""
+Authentication backend for the login form, which takes a username or an
+email in the same field.
+
+The account is found with one query, case-insensitively, on the lower(email)
+and lower(username) expression indexes (migration 0028), with the profile and
+dashboard joined in so building the token needs no further lookups. When the
+identifier is an email, users with that email are tried before a user whose
+username happens to match it, as the login serializer always did.
+"""
+from django.contrib.auth.backends import ModelBackend
+from django.contrib.auth.models import User
+from django.core.exceptions import ValidationError
+from django.core.validators import validate_email
+from django.db.models import Q
+from django.db.models.functions import Lower
+
+
+def _is_email(value):
+    try:
+        validate_email(value)
+    except ValidationError:
+        return False
+    return True
+
+
+def login_candidates(identifier):
+    """Users the identifier could name, the ones matching by email first."""
+    key = identifier.lower()
+    match = Q(username_key=key)
+    by_email = _is_email(identifier)
+    if by_email:
+        match |= Q(email_key=key)
+    users = (
+        User.objects.annotate(username_key=Lower('username'), email_key=Lower('email'))
+        .filter(match)
+        .select_related('profile', 'dashboard')
+        .order_by('pk')
+    )
+    return sorted(users, key=lambda user: not (by_email and user.email_key == key))
+
+
+class UsernameOrEmailBackend(ModelBackend):
+    def authenticate(self, request, username=None, password=None, **kwargs):
+        if username is None:
+            username = kwargs.get(User.USERNAME_FIELD)
+        if username is None or password is None:
+            return None
+        candidates = login_candidates(username)
+        if not candidates:
+            # Hash anyway, so unknown accounts take as long as wrong passwords
+            User().set_password(password)
+            return None
+        for user in candidates:
+            if user.check_password(password) and self.user_can_authenticate(user):
+                return user
+        return None
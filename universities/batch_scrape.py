@@ -0,0 +1,93 @@
+"""
+Persist stage sinks for the scrape pipeline (see universities.pipeline).
+
+NdjsonWriter streams records to a file and UniversityUpserter writes them to
+the database in chunks.
+"""
+import json
+
+from django.db import transaction
+
+from .models import University
+
+# Fields of the enhanced scraper output that map onto University columns
+UNIVERSITY_FIELDS = [
+    'name', 'country', 'city', 'course_offered', 'application_fee', 'tuition_fee',
+    'intakes', 'bachelor_programs', 'masters_programs', 'scholarships',
+    'university_link', 'application_link', 'description',
+]
+# Fields refreshed on existing rows. Name and country are curated by admins and
+# are never overwritten by page heuristics.
+UPDATABLE_FIELDS = [
+    'city', 'application_fee', 'tuition_fee', 'intakes', 'bachelor_programs',
+    'masters_programs', 'scholarships', 'application_link', 'description',
+]
+
+
+class NdjsonWriter:
+    """Writes one JSON document per line."""
+
+    def __init__(self, stream):
+        self.stream = stream
+
+    def write(self, data):
+        self.stream.write(json.dumps(data, ensure_ascii=False, default=str) + '\n')
+
+    def close(self):
+        self.stream.flush()
+
+
+class UniversityUpserter:
+    """
+    Buffers scraped records and upserts them by `university_link` in chunks:
+    one SELECT per chunk to find existing rows, then bulk_update + bulk_create.
+    """
+
+    def __init__(self, chunk_size=500):
+        self.chunk_size = chunk_size
+        self.buffer = []
+        self.created = 0
+        self.updated = 0
+
+    def write(self, data):
+        self.buffer.append(data)
+        if len(self.buffer) >= self.chunk_size:
+            self.flush()
+
+    def close(self):
+        self.flush()
+
+    def flush(self):
+        if not self.buffer:
+            return
+        # Later records for the same link win
+        records = {}
+        for data in self.buffer:
+            link = data.get('university_link')
+            if link:
+                records[link] = data
+        self.buffer = []
+
+        with transaction.atomic():
+            existing = {u.university_link: u for u in University.objects.filter(university_link__in=list(records))}
+            to_update = []
+            to_create = []
+            for link, data in records.items():
+                university = existing.get(link)
+                if university is None:
+                    to_create.append(University(**{f: data.get(f) for f in UNIVERSITY_FIELDS if data.get(f) is not None}))
+                    continue
+                for field in UPDATABLE_FIELDS:
+                    value = data.get(field)
+                    # Empty scrape results never wipe existing data
+                    if value in (None, '', [], '0.00'):
+                        continue
+                    setattr(university, field, value)
+                to_update.append(university)
+
+            if to_update:
+                University.objects.bulk_update(to_update, UPDATABLE_FIELDS, batch_size=self.chunk_size)
+            if to_create:
+                University.objects.bulk_create(to_create, batch_size=self.chunk_size)
+        self.updated += len(to_update)
+        self.created += len(to_create)
@@ -0,0 +1,68 @@
+"""
+Login benchmark.
+
+Posts credentials to the token endpoint (MyTokenObtainPairView) for a
+throwaway user and reports the queries and wall time per login: the first
+login (claims not cached yet) separately from the repeated ones. Everything
+runs in a transaction that is rolled back, so no rows are left behind.
+"""
+import time
+import uuid
+
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.db import connection, transaction
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIRequestFactory
+
+from .. import entitlements, token_claims
+
+PASSWORD = 'benchmark-login-password'
+
+
+class _Rollback(Exception):
+    pass
+
+
+def _login(view, identifier):
+    request = APIRequestFactory().post('/api/token/', {'username': identifier, 'password': PASSWORD}, format='json')
+    with CaptureQueriesContext(connection) as queries:
+        started = time.perf_counter()
+        response = view(request)
+        elapsed = time.perf_counter() - started
+    if response.status_code != 200:
+        raise RuntimeError(f'Login failed with HTTP {response.status_code}: {response.data}')
+    return [q['sql'] for q in queries.captured_queries], elapsed
+
+
+def run_login_benchmark(rounds=20, by='email'):
+    """
+    Log in `rounds` times with the username or email (`by`). Returns
+    {'first': {...}, 'repeat': {...}} with the queries per login, the SQL of
+    one login and ms/login.
+    """
+    # Imported lazily: the view module pulls in the whole API surface
+    from ..views import MyTokenObtainPairView
+
+    view = MyTokenObtainPairView.as_view()
+    name = f'benchmark-login-{uuid.uuid4().hex[:8]}'
+    results = {}
+    try:
+        with transaction.atomic():
+            user = User.objects.create_user(username=name, email=f'{name}@example.com', password=PASSWORD)
+            identifier = user.email.upper() if by == 'email' else name.upper()
+            logins = [_login(view, identifier) for _ in range(rounds + 1)]
+            raise _Rollback
+    except _Rollback:
+        pass
+    # The rolled back user's cache entries would otherwise outlive it
+    cache.delete_many([entitlements._key(user.pk), token_claims._key(user.pk)])
+
+    for label, runs in (('first', logins[:1]), ('repeat', logins[1:])):
+        results[label] = {
+            'logins': len(runs),
+            'queries_per_login': round(sum(len(sql) for sql, _ in runs) / len(runs), 1),
+            'ms_per_login': round(sum(elapsed for _, elapsed in runs) / len(runs) * 1000, 1),
+            'sql': runs[-1][0],
+        }
+    return results
@@ -0,0 +1,176 @@
+"""
+Offline scraper benchmark.
+
+Runs the scrape pipelines against the fixture server and reports throughput
+(pages/sec), CPU time per page, peak Python memory and how many University
+fields the extraction filled in. Results can be compared with a stored
+baseline so regressions show up as a failed run. Peak memory depends on the
+machine and Python build, so it is reported against the baseline but never
+fails a run; the baseline records where it was produced.
+"""
+import json
+import os
+import platform
+import sys
+import time
+import tracemalloc
+
+import requests_cache
+from django.contrib.auth.models import User
+from django.test import override_settings
+from rest_framework.test import APIRequestFactory, force_authenticate
+
+from ..enhanced_scraper import EnhancedUniversityScraper
+from .server import FixtureServer
+
+BASELINE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'baseline.json')
+
+# Fields that count towards extraction coverage
+COVERAGE_FIELDS = [
+    'name', 'country', 'city', 'tuition_fee', 'application_fee', 'intakes',
+    'bachelor_programs', 'masters_programs', 'scholarships', 'application_link', 'description',
+]
+
+# Allowed relative slack before a metric counts as a regression
+DEFAULT_TOLERANCE = 0.2
+
+
+def _run_enhanced(url):
+    return EnhancedUniversityScraper().scrape_university(url)
+
+
+def _run_view(url):
+    # Imported lazily: the view module pulls in the whole API surface
+    from ..views import UniversityScrapeView
+
+    request = APIRequestFactory().post('/api/universities/scrape/', {'url': url}, format='json')
+    force_authenticate(request, user=User(username='benchmark', is_staff=True))
+    response = UniversityScrapeView.as_view()(request)
+    if response.status_code != 200:
+        raise RuntimeError(response.data.get('error') or f'HTTP {response.status_code}')
+    return response.data
+
+
+PIPELINES = {
+    'enhanced': _run_enhanced,
+    'view': _run_view,
+}
+
+
+def _filled(value):
+    return value not in (None, '', [], {}, '0.00', '0')
+
+
+def field_coverage(record):
+    return sum(1 for f in COVERAGE_FIELDS if _filled(record.get(f))) / len(COVERAGE_FIELDS)
+
+
+def _scrape_all(run, urls):
+    records, errors = [], []
+    for url in urls:
+        try:
+            records.append(run(url))
+        except Exception as e:
+            errors.append(f'{url}: {e}')
+    return records, errors
+
+
+def benchmark_pipeline(name, server, rounds=10):
+    """
+    Benchmark one pipeline. The first pass is a warm-up (imports, regex
+    compilation) and is not measured; memory is measured in a separate pass
+    because tracemalloc would distort the timings.
+    """
+    run = PIPELINES[name]
+    urls = server.sites()
+    _scrape_all(run, urls)
+
+    server.reset_counter()
+    wall_start = time.perf_counter()
+    cpu_start = time.process_time()
+    for _ in range(rounds):
+        records, errors = _scrape_all(run, urls)
+    cpu = time.process_time() - cpu_start
+    wall = time.perf_counter() - wall_start
+    pages = server.requests_served
+
+    tracemalloc.start()
+    try:
+        _scrape_all(run, urls)
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    coverage = sum(field_coverage(r) for r in records) / len(urls) if urls else 0.0
+    return {
+        'sites': len(urls),
+        'rounds': rounds,
+        'pages': pages,
+        'pages_per_sec': round(pages / wall, 2) if wall else 0.0,
+        'cpu_ms_per_page': round(cpu * 1000 / pages, 2) if pages else 0.0,
+        'peak_memory_kb': round(peak / 1024),
+        'field_coverage': round(coverage, 3),
+        'errors': errors,
+    }
+
+
+def run_benchmark(pipelines, latency_ms=20, rounds=10):
+    """Run the given pipelines with no network access beyond the local fixture server."""
+    results = {}
+    # The HTTP cache would turn every fetch after the first into a disk read,
+    # and snapshots would write to the database.
+    with requests_cache.disabled(), override_settings(SCRAPE_SNAPSHOTS_ENABLED=False), \
+            FixtureServer(latency_ms=latency_ms) as server:
+        for name in pipelines:
+            results[name] = benchmark_pipeline(name, server, rounds=rounds)
+    return results
+
+
+def load_baseline(path=BASELINE_PATH):
+    try:
+        with open(path, encoding='utf-8') as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return {}
+
+
+def save_baseline(results, latency_ms, path=BASELINE_PATH):
+    data = {
+        'latency_ms': latency_ms,
+        'recorded': {
+            'command': ' '.join(['manage.py'] + sys.argv[1:]),
+            'date': time.strftime('%Y-%m-%d'),
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+        },
+        'pipelines': {
+            name: {k: v for k, v in metrics.items() if k != 'errors'}
+            for name, metrics in results.items()
+        },
+    }
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(data, f, indent=2, sort_keys=True)
+        f.write('\n')
+
+
+def compare_to_baseline(results, baseline, tolerance=DEFAULT_TOLERANCE):
+    """
+    Return (regressions, notes): human readable regressions against the
+    baseline, and memory growth, which is only reported (see module docstring).
+    """
+    regressions = []
+    notes = []
+    for name, metrics in results.items():
+        base = (baseline.get('pipelines') or {}).get(name)
+        if not base:
+            continue
+        if metrics['pages_per_sec'] < base['pages_per_sec'] * (1 - tolerance):
+            regressions.append(f"{name}: pages/sec {metrics['pages_per_sec']} < baseline {base['pages_per_sec']}")
+        if metrics['cpu_ms_per_page'] > base['cpu_ms_per_page'] * (1 + tolerance):
+            regressions.append(f"{name}: CPU ms/page {metrics['cpu_ms_per_page']} > baseline {base['cpu_ms_per_page']}")
+        if metrics['peak_memory_kb'] > base['peak_memory_kb'] * (1 + tolerance):
+            notes.append(f"{name}: peak memory {metrics['peak_memory_kb']} KB > baseline {base['peak_memory_kb']} KB")
+        # Coverage is deterministic, so any drop is a real extraction change
+        if metrics['field_coverage'] < base['field_coverage']:
+            regressions.append(f"{name}: field coverage {metrics['field_coverage']} < baseline {base['field_coverage']}")
+    return regressions, notes
@@ -0,0 +1,88 @@
+"""
+Stand-in HTTP server for the scraper benchmark.
+
+Serves the saved university pages under `fixtures/` from a separate process so
+its CPU time does not count against the scraper. Every response is delayed by
+a configurable latency to approximate a real site, and the number of pages
+served is exposed for the pages/sec figure.
+"""
+import multiprocessing
+import os
+import time
+from functools import partial
+from http.server import SimpleHTTPRequestHandler, ThreadingHTTPServer
+
+FIXTURES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'fixtures')
+
+
+class _FixtureHandler(SimpleHTTPRequestHandler):
+    def __init__(self, *args, latency=0.0, counter=None, **kwargs):
+        self.latency = latency
+        self.counter = counter
+        super().__init__(*args, **kwargs)
+
+    def send_head(self):
+        if self.latency:
+            time.sleep(self.latency)
+        with self.counter.get_lock():
+            self.counter.value += 1
+        return super().send_head()
+
+    def log_message(self, format, *args):
+        pass
+
+
+def _serve(root, latency, counter, port_queue):
+    handler = partial(_FixtureHandler, directory=root, latency=latency, counter=counter)
+    server = ThreadingHTTPServer(('127.0.0.1', 0), handler)
+    server.daemon_threads = True
+    port_queue.put(server.server_address[1])
+    server.serve_forever()
+
+
+class FixtureServer:
+    """
+    Context manager that runs the fixture server in a child process:
+
+        with FixtureServer(latency_ms=50) as server:
+            url = server.url('northfield/index.html')
+    """
+
+    def __init__(self, root=FIXTURES_DIR, latency_ms=0):
+        self.root = root
+        self.latency = latency_ms / 1000.0
+        self.port = None
+        self._counter = multiprocessing.Value('i', 0)
+        self._process = None
+
+    def __enter__(self):
+        port_queue = multiprocessing.Queue()
+        self._process = multiprocessing.Process(
+            target=_serve, args=(self.root, self.latency, self._counter, port_queue), daemon=True,
+        )
+        self._process.start()
+        self.port = port_queue.get(timeout=10)
+        return self
+
+    def __exit__(self, *exc):
+        self._process.terminate()
+        self._process.join(timeout=5)
+
+    def url(self, path):
+        return f'http://127.0.0.1:{self.port}/{path.lstrip("/")}'
+
+    @property
+    def requests_served(self):
+        return self._counter.value
+
+    def reset_counter(self):
+        with self._counter.get_lock():
+            self._counter.value = 0
+
+    def sites(self):
+        """Start URLs of every fixture site (one directory with an index.html each)."""
+        return [
+            self.url(f'{name}/index.html')
+            for name in sorted(os.listdir(self.root))
+            if os.path.isfile(os.path.join(self.root, name, 'index.html'))
+        ]
@@ -0,0 +1,255 @@
+"""
+Pool of warm headless browser contexts for JS-rendered pages.
+
+Starting Chromium costs far more than rendering a page, so one browser per
+process is kept running and its contexts are reused between renders. The
+pool runs Playwright's async API on a dedicated event-loop thread; any thread
+(request handlers, batch scraper I/O threads) calls the blocking render(),
+which schedules the work on that loop and waits for the HTML.
+
+- At most `max_contexts` pages render at once; further callers wait.
+- Contexts idle longer than `idle_seconds` are closed, and the browser itself
+  shuts down once nothing has used it for that long.
+- Every navigation has a timeout. A crashed page or a disconnected browser
+  discards the affected context (or relaunches the browser) and the render
+  is retried once.
+- Image, font and media requests are aborted, which is most of the bytes on
+  a typical university homepage.
+
+Playwright is optional: without it `browser_available()` is False and the
+scrapers fall back to plain HTTP fetches.
+"""
+import asyncio
+import atexit
+import logging
+import threading
+import time
+
+from django.conf import settings
+
+try:
+    from playwright.async_api import async_playwright, Error as PlaywrightError
+except ImportError:
+    async_playwright = None
+    PlaywrightError = Exception
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_BLOCKED_RESOURCES = ('image', 'font', 'media')
+EVICTION_INTERVAL_SECONDS = 30
+
+
+class BrowserUnavailable(RuntimeError):
+    pass
+
+
+def browser_available():
+    return async_playwright is not None and getattr(settings, 'SCRAPE_BROWSER_ENABLED', True)
+
+
+class BrowserPool:
+    """Warm browser contexts shared by every thread of the process; see the module docstring."""
+
+    def __init__(self, max_contexts=4, idle_seconds=300, page_timeout_ms=30000,
+                 blocked_resources=DEFAULT_BLOCKED_RESOURCES, headless=True):
+        self.max_contexts = max_contexts
+        self.idle_seconds = idle_seconds
+        self.page_timeout_ms = page_timeout_ms
+        self.blocked_resources = frozenset(blocked_resources)
+        self.headless = headless
+        self.stats = {'renders': 0, 'failures': 0, 'contexts_created': 0, 'browser_launches': 0, 'evictions': 0}
+
+        self._loop = None
+        self._thread = None
+        self._start_lock = threading.Lock()
+        # The attributes below are only touched on the pool's event loop
+        self._playwright = None
+        self._browser = None
+        self._idle = []  # [(context, last_used)]
+        self._slots = None
+        self._evictor = None
+        self._active = 0
+        self._last_used = time.monotonic()
+
+    # -- public, thread-safe API -------------------------------------------
+
+    def render(self, url, wait_until='networkidle', timeout_ms=None):
+        """Return the rendered HTML of `url`. Blocks the calling thread."""
+        if async_playwright is None:
+            raise BrowserUnavailable('playwright is not installed')
+        self._ensure_loop()
+        timeout_ms = timeout_ms or self.page_timeout_ms
+        future = asyncio.run_coroutine_threadsafe(self._render(url, wait_until, timeout_ms), self._loop)
+        # Leave room for waiting on a slot and one retry
+        return future.result(timeout=timeout_ms / 1000.0 * 3 + 10)
+
+    def close(self):
+        if self._loop is None:
+            return
+        try:
+            asyncio.run_coroutine_threadsafe(self._shutdown_browser(), self._loop).result(timeout=30)
+        except Exception as e:
+            logger.info(f"Browser pool shutdown: {e}")
+        self._loop.call_soon_threadsafe(self._evictor.cancel)
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        self._thread.join(timeout=5)
+        self._loop = None
+        self._thread = None
+
+    # -- event loop side ----------------------------------------------------
+
+    def _ensure_loop(self):
+        with self._start_lock:
+            if self._loop is not None:
+                return
+            ready = threading.Event()
+
+            def run():
+                loop = asyncio.new_event_loop()
+                asyncio.set_event_loop(loop)
+                self._loop = loop
+                self._slots = asyncio.Semaphore(self.max_contexts)
+                self._evictor = loop.create_task(self._evict_idle_forever())
+                ready.set()
+                loop.run_forever()
+                loop.close()
+
+            self._thread = threading.Thread(target=run, name='browser-pool', daemon=True)
+            self._thread.start()
+            ready.wait()
+
+    async def _ensure_browser(self):
+        if self._browser is not None and self._browser.is_connected():
+            return self._browser
+        # First use, or the browser crashed: drop stale contexts and relaunch
+        self._idle = []
+        if self._playwright is None:
+            self._playwright = await async_playwright().start()
+        self._browser = await self._playwright.chromium.launch(headless=self.headless)
+        self.stats['browser_launches'] += 1
+        logger.info("Launched headless browser for the scrape pool")
+        return self._browser
+
+    async def _block_resources(self, route):
+        if route.request.resource_type in self.blocked_resources:
+            await route.abort()
+        else:
+            await route.continue_()
+
+    async def _acquire_context(self):
+        browser = await self._ensure_browser()
+        while self._idle:
+            context, _ = self._idle.pop()
+            if context.browser is browser:
+                return context
+        context = await browser.new_context(user_agent='Mozilla/5.0 (compatible; UniFinderBot/1.0)')
+        context.set_default_timeout(self.page_timeout_ms)
+        if self.blocked_resources:
+            await context.route('**/*', self._block_resources)
+        self.stats['contexts_created'] += 1
+        return context
+
+    async def _discard(self, context):
+        try:
+            await context.close()
+        except Exception:
+            pass
+
+    async def _render_once(self, url, wait_until, timeout_ms):
+        context = await self._acquire_context()
+        page = None
+        try:
+            page = await context.new_page()
+            await page.goto(url, wait_until=wait_until, timeout=timeout_ms)
+            html = await page.content()
+        except Exception:
+            # The context may be wedged (crashed renderer); never reuse it
+            if page is not None:
+                try:
+                    await page.close()
+                except Exception:
+                    pass
+            await self._discard(context)
+            raise
+        await page.close()
+        self._idle.append((context, time.monotonic()))
+        return html
+
+    async def _render(self, url, wait_until, timeout_ms):
+        async with self._slots:
+            self._active += 1
+            self._last_used = time.monotonic()
+            try:
+                try:
+                    html = await self._render_once(url, wait_until, timeout_ms)
+                except PlaywrightError as e:
+                    if self._browser is not None and self._browser.is_connected() and 'crash' not in str(e).lower():
+                        raise
+                    logger.info(f"Browser crashed while rendering {url}; retrying once")
+                    html = await self._render_once(url, wait_until, timeout_ms)
+            except Exception:
+                self.stats['failures'] += 1
+                raise
+            finally:
+                self._active -= 1
+                self._last_used = time.monotonic()
+            self.stats['renders'] += 1
+            return html
+
+    async def _evict_idle_forever(self):
+        while True:
+            await asyncio.sleep(EVICTION_INTERVAL_SECONDS)
+            try:
+                await self._evict_idle()
+            except Exception as e:
+                logger.info(f"Browser pool eviction failed: {e}")
+
+    async def _evict_idle(self):
+        now = time.monotonic()
+        keep = []
+        for context, last_used in self._idle:
+            if now - last_used > self.idle_seconds:
+                await self._discard(context)
+                self.stats['evictions'] += 1
+            else:
+                keep.append((context, last_used))
+        self._idle = keep
+        if not self._idle and not self._active and self._browser is not None and now - self._last_used > self.idle_seconds:
+            await self._shutdown_browser()
+
+    async def _shutdown_browser(self):
+        for context, _ in self._idle:
+            await self._discard(context)
+        self._idle = []
+        if self._browser is not None:
+            try:
+                await self._browser.close()
+            except Exception:
+                pass
+            self._browser = None
+        if self._playwright is not None:
+            await self._playwright.stop()
+            self._playwright = None
+
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def get_browser_pool():
+    """The process-wide pool, created on first use from settings."""
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = BrowserPool(
+                max_contexts=getattr(settings, 'SCRAPE_BROWSER_POOL_SIZE', 4),
+                idle_seconds=getattr(settings, 'SCRAPE_BROWSER_IDLE_SECONDS', 300),
+                page_timeout_ms=getattr(settings, 'SCRAPE_BROWSER_PAGE_TIMEOUT_MS', 30000),
+                blocked_resources=getattr(settings, 'SCRAPE_BROWSER_BLOCKED_RESOURCES', DEFAULT_BLOCKED_RESOURCES),
+            )
+            atexit.register(_pool.close)
+        return _pool
+
+
+def render_html(url):
+    return get_browser_pool().render(url)
@@ -0,0 +1,25 @@
+from django.conf import settings
+from django.core.checks import Error, Tags, register
+
+PER_PROCESS_CACHES = (
+    'django.core.cache.backends.locmem.LocMemCache',
+    'django.core.cache.backends.dummy.DummyCache',
+)
+
+
+@register(Tags.caches, deploy=True)
+def check_shared_cache(app_configs, **kwargs):
+    """
+    Entitlement claims published by one process must be seen by all of them.
+    A deployment check (`manage.py check --deploy`), so tests and local runs
+    can use the in-memory cache.
+    """
+    backend = settings.CACHES.get('default', {}).get('BACKEND', '')
+    if backend not in PER_PROCESS_CACHES:
+        return []
+    return [Error(
+        f'The default cache ({backend}) is not shared between processes.',
+        hint='Set CACHE_REDIS_URL (or leave it unset to use the Celery broker Redis): subscription changes '
+             'applied in one process must revoke access tokens in every other (universities.entitlements).',
+        id='universities.E001',
+    )]
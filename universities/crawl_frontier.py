@@ -0,0 +1,154 @@
+"""
+Crawl frontier shared by the university scrapers.
+
+Decides which subpages of a university site are worth fetching. Links are
+canonicalized before they are compared, so `/fees`, `/fees/`, `/fees#intl` and
+`/fees?utm_source=x` count as one page, and kept in a priority queue ordered
+by keyword score so fee and admission pages are fetched before anything else.
+Depth and page budgets bound the crawl and links that leave the site are
+dropped.
+"""
+import heapq
+import itertools
+import re
+from urllib.parse import parse_qsl, urlencode, urljoin, urlsplit, urlunsplit
+
+# Query parameters that never change page content
+TRACKING_PARAMS = {'gclid', 'fbclid', 'msclkid', 'mc_cid', 'mc_eid', '_ga', 'ref', 'source'}
+TRACKING_PREFIXES = ('utm_',)
+
+DEFAULT_PORTS = {'http': 80, 'https': 443}
+
+# Fee and admission pages carry the fields that are hardest to find elsewhere
+FEE_ADMISSION_WEIGHTS = {
+    'tuition': 10, 'fees': 10, 'fee': 8, 'cost': 6, 'admission': 9, 'apply': 5,
+    'deadline': 5, 'deposit': 5, 'international': 4, 'domestic': 3, 'canadian': 2,
+    'scholarship': 4, 'financial-aid': 4, 'financial aid': 4,
+    'housing': 2, 'residence': 2, 'visa': 2,
+    # Turkish sites (see the Turkish patterns in EnhancedUniversityScraper)
+    'ücret': 10, 'ucret': 10, 'başvuru': 9, 'basvuru': 9, 'burs': 4,
+}
+
+PROGRAM_WEIGHTS = {
+    'tuition': 8, 'fees': 8, 'scholarship': 6, 'financial aid': 6, 'financial-aid': 6,
+    'program': 5, 'programs': 5, 'courses': 4, 'degrees': 4, 'majors': 4,
+    'undergraduate': 3, 'graduate': 3,
+}
+
+SKIPPED_EXTENSIONS = re.compile(r'\.(?:jpe?g|png|gif|svg|webp|ico|css|js|zip|mp4|mp3|docx?|xlsx?|pptx?)$', re.I)
+
+
+def canonicalize_url(url, base=None):
+    """
+    Normalized absolute form of `url`, or None for links that can't be
+    crawled (mailto:, javascript:, other schemes, binary assets).
+    """
+    if base:
+        url = urljoin(base, url.strip())
+    try:
+        parts = urlsplit(url.strip())
+    except ValueError:
+        return None
+    scheme = parts.scheme.lower()
+    if scheme not in DEFAULT_PORTS or not parts.hostname:
+        return None
+
+    host = parts.hostname.lower()
+    try:
+        port = parts.port
+    except ValueError:
+        return None
+    netloc = host if port in (None, DEFAULT_PORTS[scheme]) else f'{host}:{port}'
+
+    path = re.sub(r'/{2,}', '/', parts.path or '/')
+    if len(path) > 1:
+        path = path.rstrip('/')
+    if SKIPPED_EXTENSIONS.search(path):
+        return None
+
+    query = sorted(
+        (k, v) for k, v in parse_qsl(parts.query, keep_blank_values=True)
+        if k.lower() not in TRACKING_PARAMS and not k.lower().startswith(TRACKING_PREFIXES)
+    )
+    return urlunsplit((scheme, netloc, path, urlencode(query), ''))
+
+
+def site_of(url):
+    """Host without a leading `www.`; subdomains of it count as the same site."""
+    host = (urlsplit(url).hostname or '').lower()
+    return host[4:] if host.startswith('www.') else host
+
+
+def score_link(url, anchor_text, weights):
+    haystack = f'{urlsplit(url).path.lower()} {anchor_text.lower()}'
+    return sum(weight for keyword, weight in weights.items() if keyword in haystack)
+
+
+class CrawlFrontier:
+    """
+    Priority queue of pages to fetch for one university.
+
+    Iterating yields (url, depth) pairs, best score first, until the page
+    budget is spent or the queue is empty. Links found on fetched pages can
+    be fed back with `add_links(..., depth=depth + 1)`.
+    """
+
+    def __init__(self, start_url, weights=None, max_pages=8, max_depth=1, same_site=True, min_score=1, allow=None):
+        self.weights = weights or FEE_ADMISSION_WEIGHTS
+        # Optional callable(url) -> bool, e.g. a robots.txt check
+        self.allow = allow
+        self.max_pages = max_pages
+        self.max_depth = max_depth
+        self.same_site = same_site
+        self.min_score = min_score
+        self.start_url = canonicalize_url(start_url) or start_url
+        self.site = site_of(self.start_url)
+        self.seen = {self.start_url}
+        self.pages_taken = 0
+        self._heap = []
+        self._order = itertools.count()
+
+    def _on_site(self, url):
+        host = site_of(url)
+        return host == self.site or host.endswith('.' + self.site)
+
+    def add(self, url, anchor_text='', depth=1, base=None):
+        """Queue a link. Returns False when it was a duplicate or filtered out."""
+        if depth > self.max_depth:
+            return False
+        url = canonicalize_url(url, base=base)
+        if url is None or url in self.seen:
+            return False
+        if self.same_site and not self._on_site(url):
+            return False
+        score = score_link(url, anchor_text, self.weights)
+        if score < self.min_score:
+            return False
+        self.seen.add(url)
+        if self.allow and not self.allow(url):
+            return False
+        # Ties go to shallower pages, then to discovery order
+        heapq.heappush(self._heap, (-score, depth, next(self._order), url))
+        return True
+
+    def add_urls(self, urls, depth=1):
+        """Queue bare URLs, e.g. sitemap candidates, scored on their path alone."""
+        for url in urls:
+            self.add(url, depth=depth)
+
+    def add_links(self, soup, base_url, depth=1):
+        """Queue every anchor of a parsed page."""
+        if depth > self.max_depth:
+            return
+        for a in soup.find_all('a', href=True):
+            self.add(a['href'], a.get_text(' ', strip=True), depth=depth, base=base_url)
+
+    def __iter__(self):
+        while self._heap and self.pages_taken < self.max_pages:
+            _, depth, _, url = heapq.heappop(self._heap)
+            self.pages_taken += 1
+            yield url, depth
+
+    def take(self):
+        """Pop the remaining page budget as a list of URLs."""
+        return [url for url, _ in self]
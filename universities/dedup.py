@@ -0,0 +1,182 @@
+"""
+Near-duplicate removal for scraped program and scholarship lists.
+
+The same program shows up on a university site under several names ("MSc
+Computer Science", "Master of Science in Computer Science", "Computer
+Science, M.Sc."). Names are first reduced to a key: degree level (bachelor,
+master, ...), an optional degree variant (science, arts, ...) and the
+remaining subject tokens, with punctuation and filler words dropped. Names
+with the same key are duplicates outright; otherwise a name is only compared
+against clusters at the same level that share one of its rarest subject
+tokens (blocking), using rapidfuzz's token_sort_ratio. That keeps the work
+close to linear, so lists of thousands of names dedupe in milliseconds.
+
+Levels never merge with each other, and "MSc Economics" does not merge with
+"MA Economics"; a bare "Master in Economics" merges with either.
+
+The module has no Django dependency so extraction worker processes can use
+it; the `dedupe_university_lists` command applies it to stored rows.
+"""
+import re
+import unicodedata
+from collections import Counter, defaultdict, namedtuple
+
+from rapidfuzz import fuzz, process
+
+DEFAULT_THRESHOLD = 90
+# Rarest subject tokens of a name used to look up candidate clusters
+BLOCK_TOKENS = 2
+
+# (pattern, level, variant), tried in order on the lowercased, accent- and
+# dot-stripped name; longer phrases come before the abbreviations they contain.
+DEGREE_PATTERNS = [
+    (r'doctor of philosophy|phd|dphil|doctorate|doctoral|doktora', 'doctorate', None),
+    (r'masters? of business administration|mba', 'master', 'business administration'),
+    (r'masters? of science|msc|ms', 'master', 'science'),
+    (r'masters? of arts|ma', 'master', 'arts'),
+    (r'masters? of engineering|meng', 'master', 'engineering'),
+    (r'masters? of laws|llm', 'master', 'laws'),
+    (r'yuksek lisans|masters?', 'master', None),
+    (r'bachelors? of science|bsc|bs', 'bachelor', 'science'),
+    (r'bachelors? of arts|ba', 'bachelor', 'arts'),
+    (r'bachelors? of engineering|beng', 'bachelor', 'engineering'),
+    (r'bachelors? of laws|llb', 'bachelor', 'laws'),
+    (r'on lisans|associate', 'associate', None),
+    (r'lisans|bachelors?', 'bachelor', None),
+]
+DEGREE_RES = [(re.compile(rf'\b(?:{pattern})\b'), level, variant) for pattern, level, variant in DEGREE_PATTERNS]
+
+FILLER_WORDS = {
+    'a', 'an', 'and', 'the', 'of', 'in', 'for', 'with', 'on', 'degree', 'degrees',
+    'program', 'programs', 'programme', 'programmes', 'course', 'courses',
+    'hons', 'honours', 'honors', 'full', 'time', 'part',
+}
+
+NameKey = namedtuple('NameKey', ['level', 'variant', 'tokens'])
+
+
+def _fold(name):
+    name = unicodedata.normalize('NFKD', name or '')
+    name = ''.join(c for c in name if not unicodedata.combining(c)).casefold()
+    # "M.Sc." -> "msc", "Master's" -> "masters"
+    return re.sub(r"(?<=\w)[.'’](?=\w|\s|$)", '', name).replace('ı', 'i')
+
+
+def name_key(name):
+    """`Master of Science in Computer Science` -> NameKey('master', 'science', ('computer', 'science'))"""
+    text = _fold(name)
+    level = variant = None
+    for regex, degree_level, degree_variant in DEGREE_RES:
+        match = regex.search(text)
+        if match:
+            level, variant = degree_level, degree_variant
+            text = text[:match.start()] + ' ' + text[match.end():]
+            break
+    tokens = tuple(t for t in re.split(r'[\W_]+', text) if t and t not in FILLER_WORDS)
+    return NameKey(level or '', variant, tokens)
+
+
+def _compatible(a, b):
+    return a.variant is None or b.variant is None or a.variant == b.variant
+
+
+def cluster(names, threshold=DEFAULT_THRESHOLD):
+    """
+    Cluster id for each of `names`; near-duplicates share an id. Ids are
+    assigned in first-seen order.
+    """
+    keys = [name_key(name) for name in names]
+    frequency = Counter(token for key in keys for token in set(key.tokens))
+    exact = {}
+    blocks = defaultdict(list)  # (level, token) -> cluster ids
+    reps = []  # (key, subject string) of each cluster's first name
+    assignment = []
+    for key in keys:
+        subject = ' '.join(key.tokens)
+        cluster_id = exact.get(key)
+        if cluster_id is None and subject:
+            rarest = sorted(set(key.tokens), key=lambda t: (frequency[t], t))[:BLOCK_TOKENS]
+            candidates = {
+                cid: reps[cid][1]
+                for token in rarest
+                for cid in blocks[(key.level, token)]
+                if _compatible(reps[cid][0], key)
+            }
+            if candidates:
+                match = process.extractOne(subject, candidates, scorer=fuzz.token_sort_ratio, score_cutoff=threshold)
+                if match:
+                    cluster_id = match[2]
+        if cluster_id is None:
+            cluster_id = len(reps)
+            reps.append((key, subject))
+            for token in set(key.tokens):
+                blocks[(key.level, token)].append(cluster_id)
+        exact.setdefault(key, cluster_id)
+        assignment.append(cluster_id)
+    return assignment
+
+
+def _merge_into(kept, duplicate):
+    """Fill the kept entry's empty fields from a duplicate."""
+    if isinstance(kept, dict) and isinstance(duplicate, dict):
+        for field, value in duplicate.items():
+            if value and not kept.get(field):
+                kept[field] = value
+
+
+def _item_name(item, name_field):
+    if isinstance(item, dict):
+        return item.get(name_field) or item.get('name') or ''
+    return str(item or '')
+
+
+def dedupe_programs(programs, threshold=DEFAULT_THRESHOLD):
+    """
+    Program entries (dicts with `program_name`, or plain strings) without
+    near-duplicates, first occurrence kept and filled in from the others.
+    """
+    names = [_item_name(p, 'program_name') for p in programs]
+    out = []
+    kept = {}
+    for program, name, cluster_id in zip(programs, names, cluster(names, threshold)):
+        if not name.strip():
+            continue
+        if cluster_id in kept:
+            _merge_into(kept[cluster_id], program)
+            continue
+        entry = dict(program) if isinstance(program, dict) else program
+        kept[cluster_id] = entry
+        out.append(entry)
+    return out
+
+
+def _link_key(link):
+    return (link or '').strip().lower().split('#')[0].rstrip('/')
+
+
+def dedupe_scholarships(items, threshold=DEFAULT_THRESHOLD):
+    """
+    Scholarship entries without duplicates: the same link, or a
+    near-identical name, counts as the same scholarship.
+    """
+    names = [_item_name(it, 'name') for it in items]
+    out = []
+    by_link = {}
+    by_cluster = {}
+    for item, name, cluster_id in zip(items, names, cluster(names, threshold)):
+        link = _link_key(item.get('link') if isinstance(item, dict) else '')
+        if not link and not name.strip():
+            continue
+        kept = (by_link.get(link) if link else None)
+        if kept is None and name.strip():
+            kept = by_cluster.get(cluster_id)
+        if kept is not None:
+            _merge_into(kept, item)
+        else:
+            kept = dict(item) if isinstance(item, dict) else item
+            out.append(kept)
+        if link:
+            by_link.setdefault(link, kept)
+        if name.strip():
+            by_cluster.setdefault(cluster_id, kept)
+    return out
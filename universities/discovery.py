@@ -0,0 +1,185 @@
+"""
+Page discovery from robots.txt and sitemaps.
+
+Fee and admission pages are often only reachable through menus that the
+anchor-following crawl never sees, but most university sites list them in
+their sitemap. discover_pages() reads the host's robots.txt (parsed once per
+host and cached for ROBOTS_TTL_SECONDS), walks the declared sitemaps or the
+conventional /sitemap.xml, and returns the best-scoring URLs to seed the crawl
+frontier with.
+
+Sitemaps are parsed incrementally with iterparse straight off the response
+stream, and only a bounded heap of the best candidates is kept, so a
+100k-URL sitemap costs constant memory.
+"""
+import gzip
+import heapq
+import logging
+import threading
+import time
+import xml.etree.ElementTree as ET
+from urllib.parse import urlsplit
+from urllib.robotparser import RobotFileParser
+
+import requests
+
+from .crawl_frontier import FEE_ADMISSION_WEIGHTS, canonicalize_url, score_link, site_of
+from .fetching import uncached
+
+logger = logging.getLogger(__name__)
+
+USER_AGENT = 'UniFinderBot'
+ROBOTS_TTL_SECONDS = 6 * 3600
+# Failed robots fetches are retried sooner than successful ones
+ROBOTS_ERROR_TTL_SECONDS = 600
+MAX_SITEMAPS = 10
+MAX_SITEMAP_URLS = 200000
+# Child sitemaps of an index whose name suggests the pages we want come first
+SITEMAP_NAME_WEIGHTS = {'page': 3, 'admission': 5, 'tuition': 5, 'fee': 5, 'study': 3, 'program': 2, 'news': -5, 'event': -5, 'blog': -5, 'post': -3}
+
+
+def _origin(url):
+    parts = urlsplit(url)
+    return f'{parts.scheme}://{parts.netloc}'
+
+
+class _RobotsEntry:
+    def __init__(self, parser, sitemaps, expires_at):
+        self.parser = parser
+        self.sitemaps = sitemaps
+        self.expires_at = expires_at
+
+
+class RobotsCache:
+    """Per-host robots.txt parses with a TTL, safe to share between threads."""
+
+    def __init__(self, ttl=ROBOTS_TTL_SECONDS, user_agent=USER_AGENT):
+        self.ttl = ttl
+        self.user_agent = user_agent
+        self._entries = {}
+        self._lock = threading.Lock()
+
+    def _fetch(self, origin, session):
+        parser = RobotFileParser(origin + '/robots.txt')
+        ttl = self.ttl
+        try:
+            with uncached(session):
+                resp = session.get(origin + '/robots.txt', timeout=10)
+            if resp.status_code in (401, 403):
+                parser.disallow_all = True
+            elif resp.status_code >= 400:
+                parser.allow_all = True
+            else:
+                parser.parse(resp.text.splitlines())
+        except requests.RequestException as e:
+            logger.info(f"robots.txt unavailable for {origin}: {e}")
+            parser.allow_all = True
+            ttl = ROBOTS_ERROR_TTL_SECONDS
+        sitemaps = list(parser.site_maps() or []) or [origin + '/sitemap.xml']
+        return _RobotsEntry(parser, sitemaps, time.monotonic() + ttl)
+
+    def get(self, url, session):
+        origin = _origin(url)
+        with self._lock:
+            entry = self._entries.get(origin)
+        if entry is None or entry.expires_at < time.monotonic():
+            # Fetched outside the lock; two threads racing on a cold host
+            # both fetch once, which is cheaper than serializing every host.
+            entry = self._fetch(origin, session)
+            with self._lock:
+                self._entries[origin] = entry
+        return entry
+
+    def can_fetch(self, url, session):
+        return self.get(url, session).parser.can_fetch(self.user_agent, url)
+
+
+robots_cache = RobotsCache()
+
+
+def _open_sitemap(url, session):
+    with uncached(session):
+        resp = session.get(url, timeout=20, stream=True)
+    resp.raise_for_status()
+    resp.raw.decode_content = True
+    if url.endswith('.gz') or 'gzip' in resp.headers.get('Content-Type', ''):
+        return resp, gzip.GzipFile(fileobj=resp.raw)
+    return resp, resp.raw
+
+
+def iter_sitemap(url, session):
+    """
+    Yield ('url', loc) for page entries and ('sitemap', loc) for child
+    sitemaps of an index, parsing the response as it streams in.
+    """
+    resp, stream = _open_sitemap(url, session)
+    try:
+        root = None
+        for event, elem in ET.iterparse(stream, events=('start', 'end')):
+            if root is None:
+                root = elem
+            if event != 'end':
+                continue
+            tag = elem.tag.rsplit('}', 1)[-1]
+            if tag in ('url', 'sitemap'):
+                loc = next((child.text for child in elem if child.tag.rsplit('}', 1)[-1] == 'loc'), None)
+                if loc:
+                    yield tag, loc.strip()
+                # Cleared entries would otherwise stay attached to the root
+                root.clear()
+    finally:
+        resp.close()
+
+
+def discover_pages(start_url, session, weights=None, limit=10, max_urls=MAX_SITEMAP_URLS, robots=None):
+    """
+    Return up to `limit` same-site URLs from the site's sitemaps, best
+    keyword score first, skipping anything robots.txt disallows.
+    """
+    weights = weights or FEE_ADMISSION_WEIGHTS
+    robots = robots or robots_cache
+    entry = robots.get(start_url, session)
+    site = site_of(start_url)
+    start = canonicalize_url(start_url)
+
+    best = []
+    seen = set()
+    pending = [(0, sitemap) for sitemap in entry.sitemaps]
+    visited_sitemaps = 0
+    scanned = 0
+    while pending and visited_sitemaps < MAX_SITEMAPS and scanned < max_urls:
+        _, sitemap_url = heapq.heappop(pending)
+        visited_sitemaps += 1
+        try:
+            for kind, loc in iter_sitemap(sitemap_url, session):
+                if kind == 'sitemap':
+                    heapq.heappush(pending, (-score_link(loc, '', SITEMAP_NAME_WEIGHTS), loc))
+                    continue
+                scanned += 1
+                if scanned > max_urls:
+                    break
+                # Score the raw URL first: canonicalizing all 100k entries of a
+                # big sitemap costs more than the parse itself.
+                score = score_link(loc, '', weights)
+                if score <= 0 or (len(best) >= limit and score <= best[0][0]):
+                    continue
+                url = canonicalize_url(loc)
+                if not url or url == start or url in seen:
+                    continue
+                host = site_of(url)
+                if host != site and not host.endswith('.' + site):
+                    continue
+                seen.add(url)
+                # Bounded min-heap: only the `limit` best URLs are ever held
+                if len(best) < limit:
+                    heapq.heappush(best, (score, url))
+                elif score > best[0][0]:
+                    heapq.heapreplace(best, (score, url))
+        except (requests.RequestException, ET.ParseError, OSError, EOFError) as e:
+            logger.info(f"Sitemap {sitemap_url} skipped: {e}")
+            if sitemap_url in entry.sitemaps and len(entry.sitemaps) == 1:
+                # Nothing to discover on this host until robots.txt is re-read
+                entry.sitemaps = []
+
+    ranked = [url for score, url in sorted(best, key=lambda item: (-item[0], item[1]))]
+    return [url for url in ranked if entry.parser.can_fetch(robots.user_agent, url)]
@@ -0,0 +1,82 @@
+"""
+Retention for ApplicationDraft rows.
+
+A draft is stored for every multi-step form submission and only matters
+until its payment is processed. purge_drafts() removes drafts older than
+APPLICATION_DRAFT_RETENTION_DAYS whose `payment_tx_ref` points at a payment
+that is settled: applied (success and `subscription_updated`) or failed.
+Drafts without a payment, or with one still pending, are kept.
+
+Rows go in id-ordered chunks of APPLICATION_DRAFT_PURGE_CHUNK_SIZE, each
+archived and then deleted in its own short transaction, so the table is never
+locked for the whole run. Each chunk is archived first to one gzipped NDJSON
+file in APPLICATION_DRAFT_ARCHIVE_DIR, one compact JSON object per draft.
+Files are named after the chunk's id range and written atomically, so a
+rerun after a failed delete overwrites its file. With an empty archive
+directory the drafts are only deleted.
+"""
+import gzip
+import json
+import os
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Exists, OuterRef, Q
+from django.utils import timezone
+
+from payments.models import Payment
+from .models import ApplicationDraft
+
+ARCHIVE_FIELDS = ['id', 'email', 'full_name', 'phone', 'country', 'payment_tx_ref', 'created_at', 'updated_at', 'raw_payload']
+
+
+def purgeable_drafts(max_age_days=None):
+    max_age_days = max_age_days or getattr(settings, 'APPLICATION_DRAFT_RETENTION_DAYS', 90)
+    cutoff = timezone.now() - timedelta(days=max_age_days)
+    settled = Payment.objects.filter(tx_ref=OuterRef('payment_tx_ref')).filter(
+        Q(status='success', subscription_updated=True) | Q(status='failed')
+    )
+    return ApplicationDraft.objects.filter(created_at__lt=cutoff).exclude(payment_tx_ref='').filter(Exists(settled))
+
+
+def _archive(rows, archive_dir):
+    path = os.path.join(archive_dir, f"application_drafts-{rows[0]['id']:010d}-{rows[-1]['id']:010d}.ndjson.gz")
+    tmp_path = path + '.tmp'
+    with gzip.open(tmp_path, 'wt', encoding='utf-8') as archive:
+        for row in rows:
+            archive.write(json.dumps(row, separators=(',', ':'), default=str, ensure_ascii=False))
+            archive.write('\n')
+    os.replace(tmp_path, path)
+    return path
+
+
+def purge_drafts(max_age_days=None, chunk_size=None, archive_dir=None, dry_run=False):
+    """
+    Archive and delete settled drafts (see module docstring). `archive_dir`
+    defaults to APPLICATION_DRAFT_ARCHIVE_DIR; pass '' to only delete.
+    Returns (drafts, archive_files).
+    """
+    chunk_size = chunk_size or getattr(settings, 'APPLICATION_DRAFT_PURGE_CHUNK_SIZE', 1000)
+    if archive_dir is None:
+        archive_dir = getattr(settings, 'APPLICATION_DRAFT_ARCHIVE_DIR', '')
+    if archive_dir and not dry_run:
+        os.makedirs(archive_dir, exist_ok=True)
+    drafts = purgeable_drafts(max_age_days)
+
+    purged = 0
+    files = []
+    last_id = 0
+    while True:
+        rows = list(drafts.filter(id__gt=last_id).order_by('id').values(*ARCHIVE_FIELDS)[:chunk_size])
+        if not rows:
+            break
+        last_id = rows[-1]['id']
+        if dry_run:
+            purged += len(rows)
+            continue
+        if archive_dir:
+            files.append(_archive(rows, archive_dir))
+        with transaction.atomic():
+            purged += ApplicationDraft.objects.filter(pk__in=[row['id'] for row in rows]).delete()[0]
+    return purged, files
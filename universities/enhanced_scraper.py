@@ -6,14 +6,20 @@ from urllib.parse import urljoin, urlparse
 from datetime import datetime
 import extruct
 from price_parser import Price
-import pycountry
-import tldextract
-from tenacity import retry, stop_after_attempt, wait_exponential
+from tenacity import retry, retry_if_not_exception_type, stop_after_attempt, wait_exponential
+from .crawl_frontier import CrawlFrontier, FEE_ADMISSION_WEIGHTS
+from .dedup import dedupe_programs, dedupe_scholarships
+from .discovery import discover_pages, robots_cache
+from .extractors import classify_programs, page_signals
+from .fetching import UnsupportedContentError, fetch_capped
+from .geo import country_for_url
 
 class EnhancedUniversityScraper:
     """Enhanced university scraper with improved data extraction patterns"""
     
-    def __init__(self):
+    def __init__(self, snapshot_sink=None):
+        # Optional callable(url, response) that stores raw pages for re-extraction
+        self.snapshot_sink = snapshot_sink
         self.session = requests.Session()
         self.session.headers.update({
             'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
@@ -101,13 +107,30 @@ class EnhancedUniversityScraper:
             'başarı', 'ödül', 'muafiyet', 'indirim'
         ]
 
-    @retry(stop=stop_after_attempt(3), wait=wait_exponential(multiplier=0.5, min=1, max=4))
+    @retry(
+        stop=stop_after_attempt(3), wait=wait_exponential(multiplier=0.5, min=1, max=4),
+        retry=retry_if_not_exception_type(UnsupportedContentError),
+    )
     def fetch_page(self, url):
-        """Fetch page with retry logic"""
-        response = self.session.get(url, timeout=20)
+        """Fetch page with retry logic; streamed and size-capped, HTML (or PDF text) only"""
+        response = fetch_capped(self.session, url)
         response.raise_for_status()
+        if self.snapshot_sink:
+            self.snapshot_sink(url, response)
         return response
 
+    def discover_pages(self, url):
+        """Fee and admission pages listed in the site's sitemaps, best first"""
+        try:
+            return discover_pages(url, self.session, weights=FEE_ADMISSION_WEIGHTS)
+        except Exception as e:
+            print(f"Sitemap discovery failed for {url}: {e}")
+            return []
+
+    def allowed_links(self, links):
+        """Drop subpages that robots.txt disallows"""
+        return [link for link in links if robots_cache.can_fetch(link, self.session)]
+
     def extract_structured_data(self, soup, base_url):
         """Extract structured data from JSON-LD and microdata"""
         html = str(soup)
@@ -323,73 +346,11 @@ class EnhancedUniversityScraper:
                     masters_programs.append(program_obj)
         
         # Remove duplicates and filter quality
-        bachelor_programs = self._deduplicate_programs(bachelor_programs)
-        masters_programs = self._deduplicate_programs(masters_programs)
+        bachelor_programs = dedupe_programs(bachelor_programs)
+        masters_programs = dedupe_programs(masters_programs)
         
         return bachelor_programs[:15], masters_programs[:15]
 
-    def _deduplicate_programs(self, programs):
-        """Remove duplicate programs based on name similarity"""
-        unique_programs = []
-        seen_names = set()
-        
-        for program in programs:
-            name_key = program['program_name'].lower().strip()
-            if name_key not in seen_names:
-                seen_names.add(name_key)
-                unique_programs.append(program)
-        
-        return unique_programs
-
-    def extract_country_from_url(self, url):
-        """Extract country from URL TLD or content"""
-        try:
-            extracted = tldextract.extract(url)
-            domain = extracted.domain.lower()
-            tld = extracted.suffix.split('.')[-1].upper()
-            
-            # Check domain names first
-            if 'toronto' in domain or 'utoronto' in domain:
-                return 'Canada'
-            if 'harvard' in domain or 'mit' in domain or 'stanford' in domain:
-                return 'United States'
-            if 'oxford' in domain or 'cambridge' in domain:
-                return 'United Kingdom'
-            if 'istanbul' in domain or 'itu' in domain or 'bogazici' in domain:
-                return 'Türkiye'
-            
-            # Common academic TLDs
-            tld_country_map = {
-                'EDU': 'United States',
-                'AC': 'United Kingdom', 
-                'UK': 'United Kingdom',
-                'CA': 'Canada',
-                'AU': 'Australia',
-                'DE': 'Germany',
-                'FR': 'France',
-                'NL': 'Netherlands',
-                'SE': 'Sweden',
-                'DK': 'Denmark',
-                'NO': 'Norway',
-                'FI': 'Finland',
-                'TR': 'Türkiye',
-            }
-            
-            if tld in tld_country_map:
-                return tld_country_map[tld]
-            
-            if len(tld) == 2:
-                try:
-                    country = pycountry.countries.get(alpha_2=tld)
-                    return country.name if country else ''
-                except Exception:
-                    pass
-                    
-        except Exception:
-            pass
-        
-        return ''
-
     def find_application_links(self, soup, base_url):
         """Find application and admission links"""
         application_keywords = [
@@ -409,92 +370,147 @@ class EnhancedUniversityScraper:
     def scrape_university(self, url):
         """Main scraping method with enhanced data extraction"""
         try:
+            # Sitemap candidates seed the crawl alongside the page's own links
+            seed_urls = self.discover_pages(url)
+
             # Fetch main page
             response = self.fetch_page(url)
-            soup = BeautifulSoup(response.text, 'html.parser')
-            
-            # Extract structured data
-            structured_data = self.extract_structured_data(soup, url)
-            
-            # Extract basic information
-            name = (
+            main = self.extract_main_page(url, response.text, seed_urls=seed_urls)
+
+            # Crawl additional pages for more data
+            additional_pages = []
+            for link in self.allowed_links(main['links_to_crawl']):
+                try:
+                    page_response = self.fetch_page(link)
+                    additional_pages.append(self.extract_additional_page(link, page_response.text))
+                except Exception as e:
+                    print(f"Failed to crawl additional page {link}: {e}")
+                    continue
+
+            return self.merge_university_data(url, main, additional_pages)
+
+        except Exception as e:
+            raise Exception(f"Failed to scrape {url}: {str(e)}")
+
+    def extract_main_page(self, url, html, seed_urls=()):
+        """
+        Run every extractor over the start page. This is pure CPU work with no
+        network access, so batch scrapers can run it in worker processes.
+        """
+        soup = BeautifulSoup(html, 'html.parser')
+
+        # Extract structured data
+        structured_data = self.extract_structured_data(soup, url)
+
+        # Get page text for analysis
+        page_text = soup.get_text()
+
+        # Extract intakes and deposit info
+        intakes, deposit_info = self.extract_intakes_and_deadlines(page_text)
+
+        # Extract programs
+        bachelor_programs, masters_programs = self.extract_programs(soup, url)
+
+        return {
+            'name': (
                 structured_data.get('name') or
                 self._extract_title(soup) or
                 urlparse(url).netloc
-            )
-            
-            # Extract country and city
-            country = self.extract_country_from_url(url)
-            city = self._extract_city(soup, structured_data)
-            
-            # Get page text for analysis
-            page_text = soup.get_text()
-            
-            # Extract fees
-            fees = self.extract_fees(page_text)
-            
-            # Extract intakes and deposit info
-            intakes, deposit_info = self.extract_intakes_and_deadlines(page_text)
-            
-            # Extract programs
-            bachelor_programs, masters_programs = self.extract_programs(soup, url)
-            
-            # Extract scholarships
-            scholarships = self.extract_scholarships(soup, url)
-            
-            # Find application link
-            application_link = self.find_application_links(soup, url)
-            
-            # Extract description
-            description = self._extract_description(soup)
-            
-            # Crawl additional pages for more data
-            additional_data = self._crawl_additional_pages(soup, url)
-            
-            # Extract housing and visa information
-            housing_info = self._extract_housing_info(soup, page_text)
-            visa_info = self._extract_visa_info(soup, page_text)
-            
-            # Merge additional data
-            if additional_data:
-                fees.update(additional_data.get('fees', {}))
-                intakes.extend(additional_data.get('intakes', []))
-                deposit_info.extend(additional_data.get('deposit_info', []))
-                scholarships.extend(additional_data.get('scholarships', []))
-                bachelor_programs.extend(additional_data.get('bachelor_programs', []))
-                masters_programs.extend(additional_data.get('masters_programs', []))
-            
-            # Compile final data with enhanced fee structure
-            university_data = {
-                'name': name,
-                'country': country,
-                'city': city,
-                'course_offered': '',
-                'tuition_fee_international': f"{fees.get('tuition_international') or 0:.2f}",
-                'tuition_fee': f"{fees.get('tuition_general') or fees.get('tuition_international') or fees.get('tuition_domestic') or 0:.2f}",
-                'application_fee': f"{fees.get('application_fee') or 0:.2f}",
-                'deposit_amount': f"{fees.get('deposit_amount') or 0:.2f}",
-                'deposit_deadlines': deposit_info[:3],
-                'intakes': intakes[:6],
-                'bachelor_programs': bachelor_programs[:25],
-                'masters_programs': masters_programs[:25],
-                'scholarships': scholarships[:15],
-                'housing_info': housing_info,
-                'visa_requirements': visa_info,
-                'university_link': url,
-                'application_link': application_link,
-                'description': description,
-                '_extraction_metadata': {
-                    'extraction_date': datetime.now().isoformat(),
-                    'pages_crawled': 1 + len(additional_data.get('crawled_urls', [])),
-                    'confidence_score': self._calculate_confidence_score(fees, intakes, scholarships, bachelor_programs, masters_programs)
-                }
+            ),
+            'country': country_for_url(url),
+            'city': self._extract_city(soup, structured_data),
+            'fees': self.extract_fees(page_text),
+            'intakes': intakes,
+            'deposit_info': deposit_info,
+            'bachelor_programs': bachelor_programs,
+            'masters_programs': masters_programs,
+            'scholarships': self.extract_scholarships(soup, url),
+            'application_link': self.find_application_links(soup, url),
+            'description': self._extract_description(soup),
+            'housing_info': self._extract_housing_info(soup, page_text),
+            'visa_info': self._extract_visa_info(soup, page_text),
+            'links_to_crawl': self._select_additional_links(soup, url, seed_urls),
+            'signals': page_signals(url, soup),
+        }
+
+    def extract_additional_page(self, url, html):
+        """Extract fees, intakes, scholarships and programs from a crawled subpage."""
+        page_soup = BeautifulSoup(html, 'html.parser')
+        page_text = page_soup.get_text()
+        page_intakes, page_deposits = self.extract_intakes_and_deadlines(page_text)
+        bachelor_progs, masters_progs = self.extract_programs(page_soup, url)
+        return {
+            'url': url,
+            'fees': self.extract_fees(page_text),
+            'intakes': page_intakes,
+            'deposit_info': page_deposits,
+            'scholarships': self.extract_scholarships(page_soup, url),
+            'bachelor_programs': bachelor_progs,
+            'masters_programs': masters_progs,
+            'signals': page_signals(url, page_soup),
+        }
+
+    def merge_university_data(self, url, main, additional_pages):
+        """Combine the start page extraction with the crawled subpages into the final record."""
+        fees = dict(main['fees'])
+        intakes = list(main['intakes'])
+        deposit_info = list(main['deposit_info'])
+        scholarships = list(main['scholarships'])
+        bachelor_programs = list(main['bachelor_programs'])
+        masters_programs = list(main['masters_programs'])
+
+        # Merge additional data
+        for page in additional_pages:
+            fees.update(page['fees'])
+            intakes.extend(page['intakes'])
+            deposit_info.extend(page['deposit_info'])
+            scholarships.extend(page['scholarships'])
+            bachelor_programs.extend(page['bachelor_programs'])
+            masters_programs.extend(page['masters_programs'])
+
+        # Fill whatever the patterns above missed from the fallback extractors
+        signals = [main['signals']] + [page['signals'] for page in additional_pages]
+        country = main['country'] or next((s['country'] for s in signals if s['country']), '') or country_for_url(url)
+        city = main['city'] or next((s['city'] for s in signals if s['city']), '')
+        if not (fees.get('tuition_general') or fees.get('tuition_international') or fees.get('tuition_domestic')):
+            fees['tuition_general'] = max((s['tuition_fee'] for s in signals if s['tuition_fee']), default=None)
+        if not fees.get('application_fee'):
+            fees['application_fee'] = max((s['application_fee'] for s in signals if s['application_fee']), default=None)
+        if not bachelor_programs and not masters_programs:
+            bachelor_programs, masters_programs = classify_programs([t for s in signals for t in s['program_candidates']])
+        if not scholarships:
+            scholarships = [item for s in signals for item in s['scholarships']]
+        # Pages repeat each other's lists; dedupe before the caps below
+        scholarships = dedupe_scholarships(scholarships)
+        bachelor_programs = dedupe_programs(bachelor_programs)
+        masters_programs = dedupe_programs(masters_programs)
+
+        # Compile final data with enhanced fee structure
+        return {
+            'name': main['name'],
+            'country': country,
+            'city': city,
+            'course_offered': '',
+            'tuition_fee_international': f"{fees.get('tuition_international') or 0:.2f}",
+            'tuition_fee': f"{fees.get('tuition_general') or fees.get('tuition_international') or fees.get('tuition_domestic') or 0:.2f}",
+            'application_fee': f"{fees.get('application_fee') or 0:.2f}",
+            'deposit_amount': f"{fees.get('deposit_amount') or 0:.2f}",
+            'deposit_deadlines': deposit_info[:3],
+            'intakes': intakes[:6],
+            'bachelor_programs': bachelor_programs[:25],
+            'masters_programs': masters_programs[:25],
+            'scholarships': scholarships[:15],
+            'housing_info': main['housing_info'],
+            'visa_requirements': main['visa_info'],
+            'university_link': url,
+            'application_link': main['application_link'],
+            'description': main['description'],
+            '_extraction_metadata': {
+                'extraction_date': datetime.now().isoformat(),
+                'pages_crawled': 1 + len(additional_pages),
+                'confidence_score': self._calculate_confidence_score(fees, intakes, scholarships, bachelor_programs, masters_programs)
             }
-            
-            return university_data
-            
-        except Exception as e:
-            raise Exception(f"Failed to scrape {url}: {str(e)}")
+        }
 
     def _extract_title(self, soup):
         """Extract university name from various sources"""
@@ -571,76 +587,12 @@ class EnhancedUniversityScraper:
         
         return ''
 
-    def _crawl_additional_pages(self, soup, base_url):
-        """Crawl additional relevant pages for more data"""
-        additional_data = {
-            'fees': {},
-            'intakes': [],
-            'deposit_info': [],
-            'scholarships': [],
-            'bachelor_programs': [],
-            'masters_programs': [],
-            'crawled_urls': []
-        }
-        
-        # Find relevant links to crawl with more specific patterns
-        relevant_keywords = [
-            'tuition', 'fees', 'cost', 'admission', 'admissions', 'apply',
-            'international', 'domestic', 'canadian', 'deposit', 'deadline',
-            'scholarship', 'financial-aid', 'housing', 'residence', 'visa'
-        ]
-        
-        links_to_crawl = []
-        priority_links = []
-        
-        for link in soup.find_all('a', href=True):
-            href = link.get('href', '').lower()
-            text = link.get_text(strip=True).lower()
-            full_url = urljoin(base_url, link['href'])
-            
-            # Prioritize fee and admission pages
-            if any(keyword in href or keyword in text for keyword in ['tuition', 'fees', 'cost', 'admission']):
-                if full_url not in priority_links:
-                    priority_links.append(full_url)
-            elif any(keyword in href or keyword in text for keyword in relevant_keywords):
-                if full_url not in links_to_crawl:
-                    links_to_crawl.append(full_url)
-        
-        # Combine priority links first, then others
-        links_to_crawl = priority_links[:3] + links_to_crawl[:5]
-        
-        # Crawl additional pages
-        for url in links_to_crawl:
-            try:
-                response = self.fetch_page(url)
-                page_soup = BeautifulSoup(response.text, 'html.parser')
-                page_text = page_soup.get_text()
-                
-                # Extract additional fees
-                page_fees = self.extract_fees(page_text)
-                additional_data['fees'].update(page_fees)
-                
-                # Extract additional intakes
-                page_intakes, page_deposits = self.extract_intakes_and_deadlines(page_text)
-                additional_data['intakes'].extend(page_intakes)
-                additional_data.setdefault('deposit_info', []).extend(page_deposits)
-                
-                # Extract additional scholarships
-                page_scholarships = self.extract_scholarships(page_soup, url)
-                additional_data['scholarships'].extend(page_scholarships)
-                
-                # Extract additional programs
-                bachelor_progs, masters_progs = self.extract_programs(page_soup, url)
-                additional_data['bachelor_programs'].extend(bachelor_progs)
-                additional_data['masters_programs'].extend(masters_progs)
-                
-                additional_data['crawled_urls'].append(url)
-                
-            except Exception as e:
-                print(f"Failed to crawl additional page {url}: {e}")
-                continue
-        
-        return additional_data
+    def _select_additional_links(self, soup, base_url, seed_urls=()):
+        """Pick the relevant subpages to crawl, fee and admission pages first"""
+        frontier = CrawlFrontier(base_url, weights=FEE_ADMISSION_WEIGHTS, max_pages=8, max_depth=1)
+        frontier.add_urls(seed_urls)
+        frontier.add_links(soup, base_url)
+        return frontier.take()
 
     def _extract_housing_info(self, soup, text):
         """Extract campus housing and accommodation information"""
@@ -749,4 +701,24 @@ class EnhancedUniversityScraper:
         if scholarships:
             score += min(len(scholarships) * 2, 15)
         
-        return min(score, 100)
\ No newline at end of file
+        return min(score, 100)
+
+
+# Per-process scraper used by the module-level helpers below. Batch commands
+# hand these to a ProcessPoolExecutor, so they must be importable and picklable.
+_worker_scraper = None
+
+
+def _get_worker_scraper():
+    global _worker_scraper
+    if _worker_scraper is None:
+        _worker_scraper = EnhancedUniversityScraper()
+    return _worker_scraper
+
+
+def extract_main_page(url, html, seed_urls=()):
+    return _get_worker_scraper().extract_main_page(url, html, seed_urls)
+
+
+def extract_additional_page(url, html):
+    return _get_worker_scraper().extract_additional_page(url, html)
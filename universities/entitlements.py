@@ -0,0 +1,102 @@
+"""
+Subscription entitlement carried in the JWT access token.
+
+MyTokenObtainPairSerializer.get_token() adds the user's subscription status
+and end date (the `subscription` claim, plus `is_superuser`) to every token
+it mints. HasSubscriptionClaim then gates a request from the signed token
+and one cache read, so a view using JWTStatelessUserAuthentication normally
+makes no auth-related query at all.
+
+Claims are a snapshot. When a subscription changes (a payment is applied, an
+admin edits the dashboard) the new state is published to the cache for
+ACCESS_TOKEN_LIFETIME: every dashboard save does so through a post_save
+receiver, and code changing dashboards with `.update()` calls publish_many()
+(the expiry sweep needn't: the end date in the claim already stops a lapsed
+subscription). A token whose claim matches the published state is trusted
+as is. When the entry is missing or disagrees, the dashboard row is read
+(and a missing entry republished): a token whose claim differs from it is
+rejected with 401 `entitlement_changed`, and the client then gets a token
+with current claims from token/refresh/. Once the lifetime has passed, every
+token minted before the change has expired, so the entry is no longer
+needed. Payments are applied in the Celery worker, so the cache must be
+shared by every process (CACHE_REDIS_URL; system check universities.E001).
+"""
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.utils import timezone
+from rest_framework_simplejwt.settings import api_settings
+
+CLAIM = 'subscription'
+
+
+def _key(user_id):
+    return f'entitlement:{user_id}'
+
+
+def _ttl():
+    return int(settings.SIMPLE_JWT['ACCESS_TOKEN_LIFETIME'].total_seconds())
+
+
+def _claim(status, end_date):
+    return {'status': status, 'end_date': end_date.isoformat() if end_date else None}
+
+
+def add_claims(token, user):
+    """Put `user`'s current entitlement into `token` (and publish it, which heals any missed publish)."""
+    from .models import UserDashboard
+
+    try:
+        dashboard = user.dashboard
+    except UserDashboard.DoesNotExist:
+        dashboard, _ = UserDashboard.objects.get_or_create(user=user)
+    token[CLAIM] = _claim(dashboard.subscription_status, dashboard.subscription_end_date)
+    token['is_superuser'] = user.is_superuser
+    cache.set(_key(user.pk), token[CLAIM], _ttl())
+    return token
+
+
+def publish(dashboard):
+    """Make `dashboard`'s subscription the current entitlement once the transaction commits."""
+    key, claim = _key(dashboard.user_id), _claim(dashboard.subscription_status, dashboard.subscription_end_date)
+    transaction.on_commit(lambda: cache.set(key, claim, _ttl()))
+
+
+def publish_many(dashboards):
+    """publish() for a UserDashboard queryset, after changing it with `.update()`."""
+    rows = dashboards.values_list('user_id', 'subscription_status', 'subscription_end_date')
+    claims = {_key(user_id): _claim(status, end_date) for user_id, status, end_date in rows.iterator()}
+    if claims:
+        transaction.on_commit(lambda: cache.set_many(claims, _ttl()))
+
+
+def _stored_claim(user_id):
+    from .models import UserDashboard
+
+    row = UserDashboard.objects.filter(user_id=user_id).values_list('subscription_status', 'subscription_end_date').first()
+    return _claim(*row) if row else _claim('none', None)
+
+
+def is_current(token):
+    """False when the token predates entitlement claims or the subscription has changed since it was minted."""
+    claim = token.get(CLAIM)
+    if claim is None:
+        return False
+    user_id = token[api_settings.USER_ID_CLAIM]
+    published = cache.get(_key(user_id))
+    if published == claim:
+        return True
+    stored = _stored_claim(user_id)
+    if published is None:
+        # add(), not set(): a publish racing with this read wins
+        cache.add(_key(user_id), stored, _ttl())
+    return stored == claim
+
+
+def is_entitled(token):
+    """Same rule as HasActiveSubscription, read from the claims."""
+    if token.get('is_staff') or token.get('is_superuser'):
+        return True
+    claim = token.get(CLAIM) or {}
+    end_date = claim.get('end_date')
+    return claim.get('status') == 'active' and bool(end_date) and end_date >= timezone.now().date().isoformat()
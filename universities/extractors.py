@@ -0,0 +1,164 @@
+"""
+Fallback field extractors for scraped university pages.
+
+These heuristics complement EnhancedUniversityScraper: they read schema.org
+JSON-LD, pick currency amounts near fee keywords, collect program and
+scholarship anchors. The scrape pipeline
+uses them to fill fields the scraper's own patterns left empty. The module
+has no Django dependency so it can run in extraction worker processes.
+"""
+import re
+from urllib.parse import urljoin, urlparse
+
+from price_parser import Price
+try:
+    import extruct
+except ImportError:
+    extruct = None
+
+from .geo import country_name
+
+PROGRAM_ANCHOR_KEYWORDS = ['program', 'degree', 'major', 'bachelor', 'master', 'msc', 'ba ', 'bs ', 'ma ', 'ms ']
+
+
+def resolve_official_url(start_url, soup):
+    """
+    Attempt to find an external 'official website' link on aggregator pages and return it.
+    Currently supports mastersportal/bachelorsportal/phdportal pages heuristically.
+    """
+    try:
+        host = urlparse(start_url).netloc.lower()
+    except Exception:
+        return None
+
+    aggregators = ['mastersportal.com', 'bachelorsportal.com', 'phdportal.com', 'shortcoursesportal.com']
+    if any(dom in host for dom in aggregators):
+        for a in soup.find_all('a', href=True):
+            text = (a.get_text() or '').strip().lower()
+            href = a['href']
+            full = urljoin(start_url, href)
+            try:
+                dom = urlparse(full).netloc.lower()
+            except Exception:
+                continue
+            # pick first external link that looks like a website/official link
+            if dom and not any(agg in dom for agg in aggregators):
+                if 'website' in text or 'official' in text or 'visit' in text:
+                    return full
+    return None
+
+
+def parse_json_ld(soup, base_url=None):
+    out = {}
+    html = str(soup)
+    try:
+        if extruct is None:
+            data = []
+        else:
+            data = extruct.extract(html, base_url=base_url or "", syntaxes=["json-ld"], uniform=True).get("json-ld", [])
+    except Exception:
+        data = []
+    for obj in data:
+        t = obj.get('@type')
+        types = [t] if isinstance(t, str) else (t or [])
+        types = [x.lower() for x in types if isinstance(x, str)]
+        if any(x in types for x in ['collegeoruniversity', 'educationalorganization', 'organization']):
+            out['name'] = obj.get('name') or out.get('name')
+            addr = obj.get('address')
+            if isinstance(addr, dict):
+                out['address'] = {
+                    'addressCountry': addr.get('addressCountry'),
+                    'addressLocality': addr.get('addressLocality')
+                }
+            elif isinstance(addr, str):
+                out['address'] = {'addressLocality': addr}
+    return out
+
+
+def extract_currency_number(text, contexts, min_value=0, max_value=999999):
+    best = None
+    for ctx in contexts:
+        for m in re.finditer(rf"{re.escape(ctx)}(.{{0,180}})", text, flags=re.IGNORECASE):
+            snippet = m.group(1)
+            # Try price-parser first
+            try:
+                p = Price.fromstring(snippet)
+                if p and p.amount_float:
+                    val = float(p.amount_float)
+                    if min_value <= val <= max_value:
+                        best = val if (best is None or val > best) else best
+                        continue
+            except Exception:
+                pass
+            # Fallback regex
+            for n in re.finditer(r"(?:\$|usd|us\$|eur|€|gbp|£)?\s*([0-9]{1,3}(?:,[0-9]{3})+|[0-9]{4,})(?:\.[0-9]{2})?", snippet, flags=re.IGNORECASE):
+                try:
+                    val = float(n.group(1).replace(',', ''))
+                except Exception:
+                    continue
+                if min_value <= val <= max_value:
+                    best = val if (best is None or val > best) else best
+    return best
+
+
+def classify_programs(names):
+    bachelors = []
+    masters = []
+    for t in names:
+        low = t.lower()
+        entry = {
+            'program_name': t,
+            'required_documents': [],
+            'language': '',
+            'duration_years': None,
+            'notes': ''
+        }
+        if any(k in low for k in ['bachelor', ' bsc', ' ba ', ' beng']):
+            bachelors.append(entry)
+        elif any(k in low for k in ['master', ' msc', ' ms ', ' ma ', ' meng']):
+            m = entry.copy()
+            m['thesis_required'] = True
+            masters.append(m)
+    return bachelors, masters
+
+
+def page_signals(url, soup):
+    """
+    Fallback values found on one page: JSON-LD name/address, fees near fee
+    keywords, program anchor texts and scholarship anchors.
+    """
+    ld = parse_json_ld(soup, base_url=url)
+    address = ld.get('address') or {}
+    # schema.org allows a Country object or an ISO code here
+    country = address.get('addressCountry') or ''
+    if isinstance(country, dict):
+        country = country.get('name') or ''
+    if isinstance(country, str) and len(country.strip()) == 2:
+        country = country_name(country) or country
+    lowered = soup.get_text(' ', strip=True).lower()
+
+    scholarships = []
+    if any(k in url.lower() for k in ['scholar', 'financial', 'burs']):
+        for a in soup.find_all('a', href=True):
+            t = (a.get_text() or '').strip()
+            if len(t) > 3 and ('scholar' in t.lower() or 'grant' in t.lower() or 'burs' in t.lower()):
+                scholarships.append({'name': t, 'coverage': '', 'eligibility': '', 'link': urljoin(url, a['href'])})
+
+    program_candidates = []
+    for a in soup.find_all('a', href=True):
+        t = (a.get_text() or '').strip()
+        if len(t) < 4:
+            continue
+        href = a['href'].lower()
+        if any(k in href or k in t.lower() for k in PROGRAM_ANCHOR_KEYWORDS):
+            program_candidates.append(t)
+
+    return {
+        'name': ld.get('name') or '',
+        'country': country,
+        'city': address.get('addressLocality') or '',
+        'tuition_fee': extract_currency_number(lowered, contexts=['tuition fee', 'tuition', 'fee'], min_value=500, max_value=100000),
+        'application_fee': extract_currency_number(lowered, contexts=['application fee', 'application fees'], min_value=0, max_value=500),
+        'program_candidates': program_candidates,
+        'scholarships': scholarships,
+    }
@@ -0,0 +1,234 @@
+"""
+Size-capped streaming page fetches for the scrapers.
+
+Pages are requested with `stream=True` so the headers can be checked before
+any of the body is read. HTML (and plain text) is read up to a byte cap and
+anything past it is dropped, which keeps endless or huge pages from blowing up
+worker memory. Other content types are rejected with UnsupportedContentError
+before their body is downloaded, except PDFs when text extraction is enabled
+and the optional `pypdf` package is installed: their text is wrapped in a
+minimal HTML document so the extractors can treat them like any other page.
+
+afetch_capped() is the same fetch over an httpx.AsyncClient, for the async
+scrape path.
+
+Limits come from Django settings when Django is configured (see
+SCRAPE_MAX_HTML_BYTES, SCRAPE_MAX_PDF_BYTES and SCRAPE_EXTRACT_PDF_TEXT) and
+fall back to the defaults below otherwise, so the standalone scraper keeps
+working.
+"""
+import asyncio
+import html
+import io
+import logging
+import re
+from contextlib import nullcontext
+
+import httpx
+import requests
+
+try:
+    from pypdf import PdfReader
+except ImportError:
+    PdfReader = None
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_MAX_HTML_BYTES = 5 * 1024 * 1024
+DEFAULT_MAX_PDF_BYTES = 20 * 1024 * 1024
+CHUNK_SIZE = 64 * 1024
+
+HTML_TYPES = ('text/html', 'application/xhtml+xml', 'text/plain')
+PDF_TYPE = 'application/pdf'
+META_CHARSET = re.compile(rb"""<meta[^>]+charset=["']?([a-zA-Z0-9_-]+)""", re.I)
+# Upper bound on PDF pages turned into text; prospectuses run to hundreds
+MAX_PDF_PAGES = 50
+
+
+class UnsupportedContentError(requests.RequestException):
+    """The response is not a page we can extract from, or is too large to try."""
+
+
+def _setting(name, default):
+    try:
+        from django.conf import settings
+        if settings.configured:
+            return getattr(settings, name, default)
+    except ImportError:
+        pass
+    return default
+
+
+def _read_capped(resp, max_bytes):
+    """Read at most `max_bytes` of the (decoded) body. Returns (body, truncated)."""
+    chunks = []
+    size = 0
+    for chunk in resp.iter_content(CHUNK_SIZE):
+        chunks.append(chunk)
+        size += len(chunk)
+        if size > max_bytes:
+            return b''.join(chunks)[:max_bytes], True
+    return b''.join(chunks), False
+
+
+def sniff_encoding(body):
+    """
+    Charset for an HTML body served without one in Content-Type, where
+    requests would otherwise assume ISO-8859-1: the <meta> declaration if
+    present, else UTF-8 when the bytes decode as such.
+    """
+    match = META_CHARSET.search(body[:4096])
+    if match:
+        return match.group(1).decode('ascii', 'ignore')
+    try:
+        body.decode('utf-8')
+        return 'utf-8'
+    except UnicodeDecodeError as e:
+        # A cut-off multi-byte sequence at the byte cap is still UTF-8
+        if e.start >= len(body) - 3:
+            return 'utf-8'
+    return 'iso-8859-1'
+
+
+def pdf_to_html(data):
+    """Text of a PDF as a bare HTML document, one paragraph per page."""
+    reader = PdfReader(io.BytesIO(data))
+    paragraphs = []
+    for page in reader.pages[:MAX_PDF_PAGES]:
+        text = (page.extract_text() or '').strip()
+        if text:
+            paragraphs.append(f'<p>{html.escape(text)}</p>')
+    return '<html><body>' + '\n'.join(paragraphs) + '</body></html>'
+
+
+def _content_type(headers):
+    return headers.get('Content-Type', '').split(';')[0].strip().lower()
+
+
+def _content_length(headers):
+    try:
+        return int(headers.get('Content-Length') or 0)
+    except ValueError:
+        return 0
+
+
+def uncached(session):
+    """
+    Context manager bypassing requests_cache for `session`. A cached session
+    (install_cache patches every session) reads the whole body to store it,
+    which defeats stream=True.
+    """
+    return session.cache_disabled() if hasattr(session, 'cache_disabled') else nullcontext()
+
+
+def fetch_capped(session, url, timeout=20, max_bytes=None, extract_pdf=None, **kwargs):
+    """
+    GET `url` through `session` without ever holding more than the configured
+    cap in memory. Returns a regular requests.Response whose body is already
+    read; `response.truncated` tells whether the cap was hit. Error statuses
+    are returned as-is for the caller's raise_for_status().
+    """
+    max_bytes = max_bytes or _setting('SCRAPE_MAX_HTML_BYTES', DEFAULT_MAX_HTML_BYTES)
+    if extract_pdf is None:
+        extract_pdf = _setting('SCRAPE_EXTRACT_PDF_TEXT', True)
+
+    with uncached(session):
+        resp = session.get(url, timeout=timeout, stream=True, **kwargs)
+
+    try:
+        content_type = _content_type(resp.headers)
+        length = _content_length(resp.headers)
+        truncated = False
+
+        if resp.status_code >= 400 or resp.status_code == 304:
+            body = b''
+        elif not content_type or content_type in HTML_TYPES:
+            body, truncated = _read_capped(resp, max_bytes)
+            if truncated:
+                logger.info(f"Truncated {url} at {max_bytes} bytes")
+            if 'charset' not in resp.headers.get('Content-Type', '').lower():
+                resp.encoding = sniff_encoding(body)
+        elif content_type == PDF_TYPE and extract_pdf and PdfReader is not None:
+            max_pdf = _setting('SCRAPE_MAX_PDF_BYTES', DEFAULT_MAX_PDF_BYTES)
+            if length > max_pdf:
+                raise UnsupportedContentError(f'PDF of {length} bytes exceeds {max_pdf} byte cap: {url}', response=resp)
+            data, too_big = _read_capped(resp, max_pdf)
+            if too_big:
+                raise UnsupportedContentError(f'PDF exceeds {max_pdf} byte cap: {url}', response=resp)
+            try:
+                body = pdf_to_html(data).encode('utf-8')
+            except Exception as e:
+                raise UnsupportedContentError(f'Could not read PDF {url}: {e}', response=resp) from e
+            resp.headers['Content-Type'] = 'text/html; charset=utf-8'
+            resp.encoding = 'utf-8'
+        else:
+            raise UnsupportedContentError(f'Unsupported content type {content_type or "unknown"}: {url}', response=resp)
+    finally:
+        resp.close()
+
+    resp._content = body
+    resp._content_consumed = True
+    resp.truncated = truncated
+    return resp
+
+
+async def _aread_capped(resp, max_bytes):
+    chunks = []
+    size = 0
+    async for chunk in resp.aiter_bytes(CHUNK_SIZE):
+        chunks.append(chunk)
+        size += len(chunk)
+        if size > max_bytes:
+            return b''.join(chunks)[:max_bytes], True
+    return b''.join(chunks), False
+
+
+async def afetch_capped(client, url, timeout=20, max_bytes=None, extract_pdf=None, **kwargs):
+    """
+    fetch_capped() over an httpx.AsyncClient. Returns an httpx.Response
+    holding the (capped) body, with `truncated` set; error statuses are
+    returned for the caller's raise_for_status(). PDF text extraction runs
+    in a worker thread.
+    """
+    max_bytes = max_bytes or _setting('SCRAPE_MAX_HTML_BYTES', DEFAULT_MAX_HTML_BYTES)
+    if extract_pdf is None:
+        extract_pdf = _setting('SCRAPE_EXTRACT_PDF_TEXT', True)
+
+    async with client.stream('GET', url, timeout=timeout, **kwargs) as resp:
+        headers = httpx.Headers(resp.headers)
+        content_type = _content_type(headers)
+        length = _content_length(headers)
+        truncated = False
+        encoding = None
+
+        if resp.status_code >= 400 or resp.status_code == 304:
+            body = b''
+        elif not content_type or content_type in HTML_TYPES:
+            body, truncated = await _aread_capped(resp, max_bytes)
+            if truncated:
+                logger.info(f"Truncated {url} at {max_bytes} bytes")
+            if 'charset' not in headers.get('Content-Type', '').lower():
+                encoding = sniff_encoding(body)
+        elif content_type == PDF_TYPE and extract_pdf and PdfReader is not None:
+            max_pdf = _setting('SCRAPE_MAX_PDF_BYTES', DEFAULT_MAX_PDF_BYTES)
+            if length > max_pdf:
+                raise UnsupportedContentError(f'PDF of {length} bytes exceeds {max_pdf} byte cap: {url}')
+            data, too_big = await _aread_capped(resp, max_pdf)
+            if too_big:
+                raise UnsupportedContentError(f'PDF exceeds {max_pdf} byte cap: {url}')
+            try:
+                body = (await asyncio.to_thread(pdf_to_html, data)).encode('utf-8')
+            except Exception as e:
+                raise UnsupportedContentError(f'Could not read PDF {url}: {e}') from e
+            headers['Content-Type'] = 'text/html; charset=utf-8'
+        else:
+            raise UnsupportedContentError(f'Unsupported content type {content_type or "unknown"}: {url}')
+
+    # The body was decoded while streaming; don't let the new response decode it again
+    headers.pop('Content-Encoding', None)
+    headers.pop('Content-Length', None)
+    capped = httpx.Response(resp.status_code, headers=headers, content=body, request=resp.request)
+    if encoding:
+        capped.encoding = encoding
+    capped.truncated = truncated
+    return capped
@@ -0,0 +1,56 @@
+"""
+Country resolution for university domains, fully offline.
+
+The module-level TLDExtract instance is built with no suffix-list URLs and no
+cache directory, so it only ever reads the public suffix snapshot bundled
+with the pinned tldextract release: no network access and no disk cache,
+including on first use. Country names come from a table built once from
+pycountry at import, and host lookups are memoized, so resolving the same
+domains over and over during a crawl costs a dict lookup.
+
+No Django dependency; the extraction worker processes use it.
+"""
+from functools import lru_cache
+from urllib.parse import urlsplit
+
+import pycountry
+import tldextract
+
+_extract = tldextract.TLDExtract(cache_dir=None, suffix_list_urls=(), fallback_to_snapshot=True)
+
+# ISO 3166 alpha-2 code -> country name
+ALPHA2_NAMES = {country.alpha_2: country.name for country in pycountry.countries}
+# The UK's ccTLD is not its ISO code
+ALPHA2_NAMES['UK'] = ALPHA2_NAMES['GB']
+
+# Generic suffixes that only national institutions can register
+GENERIC_SUFFIX_COUNTRIES = {'edu': 'United States', 'gov': 'United States', 'mil': 'United States'}
+
+
+def country_name(alpha_2):
+    """`tr` -> 'Türkiye'; '' for unknown codes."""
+    return ALPHA2_NAMES.get((alpha_2 or '').strip().upper(), '')
+
+
+def _hostname(url_or_host):
+    if '//' not in url_or_host:
+        url_or_host = '//' + url_or_host
+    return (urlsplit(url_or_host).hostname or '').rstrip('.')
+
+
+@lru_cache(maxsize=8192)
+def country_for_host(host):
+    """`www.ox.ac.uk` -> 'United Kingdom'; '' when the suffix doesn't tell."""
+    suffix = _extract(host).suffix
+    if not suffix:
+        return ''
+    last = suffix.rsplit('.', 1)[-1]
+    if last in GENERIC_SUFFIX_COUNTRIES:
+        return GENERIC_SUFFIX_COUNTRIES[last]
+    return country_name(last) if len(last) == 2 else ''
+
+
+def country_for_url(url_or_host):
+    """Country implied by the domain of a URL (or bare host name)."""
+    host = _hostname(url_or_host or '').lower()
+    return country_for_host(host) if host else ''
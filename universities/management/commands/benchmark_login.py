@@ -0,0 +1,21 @@
+from django.core.management.base import BaseCommand
+from universities.benchmarks.login import run_login_benchmark
+
+
+class Command(BaseCommand):
+    help = 'Measure the queries and time per login through the token endpoint, using a throwaway user'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rounds', type=int, default=20, help='Repeated logins after the first (default: 20)')
+        parser.add_argument('--by', choices=['email', 'username'], default='email', help='Log in with the email or the username (default: email)')
+        parser.add_argument('--show-sql', action='store_true', help='Print the queries of one login')
+
+    def handle(self, *args, **options):
+        results = run_login_benchmark(rounds=options['rounds'], by=options['by'])
+        for label, m in results.items():
+            self.stdout.write(self.style.MIGRATE_HEADING(f"{label} login{'s' if m['logins'] > 1 else ''} ({m['logins']})"))
+            self.stdout.write(f"  queries/login     {m['queries_per_login']}")
+            self.stdout.write(f"  ms/login          {m['ms_per_login']}")
+            if options['show_sql']:
+                for sql in m['sql']:
+                    self.stdout.write(f'    {sql}')
@@ -0,0 +1,58 @@
+from django.core.management.base import BaseCommand, CommandError
+from universities.benchmarks.runner import (
+    BASELINE_PATH, DEFAULT_TOLERANCE, PIPELINES, compare_to_baseline, load_baseline, run_benchmark, save_baseline,
+)
+
+
+class Command(BaseCommand):
+    help = 'Benchmark the scrape pipelines offline against saved university pages served by a local stand-in server'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--pipeline', choices=sorted(PIPELINES) + ['all'], default='all', help='Pipeline to benchmark (default: all)')
+        parser.add_argument('--latency-ms', type=int, default=20, help='Simulated server latency per request (default: 20)')
+        parser.add_argument('--rounds', type=int, default=10, help='Measured passes over the fixture sites (default: 10)')
+        parser.add_argument('--baseline', type=str, default=BASELINE_PATH, help='Baseline JSON to compare against')
+        parser.add_argument('--tolerance', type=float, default=DEFAULT_TOLERANCE, help='Allowed relative slack before a metric regresses (default: 0.2)')
+        parser.add_argument('--update-baseline', action='store_true', help='Write the results as the new baseline')
+        parser.add_argument('--fail-on-regression', action='store_true', help='Exit with an error when a metric regresses')
+
+    def handle(self, *args, **options):
+        pipelines = sorted(PIPELINES) if options['pipeline'] == 'all' else [options['pipeline']]
+        results = run_benchmark(pipelines, latency_ms=options['latency_ms'], rounds=options['rounds'])
+
+        for name, m in results.items():
+            self.stdout.write(self.style.MIGRATE_HEADING(f'{name}'))
+            self.stdout.write(f"  sites x rounds    {m['sites']} x {m['rounds']} ({m['pages']} pages)")
+            self.stdout.write(f"  pages/sec         {m['pages_per_sec']}")
+            self.stdout.write(f"  CPU ms/page       {m['cpu_ms_per_page']}")
+            self.stdout.write(f"  peak memory       {m['peak_memory_kb']} KB")
+            self.stdout.write(f"  field coverage    {m['field_coverage']:.1%}")
+            for error in m['errors']:
+                self.stdout.write(self.style.WARNING(f'  ✗ {error}'))
+
+        if options['update_baseline']:
+            save_baseline(results, options['latency_ms'], path=options['baseline'])
+            self.stdout.write(self.style.SUCCESS(f"Baseline written to {options['baseline']}"))
+            return
+
+        baseline = load_baseline(options['baseline'])
+        if not baseline:
+            self.stdout.write(self.style.WARNING('No baseline found; run with --update-baseline to create one.'))
+            return
+        if baseline.get('latency_ms') != options['latency_ms']:
+            self.stdout.write(self.style.WARNING(
+                f"Baseline was recorded with --latency-ms {baseline.get('latency_ms')}; throughput is not comparable."
+            ))
+        recorded = baseline.get('recorded')
+        if recorded:
+            self.stdout.write(f"Baseline: {recorded['command']} on {recorded['date']}, Python {recorded['python']}, {recorded['platform']}")
+        regressions, notes = compare_to_baseline(results, baseline, tolerance=options['tolerance'])
+        for line in notes:
+            self.stdout.write(self.style.WARNING(f'  {line} (machine-dependent, not a regression)'))
+        if not regressions:
+            self.stdout.write(self.style.SUCCESS('No regressions against the baseline.'))
+            return
+        for line in regressions:
+            self.stdout.write(self.style.ERROR(f'  {line}'))
+        if options['fail_on_regression']:
+            raise CommandError(f'{len(regressions)} benchmark regression(s)')
@@ -0,0 +1,67 @@
+import time
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from universities.dedup import DEFAULT_THRESHOLD, dedupe_programs, dedupe_scholarships
+from universities.models import University
+
+LIST_FIELDS = ['bachelor_programs', 'masters_programs', 'scholarships']
+
+
+class Command(BaseCommand):
+    help = 'Remove near-duplicate programs and scholarships from the stored University lists'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--country', type=str, help='Only universities in this country')
+        parser.add_argument('--threshold', type=int, default=DEFAULT_THRESHOLD,
+                            help=f'Name similarity (0-100) above which entries are merged (default: {DEFAULT_THRESHOLD})')
+        parser.add_argument('--chunk-size', type=int, default=500, help='Rows per read and bulk update (default: 500)')
+        parser.add_argument('--dry-run', action='store_true', help='Report what would change without saving')
+
+    def handle(self, *args, **options):
+        threshold = options['threshold']
+        chunk_size = options['chunk_size']
+        queryset = University.objects.only('id', *LIST_FIELDS).order_by('id')
+        if options['country']:
+            queryset = queryset.filter(country__iexact=options['country'])
+
+        started = time.time()
+        scanned = 0
+        removed = {field: 0 for field in LIST_FIELDS}
+        updated = 0
+        last_id = 0
+        # Keyset pagination: each chunk is read and written before the next
+        # query, so no cursor is held open across the updates.
+        while True:
+            chunk = list(queryset.filter(id__gt=last_id)[:chunk_size])
+            if not chunk:
+                break
+            last_id = chunk[-1].id
+            scanned += len(chunk)
+            changed = []
+            for uni in chunk:
+                dirty = False
+                for field in LIST_FIELDS:
+                    items = getattr(uni, field) or []
+                    if not isinstance(items, list) or len(items) < 2:
+                        continue
+                    dedupe = dedupe_scholarships if field == 'scholarships' else dedupe_programs
+                    cleaned = dedupe(items, threshold=threshold)
+                    if len(cleaned) < len(items):
+                        removed[field] += len(items) - len(cleaned)
+                        setattr(uni, field, cleaned)
+                        dirty = True
+                if dirty:
+                    changed.append(uni)
+            updated += self._save(changed, options['dry_run'])
+
+        summary = (
+            f"{'Would update' if options['dry_run'] else 'Updated'} {updated} of {scanned} universities in {time.time() - started:.1f}s; removed "
+            + ', '.join(f'{count} {field}' for field, count in removed.items())
+        )
+        self.stdout.write(self.style.SUCCESS(summary))
+
+    def _save(self, universities, dry_run):
+        if universities and not dry_run:
+            with transaction.atomic():
+                University.objects.bulk_update(universities, LIST_FIELDS)
+        return len(universities)
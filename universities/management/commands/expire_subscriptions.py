@@ -0,0 +1,15 @@
+from django.core.management.base import BaseCommand
+from universities.subscriptions import expire_lapsed, queue_renewal_reminders
+
+
+class Command(BaseCommand):
+    help = 'Mark subscriptions past their end date as expired, optionally queueing renewal reminders'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--reminders', action='store_true', help='Also queue the renewal reminders due today')
+
+    def handle(self, *args, **options):
+        self.stdout.write(self.style.SUCCESS(f'Expired {expire_lapsed()} subscriptions'))
+        if options['reminders']:
+            users, batches = queue_renewal_reminders()
+            self.stdout.write(self.style.SUCCESS(f'Queued renewal reminders for {users} subscriptions in {batches} batches'))
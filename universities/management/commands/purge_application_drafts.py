@@ -0,0 +1,26 @@
+from django.core.management.base import BaseCommand
+from universities.draft_retention import purge_drafts
+
+
+class Command(BaseCommand):
+    help = 'Archive and delete application drafts whose payment has been processed'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--days', type=int, help='Minimum draft age (default: APPLICATION_DRAFT_RETENTION_DAYS)')
+        parser.add_argument('--chunk-size', type=int, help='Drafts archived and deleted per transaction')
+        parser.add_argument('--no-archive', action='store_true', help='Delete without writing archive files')
+        parser.add_argument('--dry-run', action='store_true', help='Only count the drafts that would be purged')
+
+    def handle(self, *args, **options):
+        drafts, files = purge_drafts(
+            max_age_days=options['days'],
+            chunk_size=options['chunk_size'],
+            archive_dir='' if options['no_archive'] else None,
+            dry_run=options['dry_run'],
+        )
+        if options['dry_run']:
+            self.stdout.write(f'{drafts} application drafts would be purged')
+            return
+        for path in files:
+            self.stdout.write(f'  archived {path}')
+        self.stdout.write(self.style.SUCCESS(f'Purged {drafts} application drafts'))
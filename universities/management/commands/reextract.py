@@ -0,0 +1,71 @@
+import os
+import sys
+import time
+from django.core.management.base import BaseCommand, CommandError
+from universities.batch_scrape import NdjsonWriter, UniversityUpserter
+from universities.models import PageSnapshot, University
+from universities.pipeline import ScrapePipeline
+from universities.snapshots import load_html
+
+
+class Command(BaseCommand):
+    help = 'Re-run university extraction over stored page snapshots, without any network access'
+
+    def add_arguments(self, parser):
+        source = parser.add_mutually_exclusive_group(required=True)
+        source.add_argument('--file', type=str, help='Text file with one start URL per line')
+        source.add_argument('--from-db', action='store_true', help='Every University.university_link that has a snapshot')
+        parser.add_argument('--country', type=str, help='Country filter for --from-db')
+        parser.add_argument('--limit', type=int, default=0, help='Stop after this many URLs (0 = no limit)')
+        output = parser.add_mutually_exclusive_group(required=True)
+        output.add_argument('--output', type=str, help="NDJSON output path, or '-' for stdout")
+        output.add_argument('--write-db', action='store_true', help='Upsert results into University by university_link')
+        parser.add_argument('--io-workers', type=int, default=4, help='Concurrent snapshot reads (default: 4)')
+        parser.add_argument('--cpu-workers', type=int, default=os.cpu_count() or 1, help='Extraction processes (default: number of cores)')
+        parser.add_argument('--chunk-size', type=int, default=500, help='Rows per database upsert (default: 500)')
+
+    def handle(self, *args, **options):
+        urls = self._iter_urls(options)
+        if options['limit']:
+            urls = urls[:options['limit']]
+
+        if options['write_db']:
+            sink = UniversityUpserter(chunk_size=options['chunk_size'])
+            stream = None
+        elif options['output'] == '-':
+            stream = None
+            sink = NdjsonWriter(sys.stdout)
+        else:
+            stream = open(options['output'], 'w', encoding='utf-8')
+            sink = NdjsonWriter(stream)
+
+        # Subpages without a snapshot are skipped, exactly like failed fetches
+        pipeline = ScrapePipeline(io_workers=options['io_workers'], cpu_workers=options['cpu_workers'], fetcher=load_html)
+        started = time.time()
+        try:
+            ok, failed = pipeline.run_into(urls, sink, on_error=lambda url, error: self.stderr.write(f'  ✗ {url}: {error}'))
+        finally:
+            if stream:
+                stream.close()
+
+        elapsed = time.time() - started
+        summary = f'Re-extracted {ok} universities ({failed} failed) in {elapsed:.1f}s'
+        if isinstance(sink, UniversityUpserter):
+            summary += f'; {sink.created} created, {sink.updated} updated'
+        self.stderr.write(self.style.SUCCESS(summary))
+        self.stderr.write(pipeline.stats.format())
+
+    def _iter_urls(self, options):
+        if options['file']:
+            try:
+                with open(options['file'], encoding='utf-8') as handle:
+                    return [line.strip() for line in handle if line.strip() and not line.startswith('#')]
+            except OSError as e:
+                raise CommandError(f'Cannot read {options["file"]}: {e}')
+
+        queryset = University.objects.exclude(university_link='')
+        if options['country']:
+            queryset = queryset.filter(country__iexact=options['country'])
+        links = set(queryset.values_list('university_link', flat=True))
+        captured = set(PageSnapshot.objects.filter(url__in=links).values_list('url', flat=True).distinct())
+        return sorted(captured)
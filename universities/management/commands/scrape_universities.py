@@ -0,0 +1,98 @@
+import os
+import sys
+import time
+from django.core.management.base import BaseCommand, CommandError
+from universities.batch_scrape import NdjsonWriter, UniversityUpserter
+from universities.browser_pool import browser_available
+from universities.models import University
+from universities.pipeline import ScrapePipeline
+
+
+class Command(BaseCommand):
+    help = 'Scrape universities through the staged pipeline, fetching on a thread pool and extracting on a process pool'
+
+    def add_arguments(self, parser):
+        source = parser.add_mutually_exclusive_group(required=True)
+        source.add_argument('--file', type=str, help='Text file with one URL per line')
+        source.add_argument('--from-db', action='store_true', help='Re-scrape every University.university_link')
+        source.add_argument('--hipo', action='store_true', help='Scrape the Hipolabs universities list')
+        parser.add_argument('--country', type=str, help='Country filter for --hipo and --from-db')
+        parser.add_argument('--limit', type=int, default=0, help='Stop after this many URLs (0 = no limit)')
+        output = parser.add_mutually_exclusive_group(required=True)
+        output.add_argument('--output', type=str, help="NDJSON output path, or '-' for stdout")
+        output.add_argument('--write-db', action='store_true', help='Upsert results into University by university_link')
+        parser.add_argument('--io-workers', type=int, default=16, help='Concurrent page fetches (default: 16)')
+        parser.add_argument('--cpu-workers', type=int, default=os.cpu_count() or 1, help='Extraction processes (default: number of cores)')
+        parser.add_argument('--chunk-size', type=int, default=500, help='Rows per database upsert (default: 500)')
+        parser.add_argument('--render-js', action='store_true', help='Render pages in the headless browser pool (needs playwright)')
+
+    def handle(self, *args, **options):
+        urls = self._iter_urls(options)
+        if options['limit']:
+            urls = (url for i, url in zip(range(options['limit']), urls))
+
+        if options['write_db']:
+            sink = UniversityUpserter(chunk_size=options['chunk_size'])
+            stream = None
+        elif options['output'] == '-':
+            stream = None
+            sink = NdjsonWriter(sys.stdout)
+        else:
+            stream = open(options['output'], 'w', encoding='utf-8')
+            sink = NdjsonWriter(stream)
+
+        if options['render_js'] and not browser_available():
+            raise CommandError('--render-js needs the playwright package and SCRAPE_BROWSER_ENABLED')
+        pipeline = ScrapePipeline(io_workers=options['io_workers'], cpu_workers=options['cpu_workers'], render_js=options['render_js'])
+        started = time.time()
+
+        def progress(ok, failed):
+            if (ok + failed) % 50 == 0:
+                rate = (ok + failed) / max(time.time() - started, 0.001)
+                self.stderr.write(f'Scraped {ok + failed} URLs ({failed} failed, {rate:.1f}/s)...')
+
+        try:
+            ok, failed = pipeline.run_into(
+                urls, sink,
+                on_error=lambda url, error: self.stderr.write(f'  ✗ {url}: {error}'),
+                on_progress=progress,
+            )
+        finally:
+            if stream:
+                stream.close()
+
+        elapsed = time.time() - started
+        summary = f'Scraped {ok} universities ({failed} failed) in {elapsed:.0f}s'
+        if isinstance(sink, UniversityUpserter):
+            summary += f'; {sink.created} created, {sink.updated} updated'
+        self.stderr.write(self.style.SUCCESS(summary))
+        self.stderr.write(pipeline.stats.format())
+
+    def _iter_urls(self, options):
+        if options['file']:
+            try:
+                handle = open(options['file'], encoding='utf-8')
+            except OSError as e:
+                raise CommandError(f'Cannot read {options["file"]}: {e}')
+            return self._read_lines(handle)
+
+        if options['from_db']:
+            queryset = University.objects.exclude(university_link='')
+            if options['country']:
+                queryset = queryset.filter(country__iexact=options['country'])
+            # Materialised up front so the upserts don't run under an open cursor
+            return list(queryset.values_list('university_link', flat=True))
+
+        from universities.seeding import fetch_seed_candidates
+        try:
+            items = fetch_seed_candidates('hipo_github', options['country'])
+        except Exception as e:
+            raise CommandError(f'Failed to fetch Hipolabs list: {e}')
+        return (it['web_pages'][0] for it in items if it.get('web_pages'))
+
+    def _read_lines(self, handle):
+        with handle:
+            for line in handle:
+                line = line.strip()
+                if line and not line.startswith('#'):
+                    yield line
@@ -0,0 +1,21 @@
+from django.core.management.base import BaseCommand, CommandError
+from universities.registry import HIPO_GITHUB_URL, sync_registry
+from universities.scraping import new_http_session
+
+
+class Command(BaseCommand):
+    help = 'Sync the local university registry from the Hipolabs dataset (conditional GET; no-op when unchanged)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--force', action='store_true', help='Download and rebuild even if the dataset has not changed')
+        parser.add_argument('--url', type=str, default=HIPO_GITHUB_URL, help='Dataset URL (default: Hipolabs GitHub JSON)')
+
+    def handle(self, *args, **options):
+        try:
+            result = sync_registry(new_http_session(), force=options['force'], source_url=options['url'])
+        except Exception as e:
+            raise CommandError(f'Registry sync failed: {e}')
+        if result['status'] == 'not_modified':
+            self.stdout.write(f"Registry unchanged ({result['rows']} universities)")
+        else:
+            self.stdout.write(self.style.SUCCESS(f"Registry updated: {result['rows']} universities"))
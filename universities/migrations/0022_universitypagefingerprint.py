@@ -0,0 +1,37 @@
+# Generated by Django 5.2.5 on 2026-10-19 04:52
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('universities', '0021_universityseedjob'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='UniversityPageFingerprint',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('page_type', models.CharField(choices=[('home', 'Home'), ('tuition', 'Tuition'), ('admissions', 'Admissions')], max_length=20)),
+                ('url', models.URLField(max_length=500)),
+                ('etag', models.CharField(blank=True, max_length=255)),
+                ('last_modified', models.CharField(blank=True, max_length=100)),
+                ('content_hash', models.CharField(blank=True, max_length=64)),
+                ('check_interval_hours', models.PositiveIntegerField(default=24)),
+                ('last_checked_at', models.DateTimeField(blank=True, null=True)),
+                ('last_changed_at', models.DateTimeField(blank=True, null=True)),
+                ('next_check_at', models.DateTimeField(blank=True, null=True)),
+                ('consecutive_failures', models.PositiveIntegerField(default=0)),
+                ('university', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='page_fingerprints', to='universities.university')),
+            ],
+            options={
+                'verbose_name': 'University Page Fingerprint',
+                'verbose_name_plural': 'University Page Fingerprints',
+                'indexes': [models.Index(fields=['next_check_at'], name='universitie_next_ch_ed32f1_idx')],
+                'unique_together': {('university', 'page_type')},
+            },
+        ),
+    ]
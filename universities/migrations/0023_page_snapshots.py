@@ -0,0 +1,46 @@
+# Generated by Django 5.2.5 on 2026-10-19 04:52
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('universities', '0022_universitypagefingerprint'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PageSnapshotBlob',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('content_hash', models.CharField(max_length=64, unique=True)),
+                ('codec', models.CharField(default='zlib', max_length=10)),
+                ('data', models.BinaryField()),
+                ('raw_size', models.PositiveIntegerField(default=0)),
+                ('compressed_size', models.PositiveIntegerField(default=0)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='PageSnapshot',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('url', models.URLField(max_length=500)),
+                ('status_code', models.PositiveSmallIntegerField(default=200)),
+                ('content_type', models.CharField(blank=True, max_length=100)),
+                ('encoding', models.CharField(blank=True, max_length=40)),
+                ('final_url', models.URLField(blank=True, max_length=500)),
+                ('elapsed_ms', models.PositiveIntegerField(default=0)),
+                ('fetched_at', models.DateTimeField(db_index=True)),
+                ('blob', models.ForeignKey(on_delete=django.db.models.deletion.PROTECT, related_name='snapshots', to='universities.pagesnapshotblob')),
+            ],
+            options={
+                'verbose_name': 'Page Snapshot',
+                'verbose_name_plural': 'Page Snapshots',
+                'ordering': ['-fetched_at'],
+                'indexes': [models.Index(fields=['url', '-fetched_at'], name='universitie_url_ed3946_idx')],
+            },
+        ),
+    ]
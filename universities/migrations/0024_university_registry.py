@@ -0,0 +1,48 @@
+# Generated by Django 5.2.5 on 2026-10-19 05:02
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('universities', '0023_page_snapshots'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RegistrySyncState',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('source_url', models.URLField(max_length=500, unique=True)),
+                ('etag', models.CharField(blank=True, max_length=255)),
+                ('last_modified', models.CharField(blank=True, max_length=100)),
+                ('content_hash', models.CharField(blank=True, max_length=64)),
+                ('row_count', models.IntegerField(default=0)),
+                ('last_checked_at', models.DateTimeField(blank=True, null=True)),
+                ('last_changed_at', models.DateTimeField(blank=True, null=True)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='RegistryUniversity',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=255)),
+                ('normalized_name', models.CharField(db_index=True, max_length=255)),
+                ('country', models.CharField(max_length=100)),
+                ('country_key', models.CharField(db_index=True, max_length=100)),
+                ('alpha_two_code', models.CharField(blank=True, max_length=2)),
+                ('state_province', models.CharField(blank=True, max_length=100)),
+                ('primary_domain', models.CharField(blank=True, db_index=True, max_length=255)),
+                ('domains', models.JSONField(blank=True, default=list)),
+                ('web_pages', models.JSONField(blank=True, default=list)),
+                ('synced_at', models.DateTimeField()),
+            ],
+            options={
+                'verbose_name': 'Registry University',
+                'verbose_name_plural': 'Registry Universities',
+                'ordering': ['country', 'name'],
+                'indexes': [models.Index(fields=['country_key', 'normalized_name'], name='universitie_country_e6fc2c_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,22 @@
+# Generated by Django 5.2.5 on 2026-10-19 05:14
+
+import django.db.models.functions.text
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('universities', '0024_university_registry'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='scholarshipresult',
+            index=models.Index(django.db.models.functions.text.Lower('country'), models.OrderBy(models.F('fetched_at'), descending=True), name='scholarship_country_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='scholarshipresult',
+            index=models.Index(fields=['-fetched_at'], name='scholarship_fetched_idx'),
+        ),
+    ]
@@ -0,0 +1,19 @@
+# Generated by Django 5.2.5 on 2026-10-19 05:38
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('universities', '0025_scholarship_result_indexes'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='userdashboard',
+            index=models.Index(fields=['subscription_status', 'subscription_end_date'], name='dashboard_status_end_idx'),
+        ),
+    ]
@@ -0,0 +1,26 @@
+# Generated by Django 5.2.5 on 2026-10-19 05:39
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('universities', '0026_userdashboard_status_end_index'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='applicationdraft',
+            name='email',
+            field=models.EmailField(max_length=254),
+        ),
+        migrations.AddIndex(
+            model_name='applicationdraft',
+            index=models.Index(fields=['payment_tx_ref', 'created_at'], name='draft_tx_ref_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='applicationdraft',
+            index=models.Index(fields=['created_at'], name='draft_created_idx'),
+        ),
+    ]
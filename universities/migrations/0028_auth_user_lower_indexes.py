@@ -0,0 +1,25 @@
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+    """
+    Expression indexes for the case-insensitive login lookup in
+    universities.backends. auth_user belongs to django.contrib.auth, so they
+    can't be declared on the model.
+    """
+
+    dependencies = [
+        ('auth', '0012_alter_user_first_name_max_length'),
+        ('universities', '0027_application_draft_indexes'),
+    ]
+
+    operations = [
+        migrations.RunSQL(
+            'CREATE INDEX IF NOT EXISTS auth_user_email_lower_idx ON auth_user (LOWER(email));',
+            'DROP INDEX IF EXISTS auth_user_email_lower_idx;',
+        ),
+        migrations.RunSQL(
+            'CREATE INDEX IF NOT EXISTS auth_user_username_lower_idx ON auth_user (LOWER(username));',
+            'DROP INDEX IF EXISTS auth_user_username_lower_idx;',
+        ),
+    ]
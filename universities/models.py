@@ -1,6 +1,8 @@
 from django.db import models
-from django.contrib.auth.models import User
-from django.db.models.signals import post_save
+from django.db.models import F
+from django.db.models.functions import Lower
+from django.contrib.auth.models import Group, User
+from django.db.models.signals import m2m_changed, post_save
 from django.dispatch import receiver
 from django.core.mail import send_mail
 from django.conf import settings
@@ -12,7 +14,7 @@ logger = logging.getLogger(__name__)
 
 class ApplicationDraft(models.Model):
     """Temporary storage for submitted application data prior to payment confirmation."""
-    email = models.EmailField(db_index=True)
+    email = models.EmailField()
     full_name = models.CharField(max_length=200, blank=True)
     phone = models.CharField(max_length=50, blank=True)
     country = models.CharField(max_length=100, blank=True)
@@ -22,7 +24,13 @@ class ApplicationDraft(models.Model):
     payment_tx_ref = models.CharField(max_length=200, blank=True, help_text="Optional tx ref to bind with payment webhook")
 
     class Meta:
-        indexes = [models.Index(fields=["email", "created_at"])]
+        # (email, created_at) also serves plain email lookups. The payment
+        # path finds drafts by tx ref, newest first; retention scans by age.
+        indexes = [
+            models.Index(fields=["email", "created_at"]),
+            models.Index(fields=["payment_tx_ref", "created_at"], name="draft_tx_ref_created_idx"),
+            models.Index(fields=["created_at"], name="draft_created_idx"),
+        ]
         ordering = ['-created_at']
 
     def __str__(self):
@@ -99,6 +107,12 @@ class UserDashboard(models.Model):
     total_paid = models.DecimalField(max_digits=10, decimal_places=2, default=0)
     months_subscribed = models.IntegerField(default=0)
     is_verified = models.BooleanField(default=False)
+
+    class Meta:
+        indexes = [
+            # Expiry sweep and renewal reminders (universities.subscriptions)
+            models.Index(fields=['subscription_status', 'subscription_end_date'], name='dashboard_status_end_idx'),
+        ]
     
     def update_subscription(self, amount_paid, monthly_price=1000):
         from django.utils import timezone
@@ -171,6 +185,34 @@ def create_user_dashboard(sender, instance, created, **kwargs):
     if created:
         UserDashboard.objects.create(user=instance)
 
+@receiver(post_save, sender=User)
+def invalidate_user_token_claims(sender, instance, **kwargs):
+    """Tokens minted from now on carry the changed names, email or staff flag."""
+    from .token_claims import invalidate
+    invalidate(instance.pk)
+
+@receiver(post_save, sender='profiles.Profile')
+def invalidate_profile_token_claims(sender, instance, **kwargs):
+    from .token_claims import invalidate
+    invalidate(instance.user_id)
+
+@receiver(post_save, sender=Group)
+def invalidate_group_token_claims(sender, instance, created, **kwargs):
+    if not created:
+        from .token_claims import invalidate
+        invalidate(*instance.user_set.values_list('pk', flat=True))
+
+@receiver(m2m_changed, sender=User.groups.through)
+def invalidate_membership_token_claims(sender, instance, action, reverse, pk_set, **kwargs):
+    """Group membership changes, from either side (user.groups or group.user_set)."""
+    from .token_claims import invalidate
+    if not reverse and action in ('post_add', 'post_remove', 'post_clear'):
+        invalidate(instance.pk)
+    elif reverse and action in ('post_add', 'post_remove'):
+        invalidate(*pk_set)
+    elif reverse and action == 'pre_clear':
+        invalidate(*instance.user_set.values_list('pk', flat=True))
+
 class UniversityJSONImport(models.Model):
     """
     A model to facilitate importing University data via JSON in the Django admin.
@@ -184,16 +226,191 @@ class UniversityJSONImport(models.Model):
         verbose_name_plural = "University JSON Imports"
         ordering = ['-created_at']
 
+class ScholarshipResultQuerySet(models.QuerySet):
+    def for_country(self, country):
+        """Case-insensitive country match that can use the lower(country) index."""
+        return self.annotate(country_key=Lower('country')).filter(country_key=(country or '').strip().lower())
+
+
 class ScholarshipResult(models.Model):
     country = models.CharField(max_length=100, blank=True)
     scholarships_data = models.JSONField(default=list)
     fetched_at = models.DateTimeField(auto_now_add=True)
     total_count = models.IntegerField(default=0)
+
+    objects = ScholarshipResultQuerySet.as_manager()
     
     class Meta:
         verbose_name = "Scholarship Result"
         verbose_name_plural = "Scholarship Results"
         ordering = ['-fetched_at']
+        indexes = [
+            models.Index(Lower('country'), F('fetched_at').desc(), name='scholarship_country_idx'),
+            models.Index(fields=['-fetched_at'], name='scholarship_fetched_idx'),
+        ]
+
+class UniversitySeedJob(models.Model):
+    """
+    A background seeding run started from the admin seed endpoint.
+    Counters are updated in place by the Celery worker so the status endpoint
+    can report progress while the job is running.
+    """
+    STATUS_CHOICES = [
+        ('pending', 'Pending'),
+        ('running', 'Running'),
+        ('completed', 'Completed'),
+        ('failed', 'Failed'),
+        ('cancelled', 'Cancelled'),
+    ]
+    country = models.CharField(max_length=100, blank=True)
+    source = models.CharField(max_length=20, default='hipo_api')
+    limit = models.PositiveIntegerField(null=True, blank=True, help_text="Maximum candidates to process. Empty means no limit.")
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default='pending', db_index=True)
+    created_by = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, blank=True, related_name='university_seed_jobs')
+    total_candidates = models.IntegerField(default=0)
+    processed = models.IntegerField(default=0)
+    created = models.IntegerField(default=0)
+    skipped_existing = models.IntegerField(default=0)
+    failed = models.IntegerField(default=0)
+    # Most recent errors only, e.g. [{"name": ..., "url": ..., "error": ...}]
+    errors = models.JSONField(default=list, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    started_at = models.DateTimeField(null=True, blank=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        verbose_name = "University Seed Job"
+        verbose_name_plural = "University Seed Jobs"
+        ordering = ['-created_at']
+
+    def __str__(self):
+        return f"Seed job #{self.pk} ({self.country or 'all countries'}) - {self.status}"
+
+class UniversityPageFingerprint(models.Model):
+    """
+    Tracks one key page of a university (home, tuition, admissions) for the
+    incremental refresh job. Pages whose normalized text hash hasn't changed
+    are not re-extracted, and the check interval backs off while they stay
+    unchanged.
+    """
+    PAGE_TYPE_CHOICES = [
+        ('home', 'Home'),
+        ('tuition', 'Tuition'),
+        ('admissions', 'Admissions'),
+    ]
+    university = models.ForeignKey(University, on_delete=models.CASCADE, related_name='page_fingerprints')
+    page_type = models.CharField(max_length=20, choices=PAGE_TYPE_CHOICES)
+    url = models.URLField(max_length=500)
+    etag = models.CharField(max_length=255, blank=True)
+    last_modified = models.CharField(max_length=100, blank=True)
+    content_hash = models.CharField(max_length=64, blank=True)
+    check_interval_hours = models.PositiveIntegerField(default=24)
+    last_checked_at = models.DateTimeField(null=True, blank=True)
+    last_changed_at = models.DateTimeField(null=True, blank=True)
+    next_check_at = models.DateTimeField(null=True, blank=True)
+    consecutive_failures = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        unique_together = ("university", "page_type")
+        indexes = [models.Index(fields=["next_check_at"])]
+        verbose_name = "University Page Fingerprint"
+        verbose_name_plural = "University Page Fingerprints"
+
+    def __str__(self):
+        return f"{self.university.name} - {self.page_type}"
+
+class RegistryUniversity(models.Model):
+    """
+    Local copy of the Hipolabs world universities dataset, kept current by the
+    sync_university_registry command. Seeding reads candidates from here
+    instead of downloading the dataset on every run.
+    """
+    name = models.CharField(max_length=255)
+    # Lowercased, accent- and punctuation-free name used for lookups and dedupe
+    normalized_name = models.CharField(max_length=255, db_index=True)
+    country = models.CharField(max_length=100)
+    # Lowercased country, so country filters can use an index
+    country_key = models.CharField(max_length=100, db_index=True)
+    alpha_two_code = models.CharField(max_length=2, blank=True)
+    state_province = models.CharField(max_length=100, blank=True)
+    primary_domain = models.CharField(max_length=255, db_index=True, blank=True)
+    domains = models.JSONField(default=list, blank=True)
+    web_pages = models.JSONField(default=list, blank=True)
+    synced_at = models.DateTimeField()
+
+    class Meta:
+        indexes = [models.Index(fields=["country_key", "normalized_name"])]
+        ordering = ['country', 'name']
+        verbose_name = "Registry University"
+        verbose_name_plural = "Registry Universities"
+
+    def __str__(self):
+        return f"{self.name} ({self.country})"
+
+    def as_candidate(self):
+        """The record in the shape of a Hipolabs API item."""
+        return {
+            'name': self.name,
+            'country': self.country,
+            'alpha_two_code': self.alpha_two_code,
+            'state-province': self.state_province or None,
+            'domains': self.domains,
+            'web_pages': self.web_pages,
+        }
+
+class RegistrySyncState(models.Model):
+    """Validators and bookkeeping for conditional re-downloads of a registry source."""
+    source_url = models.URLField(max_length=500, unique=True)
+    etag = models.CharField(max_length=255, blank=True)
+    last_modified = models.CharField(max_length=100, blank=True)
+    content_hash = models.CharField(max_length=64, blank=True)
+    row_count = models.IntegerField(default=0)
+    last_checked_at = models.DateTimeField(null=True, blank=True)
+    last_changed_at = models.DateTimeField(null=True, blank=True)
+
+    def __str__(self):
+        return self.source_url
+
+class PageSnapshotBlob(models.Model):
+    """
+    Compressed raw page body, addressed by the SHA-256 of the uncompressed
+    bytes so identical pages are stored once no matter how often they are fetched.
+    """
+    content_hash = models.CharField(max_length=64, unique=True)
+    codec = models.CharField(max_length=10, default='zlib')
+    data = models.BinaryField()
+    raw_size = models.PositiveIntegerField(default=0)
+    compressed_size = models.PositiveIntegerField(default=0)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return f"{self.content_hash[:12]} ({self.codec}, {self.compressed_size} bytes)"
+
+class PageSnapshot(models.Model):
+    """One fetch of a scraped URL, pointing at its (shared) compressed body."""
+    url = models.URLField(max_length=500)
+    blob = models.ForeignKey(PageSnapshotBlob, on_delete=models.PROTECT, related_name='snapshots')
+    status_code = models.PositiveSmallIntegerField(default=200)
+    content_type = models.CharField(max_length=100, blank=True)
+    encoding = models.CharField(max_length=40, blank=True)
+    final_url = models.URLField(max_length=500, blank=True)
+    elapsed_ms = models.PositiveIntegerField(default=0)
+    fetched_at = models.DateTimeField(db_index=True)
+
+    class Meta:
+        indexes = [models.Index(fields=["url", "-fetched_at"])]
+        ordering = ['-fetched_at']
+        verbose_name = "Page Snapshot"
+        verbose_name_plural = "Page Snapshots"
+
+    def __str__(self):
+        return f"{self.url} @ {self.fetched_at:%Y-%m-%d %H:%M}"
+
+@receiver(post_save, sender=UserDashboard)
+def publish_entitlement(sender, instance, **kwargs):
+    """Tokens minted with another subscription state stop passing HasSubscriptionClaim."""
+    from .entitlements import publish
+    publish(instance)
 
 @receiver(post_save, sender=UserDashboard)
 def send_payment_completion_email(sender, instance, created, **kwargs):
@@ -1,6 +1,9 @@
+from rest_framework.exceptions import AuthenticationFailed
 from rest_framework.permissions import BasePermission
 from django.utils import timezone
 
+from . import entitlements
+
 class HasActiveSubscription(BasePermission):
     """
     Allows access only to users with an active subscription.
@@ -15,6 +18,8 @@ class HasActiveSubscription(BasePermission):
         if request.user.is_staff or request.user.is_superuser:
             return True
 
+        # The hourly sweep (universities.subscriptions) lags the end date by
+        # up to an hour, so the date is checked too
         try:
             dashboard = request.user.dashboard
             return (dashboard.subscription_status == 'active' and
@@ -22,4 +27,25 @@ class HasActiveSubscription(BasePermission):
                     dashboard.subscription_end_date >= timezone.now().date())
         except AttributeError:
             # This can happen if the dashboard object doesn't exist for some reason.
-            return False
\ No newline at end of file
+            return False
+
+
+class HasSubscriptionClaim(BasePermission):
+    """
+    HasActiveSubscription decided from the access token's claims, usually
+    without a query (see universities.entitlements). A token minted before the
+    subscription last changed is refused with 401 `entitlement_changed` so
+    the client refreshes it.
+    """
+    message = HasActiveSubscription.message
+
+    def has_permission(self, request, view):
+        token = request.auth
+        if token is None:
+            return False
+        if not entitlements.is_current(token):
+            raise AuthenticationFailed({
+                'detail': 'Your subscription has changed; refresh your access token.',
+                'code': 'entitlement_changed',
+            })
+        return entitlements.is_entitled(token)
@@ -0,0 +1,379 @@
+"""
+Staged university scrape pipeline.
+
+Every scrape, whether it comes from the API endpoint, a seed job or a batch
+command, runs through the same stages:
+
+    discover → fetch → extract → fetch_subpages → extract_subpages → merge → dedupe → persist
+
+`discover` reads sitemaps for candidate pages, the fetch stages go to the
+network (or the snapshot store, or the browser pool), the extract stages run
+EnhancedUniversityScraper plus the fallback extractors and are CPU bound, and
+`merge` assembles the University record. Those stages run per URL on a
+bounded set of I/O threads, with extraction handed to a process pool, so
+only a fixed number of universities are in memory at any time however long
+the input stream is. `dedupe` and `persist` run in the consuming thread.
+
+Every stage is timed into a StageStats instance, so a run can report where
+its time went.
+
+ascrape_one() runs the same stages for one URL from async code: pages are
+fetched over the shared httpx client (universities.async_http), subpages
+concurrently, while discovery, robots.txt checks and extraction run in
+worker threads. Pages it fetches are not captured as snapshots.
+"""
+import asyncio
+import os
+import threading
+import time
+from concurrent.futures import Future, ProcessPoolExecutor, ThreadPoolExecutor, FIRST_COMPLETED, wait
+from contextlib import contextmanager
+from urllib.parse import urlparse
+
+import httpx
+import requests
+from bs4 import BeautifulSoup
+from django.db import connection
+from tenacity import retry, retry_if_exception_type, stop_after_attempt, wait_exponential
+
+from .browser_pool import render_html
+from .crawl_frontier import canonicalize_url
+from .enhanced_scraper import EnhancedUniversityScraper, extract_additional_page, extract_main_page
+from .async_http import get_client as get_async_http_client
+from .extractors import resolve_official_url
+from .fetching import afetch_capped
+from .snapshots import capture, snapshots_enabled
+
+STAGES = ['discover', 'fetch', 'extract', 'fetch_subpages', 'extract_subpages', 'merge', 'dedupe', 'persist']
+
+AGGREGATOR_HOSTS = ['mastersportal.com', 'bachelorsportal.com', 'phdportal.com', 'shortcoursesportal.com']
+
+
+# The start page decides whether there is a scrape at all, so transient network
+# failures there are retried. Subpages are best effort and are not.
+_retry_start_page = retry(
+    stop=stop_after_attempt(3), wait=wait_exponential(multiplier=0.5, min=1, max=4),
+    retry=retry_if_exception_type((requests.ConnectionError, requests.Timeout)), reraise=True,
+)
+_aretry_start_page = retry(
+    stop=stop_after_attempt(3), wait=wait_exponential(multiplier=0.5, min=1, max=4),
+    retry=retry_if_exception_type((httpx.TransportError,)), reraise=True,
+)
+
+
+class ScrapeError(Exception):
+    """Raised when the start page of a scrape cannot be fetched."""
+
+
+class StageStats:
+    """Thread-safe per-stage counters: items handled, errors and seconds spent."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._stats = {stage: {'items': 0, 'errors': 0, 'seconds': 0.0} for stage in STAGES}
+
+    @contextmanager
+    def timed(self, stage, items=1):
+        started = time.perf_counter()
+        failed = False
+        try:
+            yield
+        except Exception:
+            failed = True
+            raise
+        finally:
+            elapsed = time.perf_counter() - started
+            with self._lock:
+                entry = self._stats[stage]
+                entry['items'] += items
+                entry['seconds'] += elapsed
+                if failed:
+                    entry['errors'] += 1
+
+    def as_dict(self):
+        with self._lock:
+            return {
+                stage: {**entry, 'seconds': round(entry['seconds'], 3)}
+                for stage, entry in self._stats.items()
+            }
+
+    def format(self):
+        lines = []
+        for stage, entry in self.as_dict().items():
+            if not entry['items']:
+                continue
+            per_item = entry['seconds'] * 1000 / entry['items']
+            lines.append(f"{stage:<17} {entry['items']:>7} items {entry['seconds']:>9.2f}s {per_item:>8.1f} ms/item {entry['errors']:>5} errors")
+        return '\n'.join(lines)
+
+
+# Counters for the scrapes served by this process (API endpoint, seed jobs)
+process_stats = StageStats()
+
+
+class _InlineExecutor:
+    """Stands in for the process pool when extraction should run in the calling thread."""
+
+    def submit(self, fn, *args):
+        future = Future()
+        try:
+            future.set_result(fn(*args))
+        except Exception as e:
+            future.set_exception(e)
+        return future
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+def _official_url(url, html):
+    """The official site an aggregator page links to, when `url` is on a program portal."""
+    host = urlparse(url).netloc.lower()
+    if any(aggregator in host for aggregator in AGGREGATOR_HOSTS):
+        # Program portals link to the official site; scrape that instead
+        resolved = resolve_official_url(url, BeautifulSoup(html, 'html.parser'))
+        if resolved and resolved != url:
+            return resolved
+    return None
+
+
+class ScrapePipeline:
+    """
+    Runs the stages for a stream of start URLs.
+
+    `fetcher` is a callable(url) -> html; by default pages are fetched live
+    (streamed and size-capped, with snapshot capture when enabled) or, with
+    `render_js`, rendered in the shared browser pool. Sitemap discovery and
+    robots.txt checks only apply to live fetches. `cpu_workers=0` extracts
+    in the I/O thread instead of a process pool, which is what single scrapes
+    use.
+    """
+
+    def __init__(self, io_workers=16, cpu_workers=None, fetcher=None, render_js=False, stats=None):
+        self.io_workers = io_workers
+        self.cpu_workers = (os.cpu_count() or 1) if cpu_workers is None else cpu_workers
+        self.live = fetcher is None
+        self.render_js = render_js
+        self.fetcher = fetcher or self._fetch_live
+        self.stats = stats or StageStats()
+        self._local = threading.local()
+        self._merger = EnhancedUniversityScraper()
+        self._seen = set()
+
+    # -- per-URL stages (I/O thread) ----------------------------------------
+
+    def _scraper(self):
+        # requests sessions are not shared between threads
+        scraper = getattr(self._local, 'scraper', None)
+        if scraper is None:
+            sink = capture if snapshots_enabled() else None
+            scraper = self._local.scraper = EnhancedUniversityScraper(snapshot_sink=sink)
+        return scraper
+
+    def _fetch_live(self, url):
+        if self.render_js:
+            return render_html(url)
+        return self._scraper().fetch_page(url).text
+
+    def _discover(self, url):
+        with self.stats.timed('discover'):
+            return self._scraper().discover_pages(url)
+
+    def _fetch_start(self, url):
+        html = _retry_start_page(self.fetcher)(url) if self.live else self.fetcher(url)
+        resolved = _official_url(url, html)
+        if resolved:
+            try:
+                return resolved, self.fetcher(resolved)
+            except Exception:
+                pass
+        return url, html
+
+    def _scrape_pages(self, cpu_pool, url):
+        stats = self.stats
+        seed_urls = self._discover(url) if self.live else []
+
+        try:
+            with stats.timed('fetch'):
+                url, html = self._fetch_start(url)
+        except Exception as e:
+            raise ScrapeError(f'Failed to fetch url: {e}') from e
+
+        with stats.timed('extract'):
+            main = cpu_pool.submit(extract_main_page, url, html, seed_urls).result()
+        del html
+
+        links = main['links_to_crawl']
+        if self.live and not self.render_js:
+            links = self._scraper().allowed_links(links)
+        page_futures = []
+        with stats.timed('fetch_subpages', items=len(links)):
+            for link in links:
+                try:
+                    page_html = self.fetcher(link)
+                except Exception:
+                    continue
+                page_futures.append(cpu_pool.submit(extract_additional_page, link, page_html))
+
+        additional_pages = []
+        with stats.timed('extract_subpages', items=len(page_futures)):
+            for future in page_futures:
+                try:
+                    additional_pages.append(future.result())
+                except Exception:
+                    continue
+
+        with stats.timed('merge'):
+            return self._merger.merge_university_data(url, main, additional_pages)
+
+    def _scrape_one(self, cpu_pool, url):
+        try:
+            return self._scrape_pages(cpu_pool, url)
+        finally:
+            # Snapshot capture and snapshot reads use this thread's connection
+            connection.close()
+
+    # -- stream stages (consuming thread) -----------------------------------
+
+    def _is_duplicate(self, record):
+        """Drop a record whose (canonical) university link was already emitted by this run."""
+        with self.stats.timed('dedupe'):
+            key = canonicalize_url(record.get('university_link') or '') or record.get('university_link')
+            if key in self._seen:
+                return True
+            self._seen.add(key)
+            return False
+
+    def run(self, urls):
+        """
+        Yield (url, record, error) as scrapes finish; duplicates are skipped.
+        Only a bounded number of URLs is in flight, so `urls` can be an
+        arbitrarily long iterator.
+        """
+        max_in_flight = self.io_workers * 2
+        cpu_pool = ProcessPoolExecutor(max_workers=self.cpu_workers) if self.cpu_workers else _InlineExecutor()
+        with cpu_pool, ThreadPoolExecutor(max_workers=self.io_workers, thread_name_prefix='scrape-io') as io_pool:
+            in_flight = {}
+            for url in urls:
+                in_flight[io_pool.submit(self._scrape_one, cpu_pool, url)] = url
+                if len(in_flight) >= max_in_flight:
+                    yield from self._collect(in_flight)
+            while in_flight:
+                yield from self._collect(in_flight)
+
+    def _collect(self, in_flight):
+        done, _ = wait(list(in_flight), return_when=FIRST_COMPLETED)
+        for future in done:
+            url = in_flight.pop(future)
+            try:
+                record = future.result()
+            except Exception as e:
+                yield url, None, str(e)
+                continue
+            if not self._is_duplicate(record):
+                yield url, record, None
+
+    def run_into(self, urls, sink, on_error=None, on_progress=None):
+        """
+        Run the pipeline and persist every record through `sink.write`.
+        Returns (ok, failed).
+        """
+        ok = failed = 0
+        try:
+            for url, record, error in self.run(urls):
+                if error:
+                    failed += 1
+                    if on_error:
+                        on_error(url, error)
+                else:
+                    with self.stats.timed('persist'):
+                        sink.write(record)
+                    ok += 1
+                if on_progress:
+                    on_progress(ok, failed)
+        finally:
+            with self.stats.timed('persist', items=0):
+                sink.close()
+        return ok, failed
+
+    def scrape_one(self, url):
+        """
+        Scrape a single university in the calling thread, extracting inline.
+        Raises ScrapeError when the start page can't be fetched.
+        """
+        return self._scrape_pages(_InlineExecutor(), url)
+
+    # -- async path ------------------------------------------------------------
+
+    def _async_client(self):
+        return get_async_http_client(
+            'scrape', follow_redirects=True,
+            headers={'User-Agent': self._merger.session.headers['User-Agent']},
+        )
+
+    async def _afetch(self, url):
+        response = await afetch_capped(self._async_client(), url)
+        response.raise_for_status()
+        return response.text
+
+    async def _afetch_start(self, url):
+        html = await _aretry_start_page(self._afetch)(url)
+        resolved = await asyncio.to_thread(_official_url, url, html)
+        if resolved:
+            try:
+                return resolved, await self._afetch(resolved)
+            except Exception:
+                pass
+        return url, html
+
+    async def ascrape_one(self, url):
+        """
+        scrape_one() for async callers. Only the fetches differ: live pages
+        come over the event loop's shared httpx client and subpages are
+        fetched concurrently. Custom fetchers and browser rendering are sync,
+        so those pipelines run scrape_one() in a worker thread instead.
+        """
+        if not self.live or self.render_js:
+            return await asyncio.to_thread(self.scrape_one, url)
+        stats = self.stats
+
+        # Sitemap discovery (sync requests) overlaps the start page fetch
+        discovery = asyncio.create_task(asyncio.to_thread(self._discover, url))
+        try:
+            with stats.timed('fetch'):
+                url, html = await self._afetch_start(url)
+        except Exception as e:
+            discovery.cancel()
+            raise ScrapeError(f'Failed to fetch url: {e}') from e
+        seed_urls = await discovery
+
+        with stats.timed('extract'):
+            main = await asyncio.to_thread(extract_main_page, url, html, seed_urls)
+        del html
+
+        links = await asyncio.to_thread(self._allowed_links, main['links_to_crawl'])
+        with stats.timed('fetch_subpages', items=len(links)):
+            pages = await asyncio.gather(*(self._afetch(link) for link in links), return_exceptions=True)
+        pages = [(link, page) for link, page in zip(links, pages) if not isinstance(page, BaseException)]
+
+        with stats.timed('extract_subpages', items=len(pages)):
+            additional_pages = await asyncio.to_thread(_extract_pages, pages)
+
+        with stats.timed('merge'):
+            return self._merger.merge_university_data(url, main, additional_pages)
+
+    def _allowed_links(self, links):
+        return self._scraper().allowed_links(links)
+
+
+def _extract_pages(pages):
+    extracted = []
+    for link, html in pages:
+        try:
+            extracted.append(extract_additional_page(link, html))
+        except Exception:
+            continue
+    return extracted
@@ -0,0 +1,246 @@
+"""
+Incremental catalog refresh driven by page fingerprints.
+
+Each university has up to three tracked pages (home, tuition, admissions).
+The refresh job re-checks pages that are due with conditional GETs, hashes
+the normalized page text and only re-runs extraction for pages whose hash
+changed. Only University fields whose value actually changed are written.
+Pages that keep coming back unchanged are checked less and less often.
+"""
+import hashlib
+import logging
+import re
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+from urllib.parse import urljoin
+
+from bs4 import BeautifulSoup
+from django.conf import settings
+from django.db import connection
+from django.utils import timezone
+
+from .enhanced_scraper import EnhancedUniversityScraper
+from .fetching import fetch_capped
+from .models import University, UniversityPageFingerprint
+from .scraping import new_http_session
+from .snapshots import capture
+
+logger = logging.getLogger(__name__)
+
+MIN_INTERVAL_HOURS = 24
+MAX_INTERVAL_HOURS = 24 * 30
+
+PAGE_KEYWORDS = {
+    'tuition': ['tuition', 'fees', 'cost'],
+    'admissions': ['admission', 'admissions', 'apply', 'how to apply'],
+}
+
+
+def normalize_page_text(html):
+    """Visible page text with scripts, styles and whitespace noise removed."""
+    soup = BeautifulSoup(html, 'html.parser')
+    for tag in soup(['script', 'style', 'noscript', 'template']):
+        tag.decompose()
+    text = soup.get_text(' ', strip=True)
+    return re.sub(r'\s+', ' ', text).strip().lower()
+
+
+def fingerprint(html):
+    return hashlib.sha256(normalize_page_text(html).encode('utf-8')).hexdigest()
+
+
+def _find_key_page(soup, base_url, keywords):
+    for a in soup.find_all('a', href=True):
+        text = (a.get_text() or '').lower()
+        href = a['href'].lower()
+        if any(k in text or k in href for k in keywords):
+            return urljoin(base_url, a['href'])
+    return None
+
+
+def ensure_fingerprints(university, session, home_html=None):
+    """
+    Create fingerprint rows for a university that has none yet. The tuition
+    and admissions pages are discovered from the home page links.
+    """
+    now = timezone.now()
+    rows = [UniversityPageFingerprint(university=university, page_type='home', url=university.university_link, next_check_at=now)]
+    try:
+        if home_html is None:
+            resp = fetch_capped(session, university.university_link)
+            resp.raise_for_status()
+            home_html = resp.text
+        soup = BeautifulSoup(home_html, 'html.parser')
+        for page_type, keywords in PAGE_KEYWORDS.items():
+            url = _find_key_page(soup, university.university_link, keywords)
+            if url:
+                rows.append(UniversityPageFingerprint(university=university, page_type=page_type, url=url, next_check_at=now))
+    except Exception as e:
+        logger.info(f"Could not discover key pages for {university.university_link}: {e}")
+    UniversityPageFingerprint.objects.bulk_create(rows, ignore_conflicts=True)
+
+
+def check_page(fp, session):
+    """
+    Conditionally fetch a tracked page. Returns (changed, html, headers);
+    html is only set when the normalized content changed.
+    """
+    headers = {}
+    if fp.etag:
+        headers['If-None-Match'] = fp.etag
+    if fp.last_modified:
+        headers['If-Modified-Since'] = fp.last_modified
+    resp = fetch_capped(session, fp.url, headers=headers)
+    if resp.status_code == 304:
+        return False, None, resp.headers
+    resp.raise_for_status()
+    capture(fp.url, resp)
+    new_hash = fingerprint(resp.text)
+    if new_hash == fp.content_hash:
+        return False, None, resp.headers
+    first_check = not fp.content_hash
+    fp.content_hash = new_hash
+    if first_check:
+        # Baseline only: the catalog row already reflects the current page
+        return False, None, resp.headers
+    return True, resp.text, resp.headers
+
+
+def _next_interval(fp, changed):
+    if changed:
+        return max(MIN_INTERVAL_HOURS, fp.check_interval_hours // 2)
+    return min(MAX_INTERVAL_HOURS, fp.check_interval_hours * 2)
+
+
+def _fields_from_pages(scraper, university, changed_pages):
+    """Re-run extraction for the changed pages only and map the results to University fields."""
+    values = {}
+    for page_type, (url, html) in changed_pages.items():
+        if page_type == 'home':
+            main = scraper.extract_main_page(url, html)
+            values['description'] = main['description']
+            values['application_link'] = main['application_link']
+            if main['bachelor_programs']:
+                values['bachelor_programs'] = main['bachelor_programs'][:25]
+            if main['masters_programs']:
+                values['masters_programs'] = main['masters_programs'][:25]
+            if main['scholarships']:
+                values['scholarships'] = main['scholarships'][:15]
+            fees, intakes = main['fees'], main['intakes']
+        else:
+            page = scraper.extract_additional_page(url, html)
+            fees, intakes = page['fees'], page['intakes']
+
+        tuition = fees.get('tuition_general') or fees.get('tuition_international') or fees.get('tuition_domestic')
+        if tuition:
+            values['tuition_fee'] = f"{tuition:.2f}"
+        if fees.get('application_fee'):
+            values['application_fee'] = f"{fees['application_fee']:.2f}"
+        if intakes:
+            values['intakes'] = intakes[:6]
+
+    changed_fields = []
+    for field, value in values.items():
+        if value in (None, '', []):
+            continue
+        if str(getattr(university, field)) != str(value):
+            setattr(university, field, value)
+            changed_fields.append(field)
+    return changed_fields
+
+
+def refresh_university(university, fingerprints, session, scraper):
+    """
+    Check the given fingerprints of one university and write back changed
+    fields. Returns a dict of counters for reporting.
+    """
+    now = timezone.now()
+    changed_pages = {}
+    stats = {'checked': 0, 'changed': 0, 'failed': 0, 'fields_updated': 0}
+
+    for fp in fingerprints:
+        stats['checked'] += 1
+        try:
+            changed, html, headers = check_page(fp, session)
+        except Exception as e:
+            stats['failed'] += 1
+            fp.consecutive_failures += 1
+            fp.last_checked_at = now
+            fp.check_interval_hours = min(MAX_INTERVAL_HOURS, fp.check_interval_hours * 2)
+            fp.next_check_at = now + timedelta(hours=fp.check_interval_hours)
+            fp.save(update_fields=['consecutive_failures', 'last_checked_at', 'check_interval_hours', 'next_check_at'])
+            logger.info(f"Refresh check failed for {fp.url}: {e}")
+            continue
+
+        fp.etag = headers.get('ETag', '') or fp.etag
+        fp.last_modified = headers.get('Last-Modified', '') or fp.last_modified
+        fp.consecutive_failures = 0
+        fp.last_checked_at = now
+        fp.check_interval_hours = _next_interval(fp, changed)
+        fp.next_check_at = now + timedelta(hours=fp.check_interval_hours)
+        if changed:
+            stats['changed'] += 1
+            fp.last_changed_at = now
+            changed_pages[fp.page_type] = (fp.url, html)
+        fp.save(update_fields=[
+            'etag', 'last_modified', 'content_hash', 'consecutive_failures', 'last_checked_at',
+            'last_changed_at', 'check_interval_hours', 'next_check_at',
+        ])
+
+    if changed_pages:
+        fields = _fields_from_pages(scraper, university, changed_pages)
+        if fields:
+            university.save(update_fields=fields)
+            stats['fields_updated'] = len(fields)
+    return stats
+
+
+def refresh_due_pages(batch_size=None, workers=None):
+    """
+    Entry point for the periodic task: bootstrap fingerprints for a batch of
+    untracked universities, then check every fingerprint that is due.
+    """
+    batch_size = batch_size or getattr(settings, 'UNIVERSITY_REFRESH_BATCH_SIZE', 200)
+    workers = workers or getattr(settings, 'UNIVERSITY_REFRESH_WORKERS', 8)
+    now = timezone.now()
+    totals = {'universities': 0, 'checked': 0, 'changed': 0, 'failed': 0, 'fields_updated': 0}
+
+    untracked = list(
+        University.objects.filter(page_fingerprints__isnull=True)
+        .exclude(university_link='')
+        .order_by('id')[:batch_size]
+    )
+    def bootstrap(university):
+        try:
+            ensure_fingerprints(university, new_http_session())
+        finally:
+            # Worker threads open their own connections; don't leak them
+            connection.close()
+
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix='refresh') as pool:
+        list(pool.map(bootstrap, untracked))
+
+    due = (
+        UniversityPageFingerprint.objects.filter(next_check_at__lte=now)
+        .select_related('university')
+        .order_by('next_check_at')[:batch_size]
+    )
+    by_university = {}
+    for fp in due:
+        by_university.setdefault(fp.university_id, (fp.university, []))[1].append(fp)
+
+    def run(item):
+        university, fingerprints = item
+        try:
+            return refresh_university(university, fingerprints, new_http_session(), EnhancedUniversityScraper())
+        finally:
+            connection.close()
+
+    # Checks are network bound; each university is handled by one thread so
+    # its row is only written once.
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix='refresh') as pool:
+        for stats in pool.map(run, by_university.values()):
+            totals['universities'] += 1
+            for key, value in stats.items():
+                totals[key] += value
+    return totals
@@ -0,0 +1,125 @@
+"""
+Local registry of world universities (the Hipolabs dataset).
+
+sync_registry() re-downloads world_universities_and_domains.json only when it
+changed, using the ETag / Last-Modified validators from the previous sync, and
+replaces the RegistryUniversity table in one transaction. Seeding and the
+batch scrape command read candidates from the table, so a seed run needs no
+network access for the candidate list once the registry has been synced.
+"""
+import hashlib
+import json
+import logging
+import re
+import unicodedata
+from urllib.parse import urlparse
+
+from django.db import transaction
+from django.utils import timezone
+
+from .models import RegistrySyncState, RegistryUniversity
+
+logger = logging.getLogger(__name__)
+
+HIPO_GITHUB_URL = 'https://raw.githubusercontent.com/Hipo/university-domains-list/master/world_universities_and_domains.json'
+
+
+def normalize_name(name):
+    """`Université Paris-Saclay ` -> `universite paris saclay`"""
+    name = unicodedata.normalize('NFKD', name or '')
+    name = ''.join(c for c in name if not unicodedata.combining(c))
+    name = re.sub(r'[^\w\s]', ' ', name.casefold())
+    return re.sub(r'\s+', ' ', name).strip()
+
+
+def _primary_domain(item):
+    domains = item.get('domains') or []
+    if domains:
+        return domains[0].strip().lower()
+    pages = item.get('web_pages') or []
+    if pages:
+        return urlparse(pages[0]).netloc.lower()
+    return ''
+
+
+def build_rows(items, synced_at):
+    """RegistryUniversity rows for the raw dataset, without duplicate entries."""
+    rows = []
+    seen = set()
+    for item in items:
+        name = (item.get('name') or '').strip()
+        country = (item.get('country') or '').strip()
+        if not name:
+            continue
+        normalized = normalize_name(name)
+        domain = _primary_domain(item)
+        key = (normalized, country.lower(), domain)
+        if key in seen:
+            continue
+        seen.add(key)
+        rows.append(RegistryUniversity(
+            name=name[:255],
+            normalized_name=normalized[:255],
+            country=country[:100],
+            country_key=country.lower()[:100],
+            alpha_two_code=(item.get('alpha_two_code') or '')[:2],
+            state_province=(item.get('state-province') or '')[:100],
+            primary_domain=domain[:255],
+            domains=item.get('domains') or [],
+            web_pages=item.get('web_pages') or [],
+            synced_at=synced_at,
+        ))
+    return rows
+
+
+def sync_registry(session, force=False, source_url=HIPO_GITHUB_URL):
+    """
+    Refresh the registry from `source_url`. Returns a dict with a `status` of
+    'not_modified' or 'updated' and the row count.
+    """
+    state, _ = RegistrySyncState.objects.get_or_create(source_url=source_url)
+    now = timezone.now()
+    headers = {}
+    if not force and RegistryUniversity.objects.exists():
+        if state.etag:
+            headers['If-None-Match'] = state.etag
+        if state.last_modified:
+            headers['If-Modified-Since'] = state.last_modified
+
+    resp = session.get(source_url, headers=headers, timeout=60)
+    state.last_checked_at = now
+    if resp.status_code == 304:
+        state.save(update_fields=['last_checked_at'])
+        return {'status': 'not_modified', 'rows': state.row_count}
+    resp.raise_for_status()
+
+    state.etag = resp.headers.get('ETag', '')
+    state.last_modified = resp.headers.get('Last-Modified', '')
+    content_hash = hashlib.sha256(resp.content).hexdigest()
+    if content_hash == state.content_hash and not force:
+        # Validators changed but the payload didn't (e.g. a CDN re-upload)
+        state.save(update_fields=['etag', 'last_modified', 'last_checked_at'])
+        return {'status': 'not_modified', 'rows': state.row_count}
+
+    rows = build_rows(json.loads(resp.content), now)
+    with transaction.atomic():
+        RegistryUniversity.objects.all().delete()
+        RegistryUniversity.objects.bulk_create(rows, batch_size=2000)
+        state.content_hash = content_hash
+        state.row_count = len(rows)
+        state.last_changed_at = now
+        state.save()
+    logger.info(f"University registry synced: {len(rows)} rows")
+    return {'status': 'updated', 'rows': len(rows)}
+
+
+def is_populated():
+    return RegistryUniversity.objects.exists()
+
+
+def candidates(country=None):
+    """Registry entries as Hipolabs-shaped dicts, optionally for one country."""
+    queryset = RegistryUniversity.objects.order_by('id')
+    if country:
+        queryset = queryset.filter(country_key=country.strip().lower())
+    return [u.as_candidate() for u in queryset.iterator(chunk_size=2000)]
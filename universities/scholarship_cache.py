@@ -0,0 +1,276 @@
+"""
+Stale-while-revalidate cache in front of the ScholarshipOwl API.
+
+The newest ScholarshipResult row of a country is the cached value; the Django
+cache holds a copy so a request costs one cache read. Depending on its age:
+
+- younger than SCHOLARSHIP_CACHE_SOFT_TTL: served as is;
+- older: still served, and one refresh_scholarships task is queued to fetch
+  a new result in the background;
+- nothing stored yet: one request per country calls the API (bounded by
+  SCHOLARSHIPOWL_TIMEOUT_SECONDS) while concurrent requests for the same
+  country wait for its result instead of calling the API themselves.
+
+Only one upstream call per country is ever in flight; the lock is a
+`cache.add` key, so it is shared between processes when the cache backend is
+(see CACHE_REDIS_URL). A failed refresh (an error, or an empty result)
+leaves the lock to expire, which spaces out retries while the API is down,
+and the stale result keeps being served. prune_scholarship_results() bounds
+the stored history.
+
+The API is asked for max(limit, SCHOLARSHIP_FETCH_LIMIT) results and the
+entry remembers that limit. A request for more than a cached entry holds is
+treated as a miss, unless the API already returned fewer than were asked for.
+
+aget_scholarships() is the same for async views: the cold-miss call goes
+out over the shared httpx client and the waits don't hold a thread.
+"""
+import asyncio
+import logging
+import time
+from datetime import timedelta
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models.functions import Lower
+from django.utils import timezone
+
+from .models import ScholarshipResult
+from .scholarship_service import ScholarshipOwlService
+
+logger = logging.getLogger(__name__)
+
+# A cold miss that failed upstream is remembered this long, so an outage
+# doesn't turn every request into an API call
+NEGATIVE_TTL_SECONDS = 300
+WAIT_POLL_SECONDS = 0.1
+
+
+def _setting(name, default):
+    return getattr(settings, name, default)
+
+
+def _country_key(country):
+    return (country or '').strip().lower() or '_all'
+
+
+def _cache_key(country):
+    return f'scholarships:result:{_country_key(country)}'
+
+
+def _lock_key(country):
+    return f'scholarships:refresh-lock:{_country_key(country)}'
+
+
+def _hard_ttl():
+    return _setting('SCHOLARSHIP_CACHE_HARD_TTL', 7 * 86400)
+
+
+def _entry(result, limit=None):
+    # A stored result's fetch limit isn't kept; its size is the safe bound
+    data = result.scholarships_data
+    return {'data': data, 'fetched_at': result.fetched_at.timestamp(), 'limit': limit or len(data)}
+
+
+def _fetch_limit(limit):
+    return max(limit or 0, _setting('SCHOLARSHIP_FETCH_LIMIT', 10))
+
+
+def _covers(entry, limit):
+    """Whether `entry` can answer a request for `limit` results."""
+    fetched = entry.get('limit')
+    return fetched is None or fetched >= limit or len(entry['data']) < fetched
+
+
+def _failed_entry():
+    # Answers requests of any size until it expires
+    return {'data': [], 'fetched_at': time.time(), 'limit': None}
+
+
+def _load_latest(country):
+    """Newest stored result for `country` as a cache entry, or None."""
+    result = (
+        ScholarshipResult.objects.for_country(country)
+        .only('scholarships_data', 'fetched_at')
+        .order_by('-fetched_at')
+        .first()
+    )
+    return _entry(result) if result else None
+
+
+class EmptyResult(Exception):
+    """The API answered with no scholarships; the cached result is kept."""
+
+
+def _store(country, scholarships, service, limit):
+    formatted = service.format_for_university(scholarships)
+    if not formatted:
+        raise EmptyResult(f'no scholarships returned for {_country_key(country)}')
+    # Kept for admin viewing, and the source the cache is rebuilt from
+    result = ScholarshipResult.objects.create(
+        country=(country or '').strip(),
+        scholarships_data=formatted,
+        total_count=len(formatted),
+    )
+    entry = _entry(result, limit)
+    cache.set(_cache_key(country), entry, _hard_ttl())
+    return entry
+
+
+def fetch_and_store(country, limit=None):
+    """
+    Call the API for `country` and store the result. Returns the new cache
+    entry; raises requests.RequestException when the API fails and
+    EmptyResult when it returns nothing.
+    """
+    service = ScholarshipOwlService()
+    limit = _fetch_limit(limit)
+    scholarships = service.fetch_scholarships(country=country or None, limit=limit)
+    return _store(country, scholarships, service, limit)
+
+
+async def afetch_and_store(country, limit=None):
+    """fetch_and_store over the async client; raises httpx.HTTPError when the API fails."""
+    service = ScholarshipOwlService()
+    limit = _fetch_limit(limit)
+    scholarships = await service.afetch_scholarships(country=country or None, limit=limit)
+    return await sync_to_async(_store)(country, scholarships, service, limit)
+
+
+def refresh(country, limit=None):
+    """Background refresh of one country; the caller holds the refresh lock."""
+    try:
+        entry = fetch_and_store(country, limit)
+    except Exception as e:
+        # The lock is left to expire: it doubles as the retry back-off
+        logger.warning(f"Scholarship refresh for {_country_key(country)} failed: {e}")
+        return None
+    cache.delete(_lock_key(country))
+    return entry
+
+
+def _schedule_refresh(country, limit):
+    from .tasks import refresh_scholarships
+
+    if not cache.add(_lock_key(country), 1, _setting('SCHOLARSHIP_REFRESH_LOCK_SECONDS', 300)):
+        return
+    try:
+        refresh_scholarships.delay(country, limit)
+    except Exception as e:
+        logger.warning(f"Could not queue scholarship refresh for {_country_key(country)}: {e}")
+        cache.delete(_lock_key(country))
+
+
+def _fetch_coalesced(country, limit, stale=None):
+    """
+    Miss: one caller fetches, the others wait up to the API timeout for its
+    result. `stale` is an entry too small for `limit`; it is kept, and
+    served, when the fetch fails.
+    """
+    timeout = _setting('SCHOLARSHIPOWL_TIMEOUT_SECONDS', 5)
+    if cache.add(_lock_key(country), 1, timeout * 2):
+        try:
+            return fetch_and_store(country, limit)
+        except Exception as e:
+            logger.warning(f"Scholarship fetch for {_country_key(country)} failed: {e}")
+            if stale is not None:
+                return stale
+            entry = _failed_entry()
+            cache.set(_cache_key(country), entry, NEGATIVE_TTL_SECONDS)
+            return entry
+        finally:
+            cache.delete(_lock_key(country))
+
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        time.sleep(WAIT_POLL_SECONDS)
+        entry = cache.get(_cache_key(country))
+        if entry is not None and _covers(entry, limit):
+            return entry
+    return stale
+
+
+def get_scholarships(country, limit=10):
+    """Formatted scholarships for `country`, served from the cache (see module docstring)."""
+    entry = cache.get(_cache_key(country))
+    if entry is None:
+        entry = _load_latest(country)
+        if entry is not None:
+            cache.set(_cache_key(country), entry, _hard_ttl())
+    if entry is None or not _covers(entry, limit):
+        entry = _fetch_coalesced(country, limit, stale=entry)
+    elif time.time() - entry['fetched_at'] > _setting('SCHOLARSHIP_CACHE_SOFT_TTL', 6 * 3600):
+        _schedule_refresh(country, entry.get('limit'))
+    return (entry or {}).get('data', [])[:limit]
+
+
+async def _afetch_coalesced(country, limit, stale=None):
+    timeout = _setting('SCHOLARSHIPOWL_TIMEOUT_SECONDS', 5)
+    if await cache.aadd(_lock_key(country), 1, timeout * 2):
+        try:
+            return await afetch_and_store(country, limit)
+        except Exception as e:
+            logger.warning(f"Scholarship fetch for {_country_key(country)} failed: {e}")
+            if stale is not None:
+                return stale
+            entry = _failed_entry()
+            await cache.aset(_cache_key(country), entry, NEGATIVE_TTL_SECONDS)
+            return entry
+        finally:
+            await cache.adelete(_lock_key(country))
+
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        await asyncio.sleep(WAIT_POLL_SECONDS)
+        entry = await cache.aget(_cache_key(country))
+        if entry is not None and _covers(entry, limit):
+            return entry
+    return stale
+
+
+async def aget_scholarships(country, limit=10):
+    """get_scholarships for async callers."""
+    entry = await cache.aget(_cache_key(country))
+    if entry is None:
+        entry = await sync_to_async(_load_latest)(country)
+        if entry is not None:
+            await cache.aset(_cache_key(country), entry, _hard_ttl())
+    if entry is None or not _covers(entry, limit):
+        entry = await _afetch_coalesced(country, limit, stale=entry)
+    elif time.time() - entry['fetched_at'] > _setting('SCHOLARSHIP_CACHE_SOFT_TTL', 6 * 3600):
+        await sync_to_async(_schedule_refresh)(country, entry.get('limit'))
+    return (entry or {}).get('data', [])[:limit]
+
+
+def prune_scholarship_results(max_age_days=None, keep_per_country=None):
+    """
+    Drop ScholarshipResult rows older than `max_age_days` and keep at most
+    `keep_per_country` per country; the newest row of a country is always
+    kept since it is what the cache serves. Returns the number deleted.
+    """
+    max_age_days = max_age_days or _setting('SCHOLARSHIP_RESULTS_MAX_AGE_DAYS', 30)
+    keep_per_country = keep_per_country or _setting('SCHOLARSHIP_RESULTS_KEEP_PER_COUNTRY', 5)
+    cutoff = timezone.now() - timedelta(days=max_age_days)
+
+    deleted = 0
+    to_delete = []
+    current = None
+    seen = 0
+    rows = (
+        ScholarshipResult.objects.annotate(country_key=Lower('country'))
+        .order_by('country_key', '-fetched_at')
+        .values_list('pk', 'country_key', 'fetched_at')
+    )
+    for pk, country_key, fetched_at in rows.iterator(chunk_size=2000):
+        if country_key != current:
+            current, seen = country_key, 0
+        seen += 1
+        if seen > 1 and (seen > keep_per_country or fetched_at < cutoff):
+            to_delete.append(pk)
+        if len(to_delete) >= 1000:
+            deleted += ScholarshipResult.objects.filter(pk__in=to_delete).delete()[0]
+            to_delete = []
+    if to_delete:
+        deleted += ScholarshipResult.objects.filter(pk__in=to_delete).delete()[0]
+    return deleted
@@ -1,31 +1,66 @@
+import httpx
 import requests
 from django.conf import settings
+from requests_cache.patcher import OriginalSession
 
 class ScholarshipOwlService:
     BASE_URL = 'https://api.scholarshipowl.com/v1'
     
-    def __init__(self, api_key=None):
+    def __init__(self, api_key=None, timeout=None):
         self.api_key = api_key or getattr(settings, 'SCHOLARSHIPOWL_API_KEY', None)
+        self.timeout = timeout or getattr(settings, 'SCHOLARSHIPOWL_TIMEOUT_SECONDS', 5)
         self.headers = {
             'Authorization': f'Bearer {self.api_key}',
             'Content-Type': 'application/json'
         }
     
-    def get_scholarships(self, country=None, limit=10):
-        """Fetch scholarships, optionally filtered by country"""
+    def fetch_scholarships(self, country=None, limit=10):
+        """Fetch scholarships, optionally filtered by country. Raises requests.RequestException on failure."""
         params = {'limit': limit}
         if country:
             params['country'] = country
-            
-        response = requests.get(
+
+        # Bypasses the scrapers' global HTTP cache; freshness is handled by
+        # universities.scholarship_cache
+        with OriginalSession() as session:
+            response = session.get(
+                f'{self.BASE_URL}/scholarships',
+                headers=self.headers,
+                params=params,
+                timeout=self.timeout,
+            )
+        response.raise_for_status()
+        try:
+            return response.json().get('data', [])
+        except ValueError as e:
+            raise requests.RequestException(f'Invalid ScholarshipOwl response: {e}') from e
+
+    async def afetch_scholarships(self, country=None, limit=10):
+        """fetch_scholarships over the shared async HTTP client. Raises httpx.HTTPError on failure."""
+        from .async_http import get_client
+
+        params = {'limit': limit}
+        if country:
+            params['country'] = country
+
+        response = await get_client('scholarshipowl').get(
             f'{self.BASE_URL}/scholarships',
             headers=self.headers,
-            params=params
+            params=params,
+            timeout=self.timeout,
         )
-        
-        if response.status_code == 200:
+        response.raise_for_status()
+        try:
             return response.json().get('data', [])
-        return []
+        except ValueError as e:
+            raise httpx.DecodingError(f'Invalid ScholarshipOwl response: {e}', request=response.request) from e
+
+    def get_scholarships(self, country=None, limit=10):
+        """Fetch scholarships, optionally filtered by country; [] when the API fails"""
+        try:
+            return self.fetch_scholarships(country=country, limit=limit)
+        except requests.RequestException:
+            return []
     
     def format_for_university(self, scholarships):
         """Format scholarships for University model"""
@@ -0,0 +1,124 @@
+"""
+Scraping helpers shared by the university scrape endpoint, the seeding job and
+the batch management commands.
+"""
+import asyncio
+import os
+import json
+import requests
+import requests_cache
+from requests_cache.patcher import OriginalSession
+from tenacity import retry, stop_after_attempt, wait_exponential
+from .browser_pool import browser_available
+from .pipeline import ScrapePipeline, process_stats
+from scrapegraph_py import Client as SGAIClient
+
+
+# Enable a simple HTTP cache to stabilize repeated scrapes
+requests_cache.install_cache('scrape_cache', backend='sqlite', expire_after=86400)
+
+# Resilient network fetch with retries/backoff. Used for API payloads such as
+# the Hipolabs list, which go through the HTTP cache.
+@retry(stop=stop_after_attempt(3), wait=wait_exponential(multiplier=0.5, min=1, max=4))
+def fetch_json(url):
+    return requests.get(url, timeout=20)
+
+def new_http_session():
+    """
+    A plain requests session that bypasses the global scrape cache, for
+    callers that need real conditional GETs or streaming.
+    """
+    session = OriginalSession()
+    session.headers['User-Agent'] = 'Mozilla/5.0 (compatible; UniFinderBot/1.0)'
+    return session
+
+# Optional ScrapeGraphAI provider
+
+def _scrape_with_sgai(url: str) -> dict:
+    api_key = os.environ.get('SGAI_API_KEY')
+    if not api_key:
+        raise RuntimeError('SGAI_API_KEY not set in environment')
+    client = SGAIClient(api_key=api_key)
+    prompt = (
+        'Extract university data as a single JSON object with exactly these keys: '
+        'name, country, city, course_offered, application_fee, tuition_fee, intakes, '
+        'bachelor_programs, masters_programs, scholarships, university_link, application_link, description. '
+        'Fees should be numeric. Programs and scholarships should be arrays. '
+        'Do not include explanations; only return pure JSON.'
+    )
+    data = client.smartscraper(website_url=url, user_prompt=prompt)
+    if isinstance(data, dict):
+        return data
+    try:
+        return json.loads(str(data))
+    except Exception:
+        return {}
+
+
+def scrape_university(start_url, provider=''):
+    """
+    Scrape a university website starting at `start_url` and return a dict
+    approximating the University schema. Unless ScrapeGraphAI is requested
+    (and returns enough), this runs the same staged pipeline as the batch
+    commands (see universities.pipeline), with extraction in this thread.
+
+    Raises ScrapeError when the start page cannot be fetched.
+    """
+    provider = (provider or '').lower()
+
+    # Try ScrapeGraphAI first when explicitly requested
+    if provider == 'sgai':
+        try:
+            sg = _scrape_with_sgai(start_url)
+            # Normalize output to our expected structure
+            def money(v):
+                try:
+                    return f"{float(v):.2f}"
+                except Exception:
+                    return "0.00"
+            data = {
+                'id': None,
+                'name': sg.get('name') or '',
+                'country': sg.get('country') or '',
+                'city': sg.get('city') or '',
+                'course_offered': sg.get('course_offered') or '',
+                'application_fee': money(sg.get('application_fee')),
+                'tuition_fee': money(sg.get('tuition_fee')),
+                'intakes': sg.get('intakes') or [],
+                'bachelor_programs': sg.get('bachelor_programs') or [],
+                'masters_programs': sg.get('masters_programs') or [],
+                'scholarships': sg.get('scholarships') or [],
+                'university_link': sg.get('university_link') or start_url,
+                'application_link': sg.get('application_link') or start_url,
+                'description': sg.get('description') or '',
+                '_meta': {k: {'source': 'sgai', 'confidence': 0.9} for k in ['name','country','city','course_offered','application_fee','tuition_fee','intakes','bachelor_programs','masters_programs','scholarships','university_link','application_link','description']}
+            }
+            # Require minimum fields; otherwise fallback
+            if data['name'] and data['country']:
+                return data
+        except Exception:
+            pass  # fall through to next provider
+
+    # Built-in extraction: the staged pipeline, inline for a single URL
+    render_js = provider in ('c4ai', 'browser') and browser_available()
+    pipeline = ScrapePipeline(io_workers=1, cpu_workers=0, render_js=render_js, stats=process_stats)
+    data = pipeline.scrape_one(start_url)
+    data['id'] = None
+    return data
+
+
+async def ascrape_university(start_url, provider=''):
+    """
+    scrape_university() for async views. The built-in pipeline fetches over
+    the shared async HTTP client (see ScrapePipeline.ascrape_one);
+    ScrapeGraphAI and browser rendering are sync clients and run in a
+    worker thread.
+    """
+    provider = (provider or '').lower()
+    render_js = provider in ('c4ai', 'browser') and browser_available()
+    if provider == 'sgai' or render_js:
+        return await asyncio.to_thread(scrape_university, start_url, provider)
+    pipeline = ScrapePipeline(io_workers=1, cpu_workers=0, stats=process_stats)
+    data = await pipeline.ascrape_one(start_url)
+    data['id'] = None
+    return data
@@ -0,0 +1,244 @@
+"""
+Background seeding of universities from the Hipolabs list.
+
+Candidates are scraped concurrently by a thread pool (scraping is network
+bound) while the calling thread owns all database work: it filters out
+existing universities, persists scraped rows in batches and keeps the
+UniversitySeedJob counters current so the status endpoint can report progress.
+"""
+import logging
+import threading
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor, ALL_COMPLETED, FIRST_COMPLETED, wait
+from urllib.parse import urlparse
+
+import requests
+from django.conf import settings
+from django.db import connection
+from django.db.models import F
+from django.utils import timezone
+
+from . import registry
+from .geo import country_name
+from .models import University, UniversitySeedJob
+from .registry import HIPO_GITHUB_URL
+from .scraping import fetch_json, scrape_university
+from .serializers import UniversitySerializer
+
+logger = logging.getLogger(__name__)
+
+HIPO_API_URL = 'http://universities.hipolabs.com/search'
+
+# Only the most recent errors are kept on the job row
+MAX_STORED_ERRORS = 50
+
+
+def fetch_seed_candidates(source='hipo_api', country=None):
+    """
+    Return the raw candidate list for a seed run. Both Hipolabs sources are
+    served from the local registry once it has been synced; the network is
+    only used while it is still empty.
+    """
+    if registry.is_populated():
+        return registry.candidates(country)
+
+    if source == 'hipo_github':
+        resp = fetch_json(HIPO_GITHUB_URL)
+        resp.raise_for_status()
+        items = resp.json()
+        if country:
+            wanted = country.strip().lower()
+            items = [it for it in items if (it.get('country') or '').strip().lower() == wanted]
+        return items
+
+    params = {'country': country} if country else {}
+    resp = fetch_json(HIPO_API_URL + ('' if not params else '?' + requests.compat.urlencode(params)))
+    resp.raise_for_status()
+    return resp.json()
+
+
+def _candidate_home(item):
+    web_pages = item.get('web_pages') or []
+    return web_pages[0] if web_pages else None
+
+
+def _domain(url):
+    try:
+        return urlparse(url).netloc.lower()
+    except Exception:
+        return ''
+
+
+class _HostLimiter:
+    """Caps the number of concurrent scrapes against a single host."""
+
+    def __init__(self, per_host):
+        self._lock = threading.Lock()
+        self._semaphores = defaultdict(lambda: threading.BoundedSemaphore(per_host))
+
+    def get(self, host):
+        with self._lock:
+            return self._semaphores[host]
+
+
+def _scrape_candidate(limiter, name, country, home):
+    try:
+        with limiter.get(_domain(home)):
+            data = scrape_university(home)
+    finally:
+        # Worker threads open their own connections; don't leak them
+        connection.close()
+    # Registry values are more reliable than what the page heuristics produce
+    data['name'] = name or data.get('name') or ''
+    data['country'] = country or data.get('country') or ''
+    if not data.get('university_link'):
+        data['university_link'] = home
+    return data
+
+
+class SeedRunner:
+    """Executes a single UniversitySeedJob."""
+
+    def __init__(self, job, workers=None, per_host=None, batch_size=None):
+        self.job = job
+        self.workers = workers or getattr(settings, 'UNIVERSITY_SEED_WORKERS', 8)
+        self.per_host = per_host or getattr(settings, 'UNIVERSITY_SEED_PER_HOST_LIMIT', 2)
+        self.batch_size = batch_size or getattr(settings, 'UNIVERSITY_SEED_BATCH_SIZE', 25)
+        self._pending_rows = []
+        self._pending_errors = []
+        self._counts = defaultdict(int)
+
+    def run(self):
+        job = self.job
+        UniversitySeedJob.objects.filter(pk=job.pk).update(status='running', started_at=timezone.now())
+
+        try:
+            items = fetch_seed_candidates(job.source, job.country or None)
+        except Exception as e:
+            logger.error(f"Seed job {job.pk}: failed to fetch candidates: {e}")
+            UniversitySeedJob.objects.filter(pk=job.pk).update(
+                status='failed',
+                errors=[{'name': '', 'url': '', 'error': f'Failed to fetch candidates: {e}'}],
+                finished_at=timezone.now(),
+            )
+            return
+
+        try:
+            self._seed(job, items)
+        except Exception as e:
+            logger.exception(f"Seed job {job.pk} failed")
+            self._pending_errors.append({'name': '', 'url': '', 'error': f'Seed run failed: {e}'[:500]})
+            try:
+                # Keep the progress made so far; the batch that broke the run is dropped
+                self._pending_rows = []
+                self._flush(rows=False)
+            except Exception:
+                logger.exception(f"Seed job {job.pk}: failed to store its progress")
+            UniversitySeedJob.objects.filter(pk=job.pk).update(finished_at=timezone.now())
+            UniversitySeedJob.objects.filter(pk=job.pk, status='running').update(status='failed')
+            return
+
+        # A job cancelled through the API keeps its 'cancelled' status
+        UniversitySeedJob.objects.filter(pk=job.pk).update(finished_at=timezone.now())
+        UniversitySeedJob.objects.filter(pk=job.pk, status='running').update(status='completed')
+
+    def _seed(self, job, items):
+        if job.limit:
+            items = items[:job.limit]
+        UniversitySeedJob.objects.filter(pk=job.pk).update(total_candidates=len(items))
+
+        existing_names = set()
+        existing_domains = set()
+        for name, link in University.objects.values_list('name', 'university_link').iterator():
+            if name:
+                existing_names.add(name.strip().lower())
+            dom = _domain(link or '')
+            if dom:
+                existing_domains.add(dom)
+
+        limiter = _HostLimiter(self.per_host)
+        in_flight = {}
+        max_in_flight = self.workers * 2
+        cancelled = False
+
+        with ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix='seed') as pool:
+            for it in items:
+                name = (it.get('name') or '').strip()
+                country = (it.get('country') or '').strip() or country_name(it.get('alpha_two_code'))
+                home = _candidate_home(it)
+                if not name or not home:
+                    self._counts['processed'] += 1
+                    continue
+
+                dom = _domain(home)
+                if name.lower() in existing_names or (dom and dom in existing_domains):
+                    self._counts['skipped_existing'] += 1
+                    self._counts['processed'] += 1
+                    continue
+                # Guard against duplicates inside the candidate list itself
+                existing_names.add(name.lower())
+                if dom:
+                    existing_domains.add(dom)
+
+                future = pool.submit(_scrape_candidate, limiter, name, country, home)
+                in_flight[future] = (name, home)
+
+                # Keep the number of queued scrapes bounded so huge candidate
+                # lists don't pile up futures in memory.
+                if len(in_flight) >= max_in_flight:
+                    self._drain(in_flight, return_when=FIRST_COMPLETED)
+                    if self._is_cancelled():
+                        cancelled = True
+                        break
+
+            # Cancelling also stops a job whose queue is draining, or whose
+            # candidates never filled it
+            while in_flight and not cancelled:
+                self._drain(in_flight, return_when=FIRST_COMPLETED)
+                cancelled = self._is_cancelled()
+            if cancelled:
+                for future in in_flight:
+                    future.cancel()
+            self._drain(in_flight)
+
+        self._flush()
+
+    def _drain(self, in_flight, return_when=None):
+        done, _ = wait(list(in_flight), return_when=return_when or ALL_COMPLETED)
+        for future in done:
+            name, home = in_flight.pop(future)
+            if future.cancelled():
+                continue
+            try:
+                data = future.result()
+                ser = UniversitySerializer(data=data)
+                ser.is_valid(raise_exception=True)
+                self._pending_rows.append(University(**ser.validated_data))
+            except Exception as e:
+                self._counts['failed'] += 1
+                self._pending_errors.append({'name': name, 'url': home, 'error': str(e)[:500]})
+            self._counts['processed'] += 1
+            if len(self._pending_rows) >= self.batch_size:
+                self._flush()
+        # Progress counters are cheap to write, so keep them current even
+        # when no rows were persisted in this round.
+        if self._counts or self._pending_errors:
+            self._flush(rows=False)
+
+    def _flush(self, rows=True):
+        if rows and self._pending_rows:
+            University.objects.bulk_create(self._pending_rows, batch_size=self.batch_size)
+            self._counts['created'] += len(self._pending_rows)
+            self._pending_rows = []
+
+        updates = {field: F(field) + value for field, value in self._counts.items() if value}
+        if self._pending_errors:
+            self.job.refresh_from_db(fields=['errors'])
+            updates['errors'] = (self.job.errors + self._pending_errors)[-MAX_STORED_ERRORS:]
+            self._pending_errors = []
+        if updates:
+            UniversitySeedJob.objects.filter(pk=self.job.pk).update(**updates)
+        self._counts = defaultdict(int)
+
+    def _is_cancelled(self):
+        return UniversitySeedJob.objects.filter(pk=self.job.pk, status='cancelled').exists()
@@ -1,12 +1,15 @@
 from rest_framework import serializers
-from .models import University, UserDashboard, ScholarshipResult, CountryJobSite, ApplicationDraft
+from .models import University, UserDashboard, ScholarshipResult, CountryJobSite, ApplicationDraft, UniversitySeedJob
 from django.contrib.auth.models import User, Group
 from django.contrib.auth import authenticate
-from django.core.exceptions import ValidationError, ObjectDoesNotExist
-from django.core.validators import validate_email
-from rest_framework_simplejwt.serializers import TokenObtainPairSerializer
+from django.core.exceptions import ObjectDoesNotExist
+from django.utils import timezone
+from rest_framework_simplejwt.serializers import TokenObtainPairSerializer, TokenRefreshSerializer
+from rest_framework_simplejwt.exceptions import InvalidToken
+from rest_framework_simplejwt.tokens import AccessToken
 from rest_framework_simplejwt.settings import api_settings
 from profiles.models import Profile
+from . import entitlements, token_claims
 
 
 class UserSerializer(serializers.ModelSerializer):
@@ -245,44 +248,18 @@ class UserDashboardSerializer(serializers.ModelSerializer):
 
 class MyTokenObtainPairSerializer(TokenObtainPairSerializer):
     def validate(self, attrs):
-        # The frontend can send either a username or an email in the 'username' field.
-        username_or_email = attrs.get(self.username_field)
-        password = attrs.get('password')
-        user = None
-
-        # Check if the input looks like an email
-        try:
-            validate_email(username_or_email)
-            is_email = True
-        except ValidationError:
-            is_email = False
-
-        if is_email:
-            # Try to find a user with this email (case-insensitive).
-            try:
-                user_obj = User.objects.get(email__iexact=username_or_email)
-                if user_obj.check_password(password):
-                    user = user_obj
-            except User.DoesNotExist:
-                # Fall through to the default authentication method.
-                pass
-
-        # If not authenticated by email, or if it wasn't an email, try case-insensitive username authentication.
+        # The frontend can send either a username or an email in the 'username' field;
+        # UsernameOrEmailBackend resolves both in one query.
+        user = authenticate(
+            request=self.context.get('request'),
+            username=attrs.get(self.username_field),
+            password=attrs.get('password'),
+        )
         if not user:
-            try:
-                user_obj = User.objects.get(username__iexact=username_or_email)
-                if user_obj.check_password(password):
-                    user = user_obj
-            except User.DoesNotExist:
-                pass
-
-        if not user or not user.is_active:
             raise serializers.ValidationError('No active account found with the given credentials.')
 
-        # Ensure UserDashboard exists (create if missing with default 'none' subscription status)
-        dashboard, created = UserDashboard.objects.get_or_create(user=user)
-        if created:
-            print(f"Created UserDashboard for user {user.username} with default subscription status: {dashboard.subscription_status}")
+        # An UPDATE rather than user.save(), which would run every User post_save receiver
+        User.objects.filter(pk=user.pk).update(last_login=timezone.now())
 
         self.user = user
 
@@ -295,26 +272,30 @@ class MyTokenObtainPairSerializer(TokenObtainPairSerializer):
     @classmethod
     def get_token(cls, user):
         token = super().get_token(user)
-        # The `get_or_create` is a safeguard in case the post_save signal for profile creation failed.
-        profile, created = Profile.objects.get_or_create(user=user)
-        # Add custom claims
-        token['username'] = user.username
-        token['email'] = user.email
-        token['is_staff'] = user.is_staff
-        token['groups'] = list(user.groups.values_list('name', flat=True))
-
-        # Safely get the profile picture URL.
-        # This prevents errors in production if the file is missing from storage.
-        try:
-            token['profile_picture'] = profile.profile_picture.url if profile.profile_picture else None
-        except (ValueError, AttributeError):
-            token['profile_picture'] = None
+        # Add custom claims (cached; see token_claims)
+        for name, value in token_claims.user_claims(user).items():
+            token[name] = value
 
-        token['first_name'] = user.first_name
-        token['last_name'] = user.last_name
+        # Subscription status and end date, for HasSubscriptionClaim
+        entitlements.add_claims(token, user)
 
         return token
 
+class MyTokenRefreshSerializer(TokenRefreshSerializer):
+    """Refreshed access tokens carry the current entitlement claims, not the refresh token's."""
+
+    def validate(self, attrs):
+        # simplejwt's own validate() also looks the user up, unguarded
+        try:
+            data = super().validate(attrs)
+            access = AccessToken(data['access'])
+            user = User.objects.select_related('dashboard').get(pk=access[api_settings.USER_ID_CLAIM])
+        except User.DoesNotExist:
+            raise InvalidToken('User not found')
+        entitlements.add_claims(access, user)
+        data['access'] = str(access)
+        return data
+
 class ScholarshipResultSerializer(serializers.ModelSerializer):
     class Meta:
         model = ScholarshipResult
@@ -330,4 +311,31 @@ class ApplicationDraftSerializer(serializers.ModelSerializer):
     class Meta:
         model = ApplicationDraft
         fields = ['id', 'email', 'full_name', 'phone', 'country', 'raw_payload', 'payment_tx_ref', 'created_at']
-        read_only_fields = ['id', 'created_at']
\ No newline at end of file
+        read_only_fields = ['id', 'created_at']
+
+
+class UniversitySeedJobSerializer(serializers.ModelSerializer):
+    duration_seconds = serializers.SerializerMethodField()
+    universities_per_minute = serializers.SerializerMethodField()
+
+    class Meta:
+        model = UniversitySeedJob
+        fields = [
+            'id', 'country', 'source', 'limit', 'status', 'total_candidates', 'processed',
+            'created', 'skipped_existing', 'failed', 'errors', 'created_at', 'started_at',
+            'finished_at', 'duration_seconds', 'universities_per_minute',
+        ]
+        read_only_fields = fields
+
+    def get_duration_seconds(self, obj):
+        from django.utils import timezone
+        if not obj.started_at:
+            return 0
+        end = obj.finished_at or timezone.now()
+        return int((end - obj.started_at).total_seconds())
+
+    def get_universities_per_minute(self, obj):
+        seconds = self.get_duration_seconds(obj)
+        if not seconds:
+            return 0.0
+        return round(obj.processed * 60 / seconds, 2)
@@ -0,0 +1,162 @@
+"""
+Raw page snapshot store.
+
+Every page fetched by the scrapers can be kept as a PageSnapshot so extraction
+can be re-run later without touching the network. Bodies are compressed and
+content-addressed: a PageSnapshotBlob is keyed by the SHA-256 of the raw bytes,
+so a page that did not change between fetches costs one small metadata row.
+zstd is used when the `zstandard` package is installed, zlib otherwise; the
+codec is stored per blob so both can be read back.
+
+Capture is off unless SCRAPE_SNAPSHOTS_ENABLED is set. Retention is bounded by
+SCRAPE_SNAPSHOT_MAX_AGE_DAYS and SCRAPE_SNAPSHOT_MAX_PER_URL and enforced by
+prune_snapshots(), which the periodic task runs daily.
+"""
+import hashlib
+import logging
+import zlib
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.db.models import OuterRef, Subquery
+from django.utils import timezone
+
+from .models import PageSnapshot, PageSnapshotBlob
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+logger = logging.getLogger(__name__)
+
+ZLIB_LEVEL = 6
+ZSTD_LEVEL = 10
+
+
+class SnapshotNotFound(Exception):
+    pass
+
+
+def snapshots_enabled():
+    return getattr(settings, 'SCRAPE_SNAPSHOTS_ENABLED', False)
+
+
+def compress(raw):
+    """Return (codec, data) for the given bytes."""
+    if zstandard is not None:
+        return 'zstd', zstandard.ZstdCompressor(level=ZSTD_LEVEL).compress(raw)
+    return 'zlib', zlib.compress(raw, ZLIB_LEVEL)
+
+
+def decompress(codec, data):
+    data = bytes(data)
+    if codec == 'zlib':
+        return zlib.decompress(data)
+    if codec == 'zstd':
+        if zstandard is None:
+            raise RuntimeError('Snapshot is zstd-compressed but the zstandard package is not installed')
+        return zstandard.ZstdDecompressor().decompress(data)
+    raise ValueError(f'Unknown snapshot codec: {codec}')
+
+
+def _get_or_create_blob(raw):
+    content_hash = hashlib.sha256(raw).hexdigest()
+    blob = PageSnapshotBlob.objects.filter(content_hash=content_hash).only('id').first()
+    if blob:
+        return blob
+    codec, data = compress(raw)
+    try:
+        with transaction.atomic():
+            return PageSnapshotBlob.objects.create(
+                content_hash=content_hash, codec=codec, data=data,
+                raw_size=len(raw), compressed_size=len(data),
+            )
+    except IntegrityError:
+        # Another worker stored the same body first
+        return PageSnapshotBlob.objects.only('id').get(content_hash=content_hash)
+
+
+def save_snapshot(url, response):
+    """
+    Store the body of a successful HTML response. When the latest snapshot of
+    `url` already points at the same body only its fetch time is bumped.
+    """
+    content_type = response.headers.get('Content-Type', '')
+    if response.status_code != 200 or (content_type and 'html' not in content_type.lower()):
+        return None
+    blob = _get_or_create_blob(response.content)
+    now = timezone.now()
+    latest = PageSnapshot.objects.filter(url=url).only('id', 'blob_id').first()
+    if latest and latest.blob_id == blob.id:
+        PageSnapshot.objects.filter(pk=latest.pk).update(fetched_at=now)
+        return latest
+    elapsed = getattr(response, 'elapsed', None)
+    return PageSnapshot.objects.create(
+        url=url,
+        blob=blob,
+        status_code=response.status_code,
+        content_type=content_type[:100],
+        encoding=(response.encoding or '')[:40],
+        final_url=(response.url or '')[:500] if response.url != url else '',
+        elapsed_ms=int(elapsed.total_seconds() * 1000) if elapsed else 0,
+        fetched_at=now,
+    )
+
+
+def capture(url, response):
+    """Best-effort snapshot hook for the scrapers; never breaks a scrape."""
+    if not snapshots_enabled():
+        return
+    try:
+        save_snapshot(url, response)
+    except Exception as e:
+        logger.warning(f"Could not store snapshot of {url}: {e}")
+
+
+def load_html(url):
+    """Decoded HTML of the most recent snapshot of `url`."""
+    snapshot = PageSnapshot.objects.filter(url=url).select_related('blob').first()
+    if snapshot is None:
+        raise SnapshotNotFound(f'No snapshot for {url}')
+    raw = decompress(snapshot.blob.codec, snapshot.blob.data)
+    return raw.decode(snapshot.encoding or 'utf-8', errors='replace')
+
+
+def prune_snapshots(max_age_days=None, max_per_url=None):
+    """
+    Apply the retention limits: drop snapshots older than `max_age_days`
+    (the newest snapshot of each URL is always kept), keep at most
+    `max_per_url` snapshots per URL, then delete blobs nothing points at.
+    Returns (snapshots_deleted, blobs_deleted).
+    """
+    max_age_days = max_age_days or getattr(settings, 'SCRAPE_SNAPSHOT_MAX_AGE_DAYS', 90)
+    max_per_url = max_per_url or getattr(settings, 'SCRAPE_SNAPSHOT_MAX_PER_URL', 3)
+
+    newest = PageSnapshot.objects.filter(url=OuterRef('url')).order_by('-fetched_at')
+    cutoff = timezone.now() - timedelta(days=max_age_days)
+    deleted, _ = (
+        PageSnapshot.objects.filter(fetched_at__lt=cutoff)
+        .exclude(pk=Subquery(newest.values('pk')[:1]))
+        .delete()
+    )
+
+    # Per-URL cap: the (url, -fetched_at) index serves the ordered scan
+    to_delete = []
+    current_url = None
+    seen = 0
+    for pk, url in PageSnapshot.objects.order_by('url', '-fetched_at').values_list('pk', 'url').iterator(chunk_size=2000):
+        if url != current_url:
+            current_url, seen = url, 0
+        seen += 1
+        if seen > max_per_url:
+            to_delete.append(pk)
+        if len(to_delete) >= 1000:
+            deleted += PageSnapshot.objects.filter(pk__in=to_delete).delete()[0]
+            to_delete = []
+    if to_delete:
+        deleted += PageSnapshot.objects.filter(pk__in=to_delete).delete()[0]
+
+    blobs_deleted, _ = PageSnapshotBlob.objects.filter(snapshots__isnull=True).delete()
+    return deleted, blobs_deleted
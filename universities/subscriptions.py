@@ -0,0 +1,63 @@
+"""
+Subscription lifecycle sweeps.
+
+A subscription is active through its end date. expire_lapsed() moves every
+dashboard past it to `expired` with one set-based UPDATE over the
+(subscription_status, subscription_end_date) index, so counts such as
+AdminStatsView's can read the status column. It runs hourly, so the status
+lags the end date by up to an hour; access checks (HasActiveSubscription,
+entitlements.is_entitled) also check the date. Superusers are never expired
+(payments.reconciliation keeps their dashboards active).
+
+queue_renewal_reminders() takes the subscriptions ending
+SUBSCRIPTION_REMINDER_DAYS from today off the same index and queues one
+send_renewal_reminders task per batch of users, instead of one task (or one
+email in the beat worker) per user.
+"""
+import logging
+from datetime import timedelta
+
+from django.conf import settings
+from django.utils import timezone
+
+from .models import UserDashboard
+
+logger = logging.getLogger(__name__)
+
+
+def expire_lapsed(today=None):
+    """Mark active subscriptions whose end date has passed as expired. Returns the number expired."""
+    today = today or timezone.now().date()
+    # Tokens minted for these dashboards already fail the end-date check of
+    # entitlements.is_entitled(), so nothing needs publishing
+    return (
+        UserDashboard.objects.filter(subscription_status='active', subscription_end_date__lt=today)
+        .exclude(user__is_superuser=True)
+        .update(subscription_status='expired')
+    )
+
+
+def expiring_on(day):
+    return UserDashboard.objects.filter(subscription_status='active', subscription_end_date=day)
+
+
+def queue_renewal_reminders(days_ahead=None, batch_size=None):
+    """Queue reminders for subscriptions ending `days_ahead` days from today. Returns (users, batches)."""
+    from .tasks import send_renewal_reminders
+
+    days_ahead = days_ahead if days_ahead is not None else getattr(settings, 'SUBSCRIPTION_REMINDER_DAYS', 7)
+    batch_size = batch_size or getattr(settings, 'SUBSCRIPTION_REMINDER_BATCH_SIZE', 500)
+    day = timezone.now().date() + timedelta(days=days_ahead)
+
+    users = batches = 0
+    batch = []
+    user_ids = expiring_on(day).order_by('user_id').values_list('user_id', flat=True)
+    for user_id in user_ids.iterator(chunk_size=batch_size):
+        batch.append(user_id)
+        if len(batch) >= batch_size:
+            send_renewal_reminders.delay(batch, day.isoformat())
+            users, batches, batch = users + len(batch), batches + 1, []
+    if batch:
+        send_renewal_reminders.delay(batch, day.isoformat())
+        users, batches = users + len(batch), batches + 1
+    return users, batches
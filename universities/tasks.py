@@ -1,9 +1,6 @@
 from celery import shared_task
 from django.core.mail import send_mail
 from django.contrib.auth.models import User
-from django.utils import timezone
-from datetime import timedelta
-from .models import UserDashboard
 
 @shared_task
 def send_welcome_email(user_id):
@@ -26,25 +23,38 @@ def send_welcome_email(user_id):
 @shared_task
 def check_subscription_expirations():
     """
-    A periodic task to find users whose subscriptions are expiring soon
-    and send them a reminder email.
-    DISABLED: Email sending is currently disabled to improve performance
+    Daily: queue renewal reminders, in batches, for subscriptions expiring
+    SUBSCRIPTION_REMINDER_DAYS from now.
     """
-    # Email sending disabled for now
-    reminder_date = timezone.now().date() + timedelta(days=7)
-    expiring_dashboards = UserDashboard.objects.filter(
-        subscription_status='active',
-        subscription_end_date=reminder_date
-    )
-    # Email sending code commented out
-    # for dashboard in expiring_dashboards:
-    #     user = dashboard.user
-    #     subject = 'Your Addis Temari Subscription is Expiring Soon'
-    #     message = f'Hi {user.username},\n\nYour subscription to Addis Temari is set to expire in 7 days. Please renew your subscription to continue enjoying uninterrupted access to all our features.\n\nBest regards,\nThe Addis Temari Team'
-    #     from_email = 'noreply@addistemari.com'
-    #     recipient_list = [user.email]
-    #     send_mail(subject, message, from_email, recipient_list)
-    return f"Email sending disabled. Found {expiring_dashboards.count()} expiring subscriptions."
+    from .subscriptions import queue_renewal_reminders
+
+    users, batches = queue_renewal_reminders()
+    return f"Queued renewal reminders for {users} expiring subscriptions in {batches} batches."
+
+@shared_task
+def send_renewal_reminders(user_ids, end_date):
+    """Sends one batch of renewal reminders; email sending is off unless SUBSCRIPTION_REMINDER_EMAILS_ENABLED."""
+    from django.conf import settings
+
+    if not getattr(settings, 'SUBSCRIPTION_REMINDER_EMAILS_ENABLED', False):
+        return f"Email sending disabled. {len(user_ids)} renewal reminders for subscriptions ending {end_date} not sent."
+    from emails.services import EmailService
+
+    # Re-checked here: a payment since the batch was queued moves the end date
+    users = User.objects.filter(
+        id__in=user_ids, dashboard__subscription_status='active', dashboard__subscription_end_date=end_date,
+    ).exclude(email='')
+    subject = 'Your Addis Temari Subscription is Expiring Soon'
+    body = f'Your subscription to Addis Temari expires on {end_date}. Please renew your subscription to continue enjoying uninterrupted access to all our features.\n\nBest regards,\nThe Addis Temari Team'
+    results = EmailService.send_bulk_email(users, subject, body)
+    return f"Sent {results['sent']} renewal reminders, {results['failed']} failed."
+
+@shared_task
+def expire_subscriptions():
+    """Hourly: moves subscriptions past their end date to expired (one UPDATE)."""
+    from .subscriptions import expire_lapsed
+
+    return f"Expired {expire_lapsed()} subscriptions."
 
 @shared_task
 def send_application_status_update_email(user_id, university_name, new_status):
@@ -66,4 +76,83 @@ def send_application_status_update_email(user_id, university_name, new_status):
     #     send_mail(subject, message, from_email, recipient_list)
     #     return f"Application status update email sent to {user.email} for {university_name}."
     # except User.DoesNotExist:
-    #     return f"User with id {user_id} does not exist."
\ No newline at end of file
+    #     return f"User with id {user_id} does not exist."
+
+@shared_task
+def seed_universities(job_id):
+    """Runs a UniversitySeedJob: scrapes Hipolabs candidates concurrently and stores new universities."""
+    from .models import UniversitySeedJob
+    from .seeding import SeedRunner
+
+    try:
+        job = UniversitySeedJob.objects.get(id=job_id)
+    except UniversitySeedJob.DoesNotExist:
+        return f"Seed job {job_id} does not exist."
+    if job.status != 'pending':
+        return f"Seed job {job_id} is already {job.status}."
+
+    SeedRunner(job).run()
+    job.refresh_from_db()
+    return f"Seed job {job_id} {job.status}: {job.created} created, {job.skipped_existing} skipped, {job.failed} failed."
+
+
+@shared_task
+def refresh_university_pages():
+    """
+    Periodic incremental refresh: re-checks due key pages with conditional GETs
+    and re-extracts only the ones whose content fingerprint changed.
+    """
+    from .refresh import refresh_due_pages
+
+    totals = refresh_due_pages()
+    return (
+        f"Checked {totals['checked']} pages of {totals['universities']} universities: "
+        f"{totals['changed']} changed, {totals['failed']} failed, {totals['fields_updated']} fields updated."
+    )
+
+
+@shared_task
+def prune_page_snapshots():
+    """Applies the page snapshot retention limits and drops unreferenced bodies."""
+    from .snapshots import prune_snapshots
+
+    snapshots, blobs = prune_snapshots()
+    return f"Pruned {snapshots} page snapshots and {blobs} unreferenced bodies."
+
+
+@shared_task
+def sync_university_registry():
+    """Periodic conditional re-download of the Hipolabs dataset into RegistryUniversity."""
+    from .registry import sync_registry
+    from .scraping import new_http_session
+
+    result = sync_registry(new_http_session())
+    return f"University registry {result['status']}: {result['rows']} universities."
+
+
+@shared_task
+def refresh_scholarships(country, limit=None):
+    """Background refresh queued when a country's cached scholarships pass the soft TTL."""
+    from .scholarship_cache import refresh
+
+    entry = refresh(country, limit)
+    if entry is None:
+        return f"Scholarship refresh for {country or 'all countries'} failed; serving the stale result."
+    return f"Refreshed scholarships for {country or 'all countries'}: {len(entry['data'])} results."
+
+
+@shared_task
+def prune_scholarship_results():
+    """Applies the ScholarshipResult retention limits."""
+    from .scholarship_cache import prune_scholarship_results as prune
+
+    return f"Pruned {prune()} scholarship results."
+
+
+@shared_task
+def purge_application_drafts():
+    """Archives and deletes old drafts whose payment has been processed."""
+    from .draft_retention import purge_drafts
+
+    drafts, files = purge_drafts()
+    return f"Purged {drafts} application drafts into {len(files)} archive files."
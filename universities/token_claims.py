@@ -0,0 +1,56 @@
+"""
+Profile claims put in every token by MyTokenObtainPairSerializer.get_token():
+names, email, staff flag, groups and profile picture.
+
+They are computed once and cached per user for TOKEN_CLAIMS_CACHE_SECONDS,
+so a repeat login reads no groups or profile. Receivers in
+universities.models drop the entry whenever a User, its Profile, its group
+membership or one of its groups is saved; `.update()` calls bypass them, so
+code changing those fields in bulk calls invalidate() itself. Subscription
+claims are not cached here (see entitlements).
+"""
+from django.conf import settings
+from django.core.cache import cache
+
+
+def _key(user_id):
+    return f'token_claims:{user_id}'
+
+
+def _profile_picture(user):
+    from profiles.models import Profile
+
+    try:
+        profile = user.profile
+    except Profile.DoesNotExist:
+        # A safeguard in case the post_save signal for profile creation failed
+        profile, _ = Profile.objects.get_or_create(user=user)
+    # This prevents errors in production if the file is missing from storage
+    try:
+        return profile.profile_picture.url if profile.profile_picture else None
+    except (ValueError, AttributeError):
+        return None
+
+
+def compute(user):
+    return {
+        'username': user.username,
+        'email': user.email,
+        'is_staff': user.is_staff,
+        'groups': list(user.groups.values_list('name', flat=True)),
+        'profile_picture': _profile_picture(user),
+        'first_name': user.first_name,
+        'last_name': user.last_name,
+    }
+
+
+def user_claims(user):
+    claims = cache.get(_key(user.pk))
+    if claims is None:
+        claims = compute(user)
+        cache.set(_key(user.pk), claims, getattr(settings, 'TOKEN_CLAIMS_CACHE_SECONDS', 3600))
+    return claims
+
+
+def invalidate(*user_ids):
+    cache.delete_many([_key(user_id) for user_id in user_ids])
@@ -8,6 +8,7 @@ router.register(r'job-sites', views.CountryJobSiteViewSet, basename='jobsite')
 urlpatterns = [
     # Authentication
     path('token/', views.MyTokenObtainPairView.as_view(), name='token_obtain_pair'),
+    path('token/refresh/', views.MyTokenRefreshView.as_view(), name='token_refresh'),
     path('register/', views.CreateUserView.as_view(), name='register'),
 
     # This single path now handles both GET (retrieve) and PUT/PATCH (update) for a university.
@@ -20,6 +21,8 @@ urlpatterns = [
     path('universities/bulk_create/', views.UniversityBulkCreate.as_view(), name='university-bulk-create'),
     path('universities/scrape/', views.UniversityScrapeView.as_view(), name='university-scrape'),
     path('universities/seed_from_api/', views.UniversitySeedFromAPI.as_view(), name='university-seed-from-api'),
+    path('universities/seed_jobs/', views.UniversitySeedJobList.as_view(), name='university-seed-job-list'),
+    path('universities/seed_jobs/<int:pk>/', views.UniversitySeedJobDetail.as_view(), name='university-seed-job-detail'),
 
     # Public/User-facing University Views
     path('universities/', views.UniversityList.as_view(), name='university-list'),
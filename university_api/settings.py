@@ -276,10 +276,153 @@ CELERY_TIMEZONE = 'UTC'
 CELERY_BEAT_SCHEDULER = 'django_celery_beat.schedulers:DatabaseScheduler'
 CELERY_BEAT_SCHEDULE = {
     'check-subscription-expiry-every-day': {
-        'task': 'profiles.tasks.check_subscription_expirations',
+        'task': 'universities.tasks.check_subscription_expirations',
         'schedule': 86400.0,  # Run once every 24 hours (in seconds)
     },
+    'expire-lapsed-subscriptions-every-hour': {
+        'task': 'universities.tasks.expire_subscriptions',
+        'schedule': 3600.0,  # One indexed UPDATE; usually touches no rows
+    },
+    'refresh-university-pages-every-hour': {
+        'task': 'universities.tasks.refresh_university_pages',
+        'schedule': 3600.0,  # Only pages that are due are checked on each run
+    },
+    'prune-page-snapshots-every-day': {
+        'task': 'universities.tasks.prune_page_snapshots',
+        'schedule': 86400.0,
+    },
+    'sync-university-registry-every-day': {
+        'task': 'universities.tasks.sync_university_registry',
+        'schedule': 86400.0,  # Conditional GET: a no-op unless the dataset changed
+    },
+    'prune-scholarship-results-every-day': {
+        'task': 'universities.tasks.prune_scholarship_results',
+        'schedule': 86400.0,
+    },
+    'purge-application-drafts-every-day': {
+        'task': 'universities.tasks.purge_application_drafts',
+        'schedule': 86400.0,  # Chunked, so it never holds a long lock on the table
+    },
+    'sweep-webhook-inbox-every-minute': {
+        'task': 'payments.tasks.process_pending_webhook_events',
+        'schedule': 60.0,  # Catches events whose task was lost and retries failures
+    },
+    'reconcile-unapplied-payments-every-5-minutes': {
+        'task': 'payments.tasks.reconcile_unapplied_payments',
+        'schedule': 300.0,  # Saved payments queue their own task; this catches lost ones
+    },
+    'reconcile-payments-with-chapa-every-30-minutes': {
+        'task': 'payments.tasks.reconcile_payments',
+        'schedule': 1800.0,  # Settles pending payments whose webhook never arrived
+    },
+    'rebuild-payment-rollups-every-day': {
+        'task': 'payments.tasks.rebuild_recent_payment_rollups',
+        'schedule': 86400.0,  # Corrects drift in the incrementally kept daily totals
+    },
 }
 
 # ScholarshipOwl API Configuration
 SCHOLARSHIPOWL_API_KEY = os.environ.get('SCHOLARSHIPOWL_API_KEY')
+SCHOLARSHIPOWL_TIMEOUT_SECONDS = float(os.environ.get('SCHOLARSHIPOWL_TIMEOUT_SECONDS', 5))
+
+# University seeding (universities.seeding)
+UNIVERSITY_SEED_WORKERS = int(os.environ.get('UNIVERSITY_SEED_WORKERS', 8))
+UNIVERSITY_SEED_PER_HOST_LIMIT = int(os.environ.get('UNIVERSITY_SEED_PER_HOST_LIMIT', 2))
+UNIVERSITY_SEED_BATCH_SIZE = int(os.environ.get('UNIVERSITY_SEED_BATCH_SIZE', 25))
+
+# Incremental catalog refresh (universities.refresh)
+UNIVERSITY_REFRESH_BATCH_SIZE = int(os.environ.get('UNIVERSITY_REFRESH_BATCH_SIZE', 200))
+UNIVERSITY_REFRESH_WORKERS = int(os.environ.get('UNIVERSITY_REFRESH_WORKERS', 8))
+
+# Raw page snapshots for offline re-extraction (universities.snapshots)
+SCRAPE_SNAPSHOTS_ENABLED = os.environ.get('SCRAPE_SNAPSHOTS_ENABLED', 'False').lower() == 'true'
+SCRAPE_SNAPSHOT_MAX_AGE_DAYS = int(os.environ.get('SCRAPE_SNAPSHOT_MAX_AGE_DAYS', 90))
+SCRAPE_SNAPSHOT_MAX_PER_URL = int(os.environ.get('SCRAPE_SNAPSHOT_MAX_PER_URL', 3))
+
+# Streaming page fetches (universities.fetching). HTML is cut off at the cap,
+# PDFs above theirs are skipped; PDF text extraction needs the pypdf package.
+SCRAPE_MAX_HTML_BYTES = int(os.environ.get('SCRAPE_MAX_HTML_BYTES', 5 * 1024 * 1024))
+SCRAPE_MAX_PDF_BYTES = int(os.environ.get('SCRAPE_MAX_PDF_BYTES', 20 * 1024 * 1024))
+SCRAPE_EXTRACT_PDF_TEXT = os.environ.get('SCRAPE_EXTRACT_PDF_TEXT', 'True').lower() == 'true'
+
+# Headless browser pool for JS-rendered pages (universities.browser_pool, needs playwright)
+SCRAPE_BROWSER_ENABLED = os.environ.get('SCRAPE_BROWSER_ENABLED', 'True').lower() == 'true'
+SCRAPE_BROWSER_POOL_SIZE = int(os.environ.get('SCRAPE_BROWSER_POOL_SIZE', 4))
+SCRAPE_BROWSER_IDLE_SECONDS = int(os.environ.get('SCRAPE_BROWSER_IDLE_SECONDS', 300))
+SCRAPE_BROWSER_PAGE_TIMEOUT_MS = int(os.environ.get('SCRAPE_BROWSER_PAGE_TIMEOUT_MS', 30000))
+SCRAPE_BROWSER_BLOCKED_RESOURCES = ('image', 'font', 'media')
+
+# Shared cache, on the broker's Redis unless CACHE_REDIS_URL names another.
+# Entitlement claims (universities.entitlements) need every web and Celery
+# process to see the same entries. CACHE_REDIS_URL='' gives each process its
+# own local-memory cache, which only suits a single-process development
+# server; the universities.E001 system check refuses it when DEBUG is off.
+CACHE_REDIS_URL = os.environ.get(
+    'CACHE_REDIS_URL', CELERY_BROKER_URL if CELERY_BROKER_URL.startswith(('redis://', 'rediss://')) else ''
+)
+if CACHE_REDIS_URL:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': CACHE_REDIS_URL,
+        }
+    }
+else:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        }
+    }
+
+# Stale-while-revalidate scholarships cache (universities.scholarship_cache)
+SCHOLARSHIP_CACHE_SOFT_TTL = int(os.environ.get('SCHOLARSHIP_CACHE_SOFT_TTL', 6 * 3600))
+SCHOLARSHIP_CACHE_HARD_TTL = int(os.environ.get('SCHOLARSHIP_CACHE_HARD_TTL', 7 * 86400))
+SCHOLARSHIP_REFRESH_LOCK_SECONDS = int(os.environ.get('SCHOLARSHIP_REFRESH_LOCK_SECONDS', 300))
+SCHOLARSHIP_FETCH_LIMIT = int(os.environ.get('SCHOLARSHIP_FETCH_LIMIT', 10))
+SCHOLARSHIP_RESULTS_MAX_AGE_DAYS = int(os.environ.get('SCHOLARSHIP_RESULTS_MAX_AGE_DAYS', 30))
+SCHOLARSHIP_RESULTS_KEEP_PER_COUNTRY = int(os.environ.get('SCHOLARSHIP_RESULTS_KEEP_PER_COUNTRY', 5))
+
+# Chapa webhook inbox (payments.services): failed events are retried by the
+# periodic sweep up to this many attempts, then left for replay_webhook_events
+PAYMENT_WEBHOOK_MAX_ATTEMPTS = int(os.environ.get('PAYMENT_WEBHOOK_MAX_ATTEMPTS', 5))
+
+# Payment reconciliation (payments.reconciliation): rows applied per transaction,
+# and how long a payment may stay pending at Chapa before it is marked failed
+PAYMENT_RECONCILE_BATCH_SIZE = int(os.environ.get('PAYMENT_RECONCILE_BATCH_SIZE', 200))
+PAYMENT_PENDING_EXPIRY_HOURS = int(os.environ.get('PAYMENT_PENDING_EXPIRY_HOURS', 48))
+
+# Chapa API client (payments.chapa). Point CHAPA_API_BASE_URL at the local
+# stand-in (manage.py run_chapa_standin) to work offline. The circuit breaker
+# opens after this many consecutive timeouts/5xx and fails calls fast until
+# the reset period has passed.
+CHAPA_API_BASE_URL = os.environ.get('CHAPA_API_BASE_URL', 'https://api.chapa.co/v1')
+CHAPA_CONNECT_TIMEOUT_SECONDS = float(os.environ.get('CHAPA_CONNECT_TIMEOUT_SECONDS', 3.05))
+CHAPA_READ_TIMEOUT_SECONDS = float(os.environ.get('CHAPA_READ_TIMEOUT_SECONDS', 10))
+CHAPA_BREAKER_FAILURE_THRESHOLD = int(os.environ.get('CHAPA_BREAKER_FAILURE_THRESHOLD', 5))
+CHAPA_BREAKER_RESET_SECONDS = int(os.environ.get('CHAPA_BREAKER_RESET_SECONDS', 30))
+CHAPA_MAX_REQUESTS_PER_SECOND = float(os.environ.get('CHAPA_MAX_REQUESTS_PER_SECOND', 10))
+CHAPA_VERIFY_WORKERS = int(os.environ.get('CHAPA_VERIFY_WORKERS', 8))
+
+# Async endpoints (/api/async/, served by SERVER_MODE=asgi): connections each
+# shared httpx client (universities.async_http) keeps open per worker
+ASYNC_HTTP_MAX_CONNECTIONS = int(os.environ.get('ASYNC_HTTP_MAX_CONNECTIONS', 200))
+
+# Subscription sweeps (universities.subscriptions): renewal reminders go to
+# subscriptions ending this many days ahead, in batches of this many users per
+# task; sending them is off by default like the other notification emails
+SUBSCRIPTION_REMINDER_DAYS = int(os.environ.get('SUBSCRIPTION_REMINDER_DAYS', 7))
+SUBSCRIPTION_REMINDER_BATCH_SIZE = int(os.environ.get('SUBSCRIPTION_REMINDER_BATCH_SIZE', 500))
+SUBSCRIPTION_REMINDER_EMAILS_ENABLED = os.environ.get('SUBSCRIPTION_REMINDER_EMAILS_ENABLED', 'False').lower() == 'true'
+
+# Application draft retention (universities.draft_retention): drafts older than
+# this whose payment was processed are archived as gzipped NDJSON to the
+# directory (empty to delete without archiving), then deleted in chunks
+APPLICATION_DRAFT_RETENTION_DAYS = int(os.environ.get('APPLICATION_DRAFT_RETENTION_DAYS', 90))
+APPLICATION_DRAFT_PURGE_CHUNK_SIZE = int(os.environ.get('APPLICATION_DRAFT_PURGE_CHUNK_SIZE', 1000))
+APPLICATION_DRAFT_ARCHIVE_DIR = os.environ.get('APPLICATION_DRAFT_ARCHIVE_DIR', os.path.join(BASE_DIR, 'archives', 'application_drafts'))
+
+# Login (universities.backends): usernames and emails are matched
+# case-insensitively in one query; the profile claims of the tokens it mints
+# are cached per user for this long (universities.token_claims)
+AUTHENTICATION_BACKENDS = ['universities.backends.UsernameOrEmailBackend']
+TOKEN_CLAIMS_CACHE_SECONDS = int(os.environ.get('TOKEN_CLAIMS_CACHE_SECONDS', 3600))
@@ -23,6 +23,8 @@ from universities.views import PaymentWebhookView
 from rest_framework.routers import DefaultRouter
 from contacts.views import ContactViewSet
 from universities import views as university_views
+from universities import async_views as university_async_views
+from payments import async_views as payment_async_views
 from profiles import views as profiles_views
 
 router = DefaultRouter()
@@ -30,6 +32,14 @@ router = DefaultRouter()
 router.register(r'users', university_views.UserViewSet, basename='user')
 router.register(r'contacts', ContactViewSet, basename='contact')
 
+# Async twins of the endpoints that wait on outbound calls (see universities.async_views)
+async_urlpatterns = [
+    path('initialize-payment/', university_async_views.initialize_payment, name='async-initialize-payment'),
+    path('scholarships/', university_async_views.get_scholarships, name='async-scholarships'),
+    path('universities/scrape/', university_async_views.scrape_university, name='async-university-scrape'),
+    path('payments/confirm/', payment_async_views.confirm_payment, name='async-confirm-payment'),
+]
+
 # Group all API endpoints under a single prefix for clarity and better organization.
 api_urlpatterns = [
     path('', include('universities.urls')),
@@ -40,6 +50,7 @@ api_urlpatterns = [
     path('payments/', include('payments.urls')),
     path('gamification/', include('gamification.urls')),
     path('emails/', include('emails.urls')),
+    path('async/', include(async_urlpatterns)),
     path('', include(router.urls)), # for contacts app
 ]
 